@@ -1,83 +1,314 @@
-import boto3
+import json
 import logging
-import re
-from chalice import Chalice, BadRequestError, CognitoUserPoolAuthorizer, NotFoundError, ChaliceViewError
+import os
+from functools import wraps
+
+import boto3
+
+from chalice import Chalice, BadRequestError, CognitoUserPoolAuthorizer, NotFoundError, ChaliceViewError, Rate, \
+    ConflictError, UnprocessableEntityError, Response
 
+from chalicelib.src.config import cognito
+from chalicelib.src.config.admission import configure_admission
 from chalicelib.src.config.db import init_db
+from chalicelib.src.config.warmup import warmup
 from chalicelib.src.modules.application.commands.create_cognito_user import CreateCognitoUserCommand
 from chalicelib.src.modules.application.commands.create_user import CreateUserCommand
-from chalicelib.src.modules.application.commands.delete_cognito_user import DeleteCognitoUserCommand
+from chalicelib.src.modules.application.commands.drain_cognito_outbox import DrainCognitoOutboxCommand
 from chalicelib.src.modules.application.commands.delete_user import DeleteUserCommand
-from chalicelib.src.modules.application.commands.update_cognito_user import UpdateCognitoUserCommand
+from chalicelib.src.modules.application.commands.provision_users import ProvisionUsersCommand
+from chalicelib.src.modules.application.commands.purge_deleted_users import PurgeDeletedUsersCommand
+from chalicelib.src.modules.application.commands.rebuild_user_stats import RebuildUserStatsCommand
+from chalicelib.src.modules.application.commands.reconcile_users import ReconcileUsersCommand
 from chalicelib.src.modules.application.commands.update_user import UpdateUserCommand
 from chalicelib.src.modules.application.queries.get_cognito_user import GetCognitoUserQuery
+from chalicelib.src.modules.application.queries.get_cognito_users import GetCognitoUsersQuery
 from chalicelib.src.modules.application.queries.get_user import GetUserQuery
+from chalicelib.src.modules.application.queries.get_user_stats import GetUserStatsQuery
 from chalicelib.src.modules.application.queries.get_users import GetUsersQuery
+from chalicelib.src.modules.application.queries.get_users_by_sub import GetUsersBySubQuery
+from chalicelib.src.modules.application.queries.get_user_changes import GetUserChangesQuery
+from chalicelib.src.modules.application.exceptions import IdempotencyKeyInProgressException, \
+    IdempotencyKeyReusedException, InvalidChangesCursorException, ChangesCursorExpiredException
+from chalicelib.src.modules.application.services.idempotency import IdempotencyService
+from chalicelib.src.modules.presentation.validators import CREATE_USER_VALIDATOR, REGISTER_USER_VALIDATOR, \
+    UPDATE_ME_VALIDATOR
+from chalicelib.src.seedwork.domain.exceptions import ValidationException
 from chalicelib.src.seedwork.application.commands import execute_command
-from chalicelib.src.seedwork.application.queries import execute_query
+from chalicelib.src.seedwork.application.queries import execute_query, gather_queries
+from chalicelib.src.seedwork.infrastructure.admission import ADMISSION, AdmissionRejectedException
+from chalicelib.src.seedwork.infrastructure.event_loop import run_sync
+from chalicelib.src.seedwork.infrastructure.metrics import collect_metrics
+from chalicelib.src.seedwork.infrastructure.profiling import RequestProfile
+from chalicelib.src.seedwork.infrastructure.tracing import SPAN_KIND_SERVER, STATUS_ERROR, TRACER
 
 app = Chalice(app_name='abcall-users-microservice')
 app.debug = True
 
 LOGGER = logging.getLogger('abcall-users-microservice')
 
+configure_admission()
+
 authorizer = CognitoUserPoolAuthorizer(
     'AbcPool',
     provider_arns=['arn:aws:cognito-idp:us-east-1:044162189377:userpool/us-east-1_YDIpg1HiU']
 )
 
-_COGNITO_CLIENT = None
-
 
 def get_cognito_client():
-    global _COGNITO_CLIENT
-    if _COGNITO_CLIENT is None:
-        _COGNITO_CLIENT = boto3.client('cognito-idp', region_name='us-east-1')
-    return _COGNITO_CLIENT
+    return cognito.get_cognito_client()
 
 
 USER_POOL_ID = 'us-east-1_YDIpg1HiU'
 CLIENT_ID = '65sbvtotc1hssqecgusj1p3f9g'
+ASYNC_EXECUTION = os.getenv('ASYNC_EXECUTION', 'false').lower() == 'true'
+USER_STATS_SOURCE = os.getenv('USER_STATS_SOURCE', 'live')
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '100'))
+OUTBOX_MAX_BATCHES = int(os.getenv('OUTBOX_MAX_BATCHES', '20'))
+PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', '100'))
+PURGE_MAX_BATCHES = int(os.getenv('PURGE_MAX_BATCHES', '10'))
+# Also the maximum age of a /users/changes cursor: deletions older than this are purged from the feed.
+PURGE_GRACE_SECONDS = int(os.getenv('PURGE_GRACE_SECONDS', str(7 * 24 * 3600)))
+PURGE_CONCURRENCY = int(os.getenv('PURGE_CONCURRENCY', '4'))
+PURGE_REQUESTS_PER_SECOND = float(os.getenv('PURGE_REQUESTS_PER_SECOND', '10'))
+RECONCILE_REPAIR = os.getenv('RECONCILE_REPAIR', 'false').lower() == 'true'
+RECONCILE_MAX_BUCKETS = int(os.getenv('RECONCILE_MAX_BUCKETS', '16'))
+CHANGES_MAX_LIMIT = int(os.getenv('CHANGES_MAX_LIMIT', '500'))
+USERS_JSON_AGGREGATION = os.getenv('USERS_JSON_AGGREGATION', 'false').lower() == 'true'
+BATCH_GET_MAX_SUBS = int(os.getenv('BATCH_GET_MAX_SUBS', '100'))
+USER_PROVISIONING_QUEUE = os.getenv('USER_PROVISIONING_QUEUE', 'abcall-users-provisioning')
+USER_PROVISIONING_BATCH_SIZE = int(os.getenv('USER_PROVISIONING_BATCH_SIZE', '10'))
+USER_PROVISIONING_BATCH_WINDOW = int(os.getenv('USER_PROVISIONING_BATCH_WINDOW', '0'))
+USER_PROVISIONING_CONCURRENCY = int(os.getenv('USER_PROVISIONING_CONCURRENCY', '8'))
+KEEP_WARM_FUNCTION_NAME = os.getenv('KEEP_WARM_FUNCTION_NAME')
+KEEP_WARM_CONCURRENCY = int(os.getenv('KEEP_WARM_CONCURRENCY', '1'))
+WARMUP_ON_INIT = os.getenv('WARMUP_ON_INIT', str(os.getenv('ENVIRONMENT') == 'production')).lower() == 'true'
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true' and \
+    os.getenv('ENVIRONMENT') != 'production'
+PROFILE_TOP_N = int(os.getenv('PROFILE_TOP_N', '15'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', '/tmp/profiles')
+PROFILE_HEADER = 'X-Profile'
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+SELF_UPDATE_PROTECTED_FIELDS = frozenset({'user_role', 'client_id', 'cognito_user_sub'})
+
+
+def execute_queries(*queries):
+    if ASYNC_EXECUTION:
+        return run_sync(gather_queries(*queries))
+    return [execute_query(query) for query in queries]
+
+
+def validate_payload(validator, payload, partial=False):
+    try:
+        return validator.validate(payload, partial=partial)
+    except ValidationException as e:
+        raise BadRequestError(str(e))
+
+
+@app.middleware('http')
+def trace_request(event, get_response):
+    if not TRACER.enabled:
+        return get_response(event)
+
+    route = event.context.get('resourcePath', event.path)
+    with TRACER.span(f"{event.method} {route}", SPAN_KIND_SERVER, **{'http.method': event.method,
+                                                                     'http.route': route}) as span:
+        response = get_response(event)
+        span.set_attribute('http.status_code', response.status_code)
+        if response.status_code >= 500:
+            span.status = STATUS_ERROR
+    return response
+
+
+@app.middleware('http')
+def profile_request(event, get_response):
+    mode = (event.headers or {}).get(PROFILE_HEADER) if PROFILING_ENABLED else None
+    if not mode:
+        return get_response(event)
+
+    with RequestProfile() as profile:
+        response = get_response(event)
+
+    top = profile.top(PROFILE_TOP_N)
+    response.headers['X-Profile-Time-Ms'] = f"{profile.elapsed * 1000:.3f}"
+    response.headers['X-Profile-Operations'] = ','.join(profile.operations)
+    response.headers['X-Profile-Stats'] = '; '.join(f"{entry['cumulative_ms']}ms {entry['function']}" for entry in top)
+    if mode == 'file' and profile.active:
+        response.headers['X-Profile-File'] = profile.dump(PROFILE_DIR, f"{event.method}{event.path}")
+    return response
+
+
+def request_client_id(route_params):
+    request = app.current_request
+    client_id = route_params.get('client_id') or (request.query_params or {}).get('client_id')
+    if client_id is None and request.method in ('POST', 'PUT'):
+        try:
+            body = request.json_body
+        except BadRequestError:
+            body = None
+        if isinstance(body, dict):
+            client_id = body.get('client_id')
+    return str(client_id) if client_id not in (None, '') else None
+
+
+def admitted(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            with ADMISSION.tenant(request_client_id(kwargs)):
+                return func(*args, **kwargs)
+        except AdmissionRejectedException as e:
+            return Response(body={'message': str(e)}, status_code=429,
+                            headers={'Retry-After': str(e.retry_after_seconds)})
+    return wrapper
+
+
+def idempotent(scope):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (app.current_request.headers or {}).get(IDEMPOTENCY_KEY_HEADER)
+            if not key:
+                return func(*args, **kwargs)
+            if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+                raise BadRequestError(f"{IDEMPOTENCY_KEY_HEADER} must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+
+            # Keys are only unique per caller, so authorized routes scope them to the caller's sub.
+            claims = ((app.current_request.context or {}).get('authorizer') or {}).get('claims') or {}
+            caller_scope = f"{scope}:{claims['sub']}" if claims.get('sub') else scope
+            try:
+                return IdempotencyService().run(caller_scope, key, app.current_request.json_body,
+                                                lambda: func(*args, **kwargs))
+            except IdempotencyKeyReusedException as e:
+                raise UnprocessableEntityError(str(e))
+            except IdempotencyKeyInProgressException as e:
+                raise ConflictError(str(e))
+        return wrapper
+    return decorator
 
 
 @app.route('/users/{client_id}', cors=True, methods=['GET'], authorizer=authorizer)
+@admitted
 def index(client_id):
     if client_id is None:
         client_id = ""
 
     try:
-        query_result = execute_query(GetUsersQuery(client_id=client_id))
-        return query_result.result
+        query_result = execute_query(GetUsersQuery(client_id=client_id, encoded=USERS_JSON_AGGREGATION,
+                                                   serialized=True))
     except Exception as e:
         LOGGER.error(f"Error loading users: {str(e)}")
         raise ChaliceViewError('An error occurred while loading users')
+    return Response(body=query_result.result, status_code=200, headers={'Content-Type': 'application/json'})
+
+
+@app.route('/users/{client_id}/stats', cors=True, methods=['GET'], authorizer=authorizer)
+@admitted
+def user_stats(client_id):
+    query_params = app.current_request.query_params or {}
+    source = query_params.get('source', USER_STATS_SOURCE)
+    if source not in ('live', 'counters'):
+        raise BadRequestError("Invalid 'source' value. Must be one of ['live', 'counters']")
+
+    try:
+        query_result = execute_query(GetUserStatsQuery(client_id=client_id, from_counters=source == 'counters'))
+        return query_result.result
+    except Exception as e:
+        LOGGER.error(f"Error loading user stats for client {client_id}: {str(e)}")
+        raise ChaliceViewError('An error occurred while loading user stats')
+
+
+@app.route('/users/changes', cors=True, methods=['GET'], authorizer=authorizer)
+@admitted
+def user_changes():
+    query_params = app.current_request.query_params or {}
+    client_id = query_params.get('client_id')
+    if not client_id:
+        raise BadRequestError("Missing required query parameter: 'client_id'")
+    try:
+        limit = int(query_params.get('limit', '100'))
+    except ValueError:
+        raise BadRequestError("'limit' must be an integer")
+    if not 1 <= limit <= CHANGES_MAX_LIMIT:
+        raise BadRequestError(f"'limit' must be between 1 and {CHANGES_MAX_LIMIT}")
+
+    try:
+        query_result = execute_query(GetUserChangesQuery(client_id=client_id, since=query_params.get('since'),
+                                                         limit=limit, max_cursor_age_seconds=PURGE_GRACE_SECONDS))
+        return query_result.result
+    except InvalidChangesCursorException as e:
+        raise BadRequestError(str(e))
+    except ChangesCursorExpiredException as e:
+        return Response(body={'message': str(e), 'error': 'resync'}, status_code=410)
+    except Exception as e:
+        LOGGER.error(f"Error loading user changes for client {client_id}: {str(e)}")
+        raise ChaliceViewError('An error occurred while loading user changes')
 
 
 @app.route('/users', cors=True, methods=['GET'])
+@admitted
 def user_by_id_number():
-    query_result = execute_query(GetUsersQuery(filters=app.current_request.query_params))
-
-    for result in query_result.result:
-        cognito_query_result = execute_query(
-            GetCognitoUserQuery(
-                cognito_client=get_cognito_client(),
-                user_pool_id=USER_POOL_ID,
-                user_sub=result["cognito_user_sub"]
-            )
+    try:
+        query_result = execute_query(GetUsersQuery(filters=app.current_request.query_params))
+    except ValueError as e:
+        raise BadRequestError(str(e))
+
+    cognito_query_result = execute_query(
+        GetCognitoUsersQuery(
+            cognito_client=get_cognito_client(),
+            user_pool_id=USER_POOL_ID,
+            user_subs=[result["cognito_user_sub"] for result in query_result.result]
         )
-        cognito_result = cognito_query_result.result
+    )
+    for result in query_result.result:
+        cognito_result = cognito_query_result.result[result["cognito_user_sub"]]
         result['email'] = next(attr['Value'] for attr in cognito_result['UserAttributes'] if attr['Name'] == 'email')
 
     return query_result.result
 
 
+def cognito_email(cognito_result):
+    if not cognito_result:
+        return None
+    return next((attr['Value'] for attr in cognito_result['UserAttributes'] if attr['Name'] == 'email'), None)
+
+
+@app.route('/users/batch-get', cors=True, methods=['POST'])
+@admitted
+def users_batch_get():
+    body = app.current_request.json_body or {}
+    user_subs = body.get('user_subs') if isinstance(body, dict) else None
+    if not isinstance(user_subs, list) or not user_subs or not all(isinstance(sub, str) for sub in user_subs):
+        raise BadRequestError("'user_subs' must be a non-empty list of strings")
+    user_subs = list(dict.fromkeys(user_subs))
+    if len(user_subs) > BATCH_GET_MAX_SUBS:
+        raise BadRequestError(f"At most {BATCH_GET_MAX_SUBS} user_subs can be requested at once")
+
+    try:
+        users = execute_query(GetUsersBySubQuery(user_subs=user_subs)).result
+        cognito_users = execute_query(GetCognitoUsersQuery(cognito_client=get_cognito_client(),
+                                                           user_pool_id=USER_POOL_ID,
+                                                           user_subs=list(users))).result if users else {}
+    except Exception as e:
+        LOGGER.error(f"Error resolving users batch: {str(e)}")
+        raise ChaliceViewError('An error occurred while resolving the users')
+
+    found = []
+    for user_sub in user_subs:
+        if user_sub in users:
+            found.append({**users[user_sub], 'email': cognito_email(cognito_users.get(user_sub))})
+    return {'users': found, 'missing': [user_sub for user_sub in user_subs if user_sub not in users]}
+
+
 @app.route('/user/{user_sub}', cors=True, methods=['GET'])
+@admitted
 def user_get(user_sub):
     try:
-        db_query_result = execute_query(GetUserQuery(user_sub=user_sub))
-        cognito_query_result = execute_query(GetCognitoUserQuery(cognito_client=get_cognito_client(),
-                                                                 user_pool_id=USER_POOL_ID,
-                                                                 user_sub=user_sub))
+        db_query_result, cognito_query_result = execute_queries(
+            GetUserQuery(user_sub=user_sub),
+            GetCognitoUserQuery(cognito_client=get_cognito_client(), user_pool_id=USER_POOL_ID, user_sub=user_sub)
+        )
         if not db_query_result.result:
             return {'status': 'fail', 'message': 'User not found'}
         result = db_query_result.result
@@ -90,48 +321,32 @@ def user_get(user_sub):
 
 
 @app.route('/user/{user_sub}', cors=True, methods=['DELETE'], authorizer=authorizer)
+@admitted
 def user_delete(user_sub):
     if not user_sub:
         return BadRequestError('Invalid user subscription')
 
     command = DeleteUserCommand(cognito_user_sub=user_sub)
 
-    try:
-        execute_command(command)
-    except Exception as e:
-        LOGGER.error(f"Error Deleting user {user_sub}: {str(e)}")
-        raise ChaliceViewError('An error occurred while deleting the user')
-
-    command = DeleteCognitoUserCommand(cognito_client=get_cognito_client(),
-                                       user_sub=user_sub,
-                                       user_pool_id=USER_POOL_ID)
     try:
         execute_command(command)
         return {"message": f"Usuario {user_sub} eliminado exitosamente"}
     except Exception as e:
-        LOGGER.error(f"Error deleting cognito user {user_sub}: {str(e)}")
+        LOGGER.error(f"Error Deleting user {user_sub}: {str(e)}")
         raise ChaliceViewError('An error occurred while deleting the user')
 
 
 @app.route('/user/{user_sub}', cors=True, methods=['PUT'], authorizer=authorizer)
+@admitted
 def user_update(user_sub):
     if not user_sub:
         raise BadRequestError('Invalid user subscription')
 
     user_as_json = app.current_request.json_body
-    command = UpdateUserCommand(cognito_user_sub=user_sub, user_data=user_as_json)
+    command = UpdateUserCommand(cognito_user_sub=user_sub, user_data=user_as_json, sync_cognito=True)
 
-    attributes = {}
-    if 'client_id' in user_as_json:
-        attributes['custom:client_id'] = str(user_as_json['client_id'])
-    if 'user_role' in user_as_json:
-        attributes['custom:custom:userRole'] = user_as_json['user_role']
     try:
         execute_command(command)
-        if attributes:
-            cognito_command = UpdateCognitoUserCommand(cognito_client=get_cognito_client(), user_sub=user_sub,
-                                                       user_pool_id=USER_POOL_ID, attributes=attributes)
-            execute_command(cognito_command)
         return {'status': 'success'}
     except Exception as e:
         LOGGER.error(f"Error updating user {user_sub}: {str(e)}")
@@ -139,33 +354,14 @@ def user_update(user_sub):
 
 
 @app.route('/user', cors=True, methods=['POST'], authorizer=authorizer)
+@admitted
+@idempotent('user_post')
 def user_post():
     LOGGER.info("Receive create user request")
     user_as_json = app.current_request.json_body
     cognito_client = get_cognito_client()
 
-    required_fields = ["client_id", "document_type", "user_role", "id_number", "name", "last_name", "email",
-                       "cellphone",
-                       "password", "communication_type"]
-    for field in required_fields:
-        if field not in user_as_json:
-            raise BadRequestError(f"Missing required field: {field}")
-
-    valid_types = ["Cedula", "Passport", "Cedula_Extranjeria"]
-    if user_as_json["document_type"] not in valid_types:
-        raise BadRequestError(f"Invalid 'type' value. Must be one of {valid_types}")
-
-    valid_types = ['Superadmin', 'Admin', 'Agent', 'Regular']
-    if user_as_json["user_role"] not in valid_types:
-        raise BadRequestError(f"Invalid 'type' value. Must be one of {valid_types}")
-
-    valid_types = ['Email', 'Telefono', 'Sms', 'Chat']
-    if user_as_json["communication_type"] not in valid_types:
-        raise BadRequestError(f"Invalid 'communication type' value. Must be one of {valid_types}")
-
-    email_regex = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
-    if not re.match(email_regex, user_as_json["email"]):
-        raise BadRequestError("Invalid email format")
+    validate_payload(CREATE_USER_VALIDATOR, user_as_json)
 
     try:
         cognito_command = CreateCognitoUserCommand(
@@ -205,6 +401,7 @@ def user_post():
 
 
 @app.route('/user/me', cors=True, methods=['GET'], authorizer=authorizer)
+@admitted
 def get_current_user():
     LOGGER.info("Find Me User")
     user_info = app.current_request.context['authorizer']['claims']
@@ -219,7 +416,7 @@ def get_current_user():
             'user_role': user_info['custom:custom:userRole'],
         }
 
-        query_result = execute_query(GetUserQuery(user_sub=user_sub))
+        query_result = execute_query(GetUserQuery(user_sub=user_sub, use_cache=True))
 
         if not query_result.result:
             raise NotFoundError('User not found')
@@ -239,6 +436,7 @@ def get_current_user():
 
 
 @app.route('/user/me', cors=True, methods=['PUT'], authorizer=authorizer)
+@admitted
 def update_me():
     LOGGER.info("Update Me User")
     user_info = app.current_request.context['authorizer']['claims']
@@ -247,15 +445,10 @@ def update_me():
 
     user_as_json = app.current_request.json_body
 
-    if 'document_type' in user_as_json:
-        valid_types = ['Cedula', 'Cedula_Extranjeria', "Passport"]
-        if user_as_json["document_type"] not in valid_types:
-            raise BadRequestError(f"Invalid 'document_type' value. Must be one of {valid_types}")
-
-    if 'communication_type' in user_as_json:
-        valid_types = ['Email', 'Telefono', 'Sms', 'Chat']
-        if user_as_json["communication_type"] not in valid_types:
-            raise BadRequestError(f"Invalid 'communication_type' value. Must be one of {valid_types}")
+    validate_payload(UPDATE_ME_VALIDATOR, user_as_json, partial=True)
+    protected = sorted(SELF_UPDATE_PROTECTED_FIELDS.intersection(user_as_json or {}))
+    if protected:
+        raise BadRequestError(f"Fields cannot be changed on your own profile: {', '.join(protected)}")
 
     command = UpdateUserCommand(cognito_user_sub=user_sub, user_data=user_as_json)
 
@@ -269,29 +462,14 @@ def update_me():
 
 
 @app.route('/user/register', cors=True, methods=['POST'])
+@admitted
+@idempotent('register')
 def register():
     LOGGER.info("Receive create user request")
     user_as_json = app.current_request.json_body
     cognito_client = get_cognito_client()
 
-    required_fields = ["client_id", "document_type", "id_number", "name", "last_name", "email",
-                       "cellphone",
-                       "password", "communication_type"]
-    for field in required_fields:
-        if field not in user_as_json:
-            raise BadRequestError(f"Missing required field: {field}")
-
-    valid_types = ["Cedula", "Passport", "Cedula_Extranjeria"]
-    if user_as_json["document_type"] not in valid_types:
-        raise BadRequestError(f"Invalid 'type' value. Must be one of {valid_types}")
-
-    valid_types = ['Email', 'Telefono', 'Sms', 'Chat']
-    if user_as_json["communication_type"] not in valid_types:
-        raise BadRequestError(f"Invalid 'communication type' value. Must be one of {valid_types}")
-
-    email_regex = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
-    if not re.match(email_regex, user_as_json["email"]):
-        raise BadRequestError("Invalid email format")
+    validate_payload(REGISTER_USER_VALIDATOR, user_as_json)
 
     user_as_json['user_role'] = 'Regular'
 
@@ -327,10 +505,139 @@ def register():
     return {'status': "ok", 'message': "User created successfully", 'cognito_user_sub': cognito_user_sub}
 
 
+@app.route('/warmup', methods=['GET'])
+def warmup_route():
+    return warmup()
+
+
+@app.route('/metrics', cors=True, methods=['GET'], authorizer=authorizer)
+def metrics():
+    return collect_metrics()
+
+
 @app.route('/migrate', methods=['POST'])
 def migrate():
     try:
         init_db(migrate=True)
+        execute_command(RebuildUserStatsCommand())
         return {"message": "Tablas creadas con éxito"}
     except Exception as e:
         return {"error": str(e)}
+
+
+def drain_outbox(max_batches=OUTBOX_MAX_BATCHES):
+    totals = {'claimed': 0, 'processed': 0, 'rescheduled': 0, 'failed': 0}
+    for _ in range(max_batches):
+        result = execute_command(DrainCognitoOutboxCommand(cognito_client=get_cognito_client(),
+                                                           user_pool_id=USER_POOL_ID,
+                                                           batch_size=OUTBOX_BATCH_SIZE))
+        for key in totals:
+            totals[key] += result[key]
+        if result['claimed'] < OUTBOX_BATCH_SIZE:
+            break
+    return totals
+
+
+@app.schedule(Rate(1, unit=Rate.MINUTES))
+def drain_cognito_outbox(event):
+    totals = drain_outbox()
+    LOGGER.info(f"Cognito outbox drain finished: {totals}")
+    return totals
+
+
+@app.schedule(Rate(1, unit=Rate.HOURS))
+def purge_idempotency_keys(event):
+    purged = IdempotencyService().purge_expired()
+    LOGGER.info(f"Purged {purged} expired idempotency keys")
+    return {'purged': purged}
+
+
+@app.schedule(Rate(15, unit=Rate.MINUTES))
+def purge_deleted_users(event):
+    totals = {'claimed': 0, 'purged': 0, 'failed': 0}
+    for _ in range(PURGE_MAX_BATCHES):
+        result = execute_command(PurgeDeletedUsersCommand(cognito_client=get_cognito_client(),
+                                                          user_pool_id=USER_POOL_ID,
+                                                          batch_size=PURGE_BATCH_SIZE,
+                                                          grace_seconds=PURGE_GRACE_SECONDS,
+                                                          concurrency=PURGE_CONCURRENCY,
+                                                          requests_per_second=PURGE_REQUESTS_PER_SECOND))
+        for key in totals:
+            totals[key] += result[key]
+        if result['claimed'] < PURGE_BATCH_SIZE or not result['purged']:
+            break
+    LOGGER.info(f"Deleted users purge finished: {totals}")
+    return totals
+
+
+@app.schedule(Rate(1, unit=Rate.HOURS))
+def reconcile_users(event):
+    return execute_command(ReconcileUsersCommand(cognito_client=get_cognito_client(),
+                                                 user_pool_id=USER_POOL_ID,
+                                                 repair=RECONCILE_REPAIR,
+                                                 max_buckets=RECONCILE_MAX_BUCKETS))
+
+
+@app.on_sqs_message(queue=USER_PROVISIONING_QUEUE, batch_size=USER_PROVISIONING_BATCH_SIZE,
+                    maximum_batching_window_in_seconds=USER_PROVISIONING_BATCH_WINDOW)
+def provision_users(event):
+    users, failed = {}, []
+    for record in event:
+        message_id = record.to_dict()['messageId']
+        try:
+            users[message_id] = json.loads(record.body)
+        except ValueError:
+            users[message_id] = None
+
+    for message_id, errors in zip(list(users), CREATE_USER_VALIDATOR.validate_many(list(users.values()))):
+        if errors:
+            LOGGER.warning(f"Rejected user provisioning message {message_id}: {'; '.join(errors)}")
+            del users[message_id]
+            failed.append(message_id)
+
+    if users:
+        try:
+            result = execute_command(ProvisionUsersCommand(cognito_client=get_cognito_client(),
+                                                           user_pool_id=USER_POOL_ID,
+                                                           users=users,
+                                                           concurrency=USER_PROVISIONING_CONCURRENCY))
+            failed.extend(result['failed'])
+        except (Exception, AdmissionRejectedException) as e:
+            LOGGER.error(f"Error provisioning a batch of {len(users)} users: {str(e)}")
+            failed.extend(users)
+
+    LOGGER.info(f"User provisioning batch finished with {len(failed)} failed messages")
+    return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failed]}
+
+
+def keep_warm_event():
+    return {
+        'resource': '/warmup',
+        'path': '/warmup',
+        'httpMethod': 'GET',
+        'headers': {},
+        'multiValueHeaders': {},
+        'queryStringParameters': None,
+        'multiValueQueryStringParameters': None,
+        'pathParameters': None,
+        'stageVariables': None,
+        'requestContext': {'resourcePath': '/warmup', 'httpMethod': 'GET', 'path': '/warmup'},
+        'body': None,
+        'isBase64Encoded': False,
+    }
+
+
+@app.schedule(Rate(5, unit=Rate.MINUTES))
+def keep_warm(event):
+    result = warmup()
+    if KEEP_WARM_FUNCTION_NAME:
+        lambda_client = boto3.client('lambda')
+        payload = json.dumps(keep_warm_event()).encode('utf-8')
+        for _ in range(KEEP_WARM_CONCURRENCY):
+            lambda_client.invoke(FunctionName=KEEP_WARM_FUNCTION_NAME, InvocationType='Event', Payload=payload)
+        LOGGER.info(f"Sent {KEEP_WARM_CONCURRENCY} keep-warm pings to {KEEP_WARM_FUNCTION_NAME}")
+    return result
+
+
+if WARMUP_ON_INIT:
+    warmup()
@@ -0,0 +1,41 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+from chalicelib.src.config.warmup import warmup
+first = warmup()
+second = warmup()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'warmup_ms': first['timings_ms']['total'],
+    'rewarm_ms': second['timings_ms']['total'],
+    'steps_ms': first['timings_ms'],
+    'failed_steps': first['failed_steps'],
+}))
+"""
+
+
+def run(samples=5):
+    results = []
+    for _ in range(samples):
+        output = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True, check=True,
+                                env={**os.environ, 'WARMUP_ON_INIT': 'false'})
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    for metric in ('import_ms', 'warmup_ms', 'rewarm_ms'):
+        values = [result[metric] for result in results]
+        print(f"{metric:>10}: median {statistics.median(values):8.2f} ms  max {max(values):8.2f} ms")
+    print(f"     steps: {results[-1]['steps_ms']}")
+    if results[-1]['failed_steps']:
+        print(f"    failed: {results[-1]['failed_steps']} (backend not reachable from this host)")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from chalicelib.src.config.db import driver_url
+from chalicelib.src.modules.infrastructure.dto import Base
+from chalicelib.src.modules.infrastructure.repository import UserRepositoryPostgres
+
+SCHEMA = 'bench_drivers'
+
+
+def new_user(client_id=1):
+    return SimpleNamespace(cognito_user_sub=str(uuid.uuid4()), document_type='Cedula', user_role='Agent',
+                           client_id=client_id, id_number='123', name='John', last_name='Doe',
+                           communication_type='Email', cellphone=None)
+
+
+def timed(label, operation, rows):
+    started = time.perf_counter()
+    operation()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:>22}: {elapsed * 1000:9.1f} ms  {rows / elapsed:9,.0f} rows/s")
+
+
+def run(rows=500):
+    database_url = os.getenv('BENCH_DATABASE_URL')
+    if not database_url:
+        print('Set BENCH_DATABASE_URL to a scratch Postgres database to run this benchmark.')
+        sys.exit(1)
+
+    for driver in ('psycopg2', 'psycopg'):
+        engine = create_engine(driver_url(database_url, driver), connect_args={'options': f'-csearch_path={SCHEMA}'})
+        with engine.begin() as connection:
+            connection.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE'))
+            connection.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+
+        print(driver)
+        with patch('chalicelib.src.modules.infrastructure.repository.init_db', return_value=session):
+            repository = UserRepositoryPostgres()
+            single = [new_user() for _ in range(rows)]
+            bulk = [new_user() for _ in range(rows)]
+            timed('add (one by one)', lambda: [repository.add(user) for user in single], rows)
+            timed('add_many', lambda: repository.add_many(bulk), rows)
+            timed('update (one by one)',
+                  lambda: [repository.update(user.cognito_user_sub, {'name': 'Jane'}) for user in single], rows)
+            timed('update_many',
+                  lambda: repository.update_many({user.cognito_user_sub: {'name': 'Jane'} for user in bulk}), rows)
+            timed('remove (one by one)', lambda: [repository.remove(user.cognito_user_sub) for user in single], rows)
+            timed('remove_many', lambda: repository.remove_many([user.cognito_user_sub for user in bulk]), rows)
+
+        session.close()
+        with engine.begin() as connection:
+            connection.execute(text(f'DROP SCHEMA {SCHEMA} CASCADE'))
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    run()
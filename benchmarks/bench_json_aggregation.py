@@ -0,0 +1,70 @@
+import json
+import os
+import sys
+import time
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from chalicelib.src.config.db import driver_url
+from chalicelib.src.modules.infrastructure.dto import Base, CommunicationType, DocumentType, User, UserRole
+from chalicelib.src.modules.infrastructure.repository import UserRepositoryPostgres
+
+SCHEMA = 'bench_json_aggregation'
+SIZES = (1_000, 10_000, 100_000)
+
+
+def seed(session):
+    for client_id, size in enumerate(SIZES, start=1):
+        rows = [dict(cognito_user_sub=f'sub-{client_id}-{n}', document_type=DocumentType.CEDULA,
+                     user_role=UserRole.AGENT, client_id=client_id, id_number=str(n), name=f'name{n}',
+                     last_name=f'last{n}', communication_type=CommunicationType.EMAIL, cellphone='3001234567')
+                for n in range(size)]
+        for start in range(0, size, 10_000):
+            session.execute(insert(User), rows[start:start + 10_000])
+    session.commit()
+
+
+def timed(operation, repeat):
+    best_wall, best_cpu = float('inf'), float('inf')
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        operation()
+        best_wall = min(best_wall, time.perf_counter() - wall)
+        best_cpu = min(best_cpu, time.process_time() - cpu)
+    return best_wall * 1000, best_cpu * 1000
+
+
+def run(repeat=5):
+    database_url = os.getenv('BENCH_DATABASE_URL')
+    if not database_url:
+        print('Set BENCH_DATABASE_URL to a scratch Postgres database to run this benchmark.')
+        sys.exit(1)
+
+    engine = create_engine(driver_url(database_url), connect_args={'options': f'-csearch_path={SCHEMA}'})
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE'))
+        connection.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    seed(session)
+
+    with patch('chalicelib.src.modules.infrastructure.repository.init_db', return_value=session):
+        repository = UserRepositoryPostgres()
+        for client_id, size in enumerate(SIZES, start=1):
+            query = {'client_id': client_id}
+            orm = timed(lambda: json.dumps(repository.get_all(query), separators=(',', ':'), default=str), repeat)
+            database = timed(lambda: repository.get_all_json(query), repeat)
+            print(f"{size:>7} rows: ORM + marshmallow + json {orm[0]:8.1f} ms wall {orm[1]:8.1f} ms cpu  "
+                  f"json_agg {database[0]:8.1f} ms wall {database[1]:8.1f} ms cpu  "
+                  f"({orm[0] / database[0]:.1f}x wall, {orm[1] / max(database[1], 0.001):.1f}x cpu)")
+
+    session.close()
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP SCHEMA {SCHEMA} CASCADE'))
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    run()
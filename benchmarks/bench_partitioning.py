@@ -0,0 +1,86 @@
+import os
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+from chalicelib.src.config.partitioning import ensure_users_partitioning
+from chalicelib.src.modules.infrastructure.dto import Base
+
+LARGE_TENANTS = {1: 300_000, 2: 150_000, 3: 75_000}
+SMALL_TENANTS = range(100, 400)
+SMALL_TENANT_SIZE = 300
+QUERIES = {
+    'latest page': "SELECT id, name, last_name FROM users WHERE client_id = :client_id "
+                   "ORDER BY updated_at DESC, id DESC LIMIT 50",
+    'changes since': "SELECT id FROM users WHERE client_id = :client_id AND updated_at > now() - interval '1 day' "
+                     "ORDER BY updated_at, id LIMIT 100",
+    'stats': "SELECT user_role, count(*) FROM users WHERE client_id = :client_id AND deleted_at IS NULL "
+             "GROUP BY user_role",
+}
+
+
+def load(engine, schema, partitions):
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP SCHEMA IF EXISTS {schema} CASCADE'))
+        connection.execute(text(f'CREATE SCHEMA {schema}'))
+    Base.metadata.tables['users'].create(engine)
+    with engine.begin() as connection:
+        if partitions:
+            ensure_users_partitioning(connection, partitions)
+        tenants = list(LARGE_TENANTS.items()) + [(client_id, SMALL_TENANT_SIZE) for client_id in SMALL_TENANTS]
+        for client_id, size in tenants:
+            connection.execute(text(
+                "INSERT INTO users (cognito_user_sub, document_type, user_role, client_id, id_number, name, "
+                "last_name, communication_type, updated_at) "
+                "SELECT md5(:client_id || '-' || n), 'CEDULA', "
+                "(ARRAY['ADMIN', 'AGENT', 'REGULAR'])[1 + n % 3]::userrole, :client_id, n::text, "
+                "'name' || n, 'last' || n, 'EMAIL', now() - (n || ' seconds')::interval "
+                "FROM generate_series(1, :size) AS n"
+            ), {'client_id': client_id, 'size': size})
+        connection.execute(text('ANALYZE users'))
+        return connection.execute(text(
+            "SELECT coalesce(sum(pg_relation_size(indexrelid)), 0) FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indrelid JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = current_schema()"
+        )).scalar()
+
+
+def measure(engine, client_ids, sql, rounds):
+    samples = []
+    with engine.connect() as connection:
+        for _ in range(rounds):
+            client_id = random.choice(client_ids)
+            started = time.perf_counter()
+            connection.execute(text(sql), {'client_id': client_id}).all()
+            samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95)]
+
+
+def run(rounds=2000):
+    database_url = os.getenv('BENCH_DATABASE_URL')
+    if not database_url:
+        print('Set BENCH_DATABASE_URL to a scratch Postgres database to run this benchmark.')
+        sys.exit(1)
+
+    partitions = int(os.getenv('USERS_PARTITIONS', '16'))
+    layouts = {'plain': 0, f'hash/{partitions}': partitions}
+    for name, layout_partitions in layouts.items():
+        schema = 'bench_partitioned' if layout_partitions else 'bench_plain'
+        engine = create_engine(database_url, connect_args={'options': f'-csearch_path={schema}'})
+        index_bytes = load(engine, schema, layout_partitions)
+        print(f"{name}: {index_bytes / 1024 / 1024:.1f} MiB of indexes")
+        for label, client_ids in (('small tenants', list(SMALL_TENANTS)), ('large tenants', list(LARGE_TENANTS))):
+            for query, sql in QUERIES.items():
+                p50, p95 = measure(engine, client_ids, sql, rounds)
+                print(f"  {label:>13} {query:>13}: p50 {p50:7.3f} ms  p95 {p95:7.3f} ms")
+        with engine.begin() as connection:
+            connection.execute(text(f'DROP SCHEMA {schema} CASCADE'))
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    run()
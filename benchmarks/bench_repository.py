@@ -0,0 +1,82 @@
+import timeit
+from operator import and_
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from chalicelib.src.modules.infrastructure.dto import User, UserSchema, DocumentType, UserRole, CommunicationType
+from chalicelib.src.modules.infrastructure.repository import UserRepositoryPostgres
+
+CLIENTS = 20
+USERS_PER_CLIENT = 100
+
+
+def build_session():
+    engine = create_engine('sqlite://')
+    User.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all(
+        User(cognito_user_sub=f'sub-{client_id}-{n}', document_type=DocumentType.CEDULA, user_role=UserRole.AGENT,
+             client_id=client_id, id_number=str(n), name=f'name{n}', last_name=f'last{n}',
+             communication_type=CommunicationType.EMAIL)
+        for client_id in range(CLIENTS) for n in range(USERS_PER_CLIENT)
+    )
+    session.commit()
+    return session
+
+
+def legacy_get(session, user_sub):
+    user = session.query(User).filter_by(cognito_user_sub=user_sub, deleted_at=None).first()
+    return UserSchema().dump(user)
+
+
+def legacy_get_all(session, query):
+    users = session.query(User).filter(User.deleted_at.is_(None))
+    filters = []
+    if 'client_id' in query:
+        filters.append(User.client_id == query['client_id'])
+    if 'name' in query:
+        filters.append(User.name.ilike(f"%{query['name']}%"))
+    if 'last_name' in query:
+        filters.append(User.last_name.ilike(f"%{query['last_name']}%"))
+    if 'document_type' in query:
+        filters.append(User.document_type == query['document_type'])
+    if 'id_number' in query:
+        filters.append(User.id_number == query['id_number'])
+    result = users.filter(and_(*filters)).all() if len(filters) > 1 else users.filter(filters[0]).all()
+    return UserSchema(many=True).dump(result)
+
+
+def legacy_update(session, user_sub, data):
+    user = session.query(User).filter_by(cognito_user_sub=user_sub, deleted_at=None).first()
+    previous = UserSchema().dump(user)
+    if 'name' in data:
+        user.name = data['name']
+    session.commit()
+    return {'previous': previous, 'current': UserSchema().dump(user)}
+
+
+def run(number=2000):
+    session = build_session()
+    with patch('chalicelib.src.modules.infrastructure.repository.init_db', return_value=session), \
+            patch.object(UserRepositoryPostgres, '_bump_stats'):
+        repository = UserRepositoryPostgres()
+        query = {'client_id': 7, 'name': 'name1'}
+        cases = {
+            'get': (lambda: legacy_get(session, 'sub-7-42'), lambda: repository.get('sub-7-42')),
+            'get_all': (lambda: legacy_get_all(session, query), lambda: repository.get_all(query)),
+            'update': (lambda: legacy_update(session, 'sub-7-42', {'name': 'renamed'}),
+                       lambda: repository.update('sub-7-42', {'name': 'renamed'})),
+        }
+        for name, (legacy, cached) in cases.items():
+            results = []
+            for case in (legacy, cached):
+                case()
+                results.append(min(timeit.repeat(case, number=number, repeat=3)) / number * 1_000_000)
+            print(f"{name:>8}: session.query {results[0]:8.1f} us/call  cached select() {results[1]:8.1f} us/call  "
+                  f"({results[0] / results[1]:.2f}x)")
+
+
+if __name__ == '__main__':
+    run()
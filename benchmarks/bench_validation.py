@@ -0,0 +1,51 @@
+import re
+import timeit
+
+from chalicelib.src.modules.presentation.validators import CREATE_USER_VALIDATOR
+
+PAYLOAD = {
+    "client_id": 2,
+    "document_type": "Cedula",
+    "user_role": "Admin",
+    "id_number": "123456",
+    "name": "John",
+    "last_name": "Doe",
+    "email": "john.doe@example.com",
+    "cellphone": "1234567890",
+    "password": "temporaryPassword123",
+    "communication_type": "Email"
+}
+
+
+def legacy_validate(user_as_json):
+    required_fields = ["client_id", "document_type", "user_role", "id_number", "name", "last_name", "email",
+                       "cellphone", "password", "communication_type"]
+    for field in required_fields:
+        if field not in user_as_json:
+            return False
+    if user_as_json["document_type"] not in ["Cedula", "Passport", "Cedula_Extranjeria"]:
+        return False
+    if user_as_json["user_role"] not in ['Superadmin', 'Admin', 'Agent', 'Regular']:
+        return False
+    if user_as_json["communication_type"] not in ['Email', 'Telefono', 'Sms', 'Chat']:
+        return False
+    email_regex = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
+    return re.match(email_regex, user_as_json["email"]) is not None
+
+
+def run(number=200_000):
+    cases = {
+        'legacy inline checks': lambda: legacy_validate(PAYLOAD),
+        'precompiled validator': lambda: CREATE_USER_VALIDATOR.errors(PAYLOAD),
+    }
+    for name, case in cases.items():
+        elapsed = min(timeit.repeat(case, number=number, repeat=3))
+        print(f"{name:>24}: {number / elapsed:,.0f} validations/s")
+
+    batch = [PAYLOAD] * 1000
+    elapsed = min(timeit.repeat(lambda: CREATE_USER_VALIDATOR.validate_many(batch), number=100, repeat=3))
+    print(f"{'validate_many (1000)':>24}: {100 * len(batch) / elapsed:,.0f} validations/s")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,49 @@
+import logging
+import os
+
+from chalicelib.src.seedwork.infrastructure.admission import ADMISSION, COGNITO, POSTGRES, ConcurrencyLimiter, \
+    SharedWindowLimiter, TokenBucket
+from chalicelib.src.seedwork.infrastructure.metrics import register_metrics
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+
+def build_rate_limiter():
+    backend = os.getenv('ADMISSION_RATE_BACKEND', 'memory')
+    rate = float(os.getenv('ADMISSION_TENANT_RATE', '50'))
+    burst = int(os.getenv('ADMISSION_TENANT_BURST', '100'))
+
+    if backend == 'shared':
+        from chalicelib.src.modules.infrastructure.cache import SHARED_CACHE
+        LOGGER.info("Using shared cache for tenant rate limits")
+        return SharedWindowLimiter(SHARED_CACHE, rate, burst)
+    if backend == 'memory':
+        return TokenBucket(rate, burst)
+    if backend == 'none':
+        return None
+
+    raise ValueError(f"Unsupported ADMISSION_RATE_BACKEND: {backend}")
+
+
+def configure_admission():
+    if os.getenv('ADMISSION_CONTROL', 'true').lower() != 'true':
+        ADMISSION.configure()
+        return ADMISSION
+
+    wait_seconds = float(os.getenv('ADMISSION_WAIT_SECONDS', '0'))
+    block_seconds = float(os.getenv('ADMISSION_COMMAND_WAIT_SECONDS', '5'))
+    postgres_slots = int(os.getenv('DB_POOL_SIZE', '5')) + int(os.getenv('DB_MAX_OVERFLOW', '5'))
+    ADMISSION.configure(
+        rate_limiter=build_rate_limiter(),
+        tenant_limiter=ConcurrencyLimiter(int(os.getenv('ADMISSION_TENANT_CONCURRENCY', '8')), wait_seconds),
+        backend_limiters={
+            POSTGRES: ConcurrencyLimiter(int(os.getenv('ADMISSION_POSTGRES_CONCURRENCY', str(postgres_slots))),
+                                         wait_seconds, block_seconds),
+            COGNITO: ConcurrencyLimiter(int(os.getenv('ADMISSION_COGNITO_CONCURRENCY', '10')), wait_seconds,
+                                        block_seconds),
+        },
+    )
+    return ADMISSION
+
+
+register_metrics('admission', ADMISSION.metrics)
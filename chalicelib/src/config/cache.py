@@ -0,0 +1,21 @@
+import logging
+import os
+
+from chalicelib.src.seedwork.infrastructure.cache import InMemoryCache, NullCache, RedisCache
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+
+def build_cache_backend():
+    backend = os.getenv('CACHE_BACKEND', 'none')
+
+    if backend == 'redis':
+        url = os.getenv('CACHE_URL', 'redis://localhost:6379/0')
+        LOGGER.info(f"Using Redis cache backend at {url}")
+        return RedisCache(url, socket_timeout=float(os.getenv('CACHE_SOCKET_TIMEOUT', '0.2')))
+    if backend == 'memory':
+        return InMemoryCache(maxsize=int(os.getenv('CACHE_MEMORY_SIZE', '10000')))
+    if backend == 'none':
+        return NullCache()
+
+    raise ValueError(f"Unsupported CACHE_BACKEND: {backend}")
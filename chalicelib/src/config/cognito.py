@@ -0,0 +1,39 @@
+import logging
+import os
+
+import boto3
+from botocore.config import Config
+
+from chalicelib.src.seedwork.infrastructure.tracing import TRACER
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+_COGNITO_CLIENT = None
+
+
+def cognito_client_config():
+    return Config(
+        max_pool_connections=int(os.getenv('COGNITO_MAX_POOL_CONNECTIONS', '50')),
+        connect_timeout=float(os.getenv('COGNITO_CONNECT_TIMEOUT', '2')),
+        read_timeout=float(os.getenv('COGNITO_READ_TIMEOUT', '5')),
+        retries={
+            'mode': os.getenv('COGNITO_RETRY_MODE', 'adaptive'),
+            'max_attempts': int(os.getenv('COGNITO_MAX_ATTEMPTS', '3')),
+        },
+        tcp_keepalive=True,
+    )
+
+
+def build_cognito_client():
+    region = os.getenv('COGNITO_REGION', 'us-east-1')
+    LOGGER.info(f"Creating Cognito client for region {region}")
+    client = boto3.client('cognito-idp', region_name=region, config=cognito_client_config())
+    TRACER.install_botocore(client)
+    return client
+
+
+def get_cognito_client():
+    global _COGNITO_CLIENT
+    if _COGNITO_CLIENT is None:
+        _COGNITO_CLIENT = build_cognito_client()
+    return _COGNITO_CLIENT
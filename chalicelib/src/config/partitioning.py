@@ -0,0 +1,72 @@
+import logging
+
+from sqlalchemy import MetaData, PrimaryKeyConstraint, inspect, text
+
+from chalicelib.src.modules.infrastructure.dto import User
+
+LOGGER = logging.getLogger('abcall-pqrs-events-microservice')
+
+PARTITIONED_TABLE = User.__tablename__
+UNPARTITIONED_TABLE = f'{PARTITIONED_TABLE}_unpartitioned'
+
+
+def partitioned_users_table(metadata=None):
+    table = User.__table__.to_metadata(metadata or MetaData())
+    table.c.client_id.primary_key = True
+    table.append_constraint(PrimaryKeyConstraint('id', 'client_id'))
+    table.dialect_options['postgresql']['partition_by'] = 'HASH (client_id)'
+    return table
+
+
+def partition_count(connection):
+    return connection.execute(text(
+        "SELECT partnatts, count(inhrelid) FROM pg_partitioned_table "
+        "LEFT JOIN pg_inherits ON inhparent = partrelid "
+        "WHERE partrelid = to_regclass(:table) GROUP BY partnatts"
+    ), {'table': PARTITIONED_TABLE}).first()
+
+
+def ensure_users_partitioning(connection, partitions: int):
+    if inspect(connection).has_table(PARTITIONED_TABLE):
+        existing = partition_count(connection)
+        if existing is not None:
+            if existing[1] != partitions:
+                LOGGER.warning(f"Table {PARTITIONED_TABLE} has {existing[1]} hash partitions, {partitions} requested; "
+                               f"changing the modulus requires a rebuild, keeping the current layout")
+            return False
+        _convert_users_table(connection, partitions)
+        return True
+
+    _create_partitioned_users(connection, partitions)
+    return True
+
+
+def _create_partitioned_users(connection, partitions):
+    partitioned_users_table().create(connection, checkfirst=True)
+    for remainder in range(partitions):
+        connection.execute(text(
+            f"CREATE TABLE {PARTITIONED_TABLE}_p{remainder} PARTITION OF {PARTITIONED_TABLE} "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        ))
+    LOGGER.info(f"Created table {PARTITIONED_TABLE} with {partitions} hash partitions on client_id")
+
+
+def _convert_users_table(connection, partitions):
+    LOGGER.warning(f"Converting table {PARTITIONED_TABLE} to {partitions} hash partitions; "
+                   f"the table stays locked until the copy finishes")
+    connection.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} RENAME TO {UNPARTITIONED_TABLE}"))
+    for index in connection.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = :table"),
+                                    {'table': UNPARTITIONED_TABLE}).scalars().all():
+        connection.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index}_unpartitioned"'))
+
+    _create_partitioned_users(connection, partitions)
+    columns = ', '.join(column.name for column in User.__table__.columns)
+    connection.execute(text(
+        f"INSERT INTO {PARTITIONED_TABLE} ({columns}) SELECT {columns} FROM {UNPARTITIONED_TABLE}"
+    ))
+    connection.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{PARTITIONED_TABLE}', 'id'), "
+        f"coalesce((SELECT max(id) FROM {PARTITIONED_TABLE}), 0) + 1, false)"
+    ))
+    connection.execute(text(f"DROP TABLE {UNPARTITIONED_TABLE}"))
+    LOGGER.info(f"Table {PARTITIONED_TABLE} converted to hash partitions")
@@ -0,0 +1,60 @@
+import logging
+import time
+
+from chalicelib.src.config import db
+from chalicelib.src.config.cognito import get_cognito_client
+from chalicelib.src.modules.infrastructure.cache import SHARED_CACHE
+from chalicelib.src.modules.infrastructure.dto import UserSchema
+from chalicelib.src.modules.presentation.validators import CREATE_USER_VALIDATOR
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+WARMUP_STATE = {'warm': False, 'runs': 0, 'timings': {}}
+
+
+def _warm_database():
+    db.init_db()
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql('SELECT 1')
+
+
+def _build_schemas():
+    UserSchema().dump(None)
+    UserSchema(many=True).dump([])
+    CREATE_USER_VALIDATOR.errors({})
+
+
+def _prime_caches():
+    SHARED_CACHE.tenant_version('warmup')
+
+
+ONE_TIME_STEPS = [
+    ('cognito', get_cognito_client),
+    ('schemas', _build_schemas),
+    ('caches', _prime_caches),
+]
+
+
+def warmup():
+    timings = {}
+    errors = []
+    steps = [('database', _warm_database)]
+    if not WARMUP_STATE['warm']:
+        steps += ONE_TIME_STEPS
+
+    started = time.perf_counter()
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            LOGGER.warning(f"Warmup step {name} failed: {e}")
+            errors.append(name)
+        timings[name] = round((time.perf_counter() - step_started) * 1000, 3)
+    timings['total'] = round((time.perf_counter() - started) * 1000, 3)
+
+    WARMUP_STATE['warm'] = WARMUP_STATE['warm'] or not errors
+    WARMUP_STATE['runs'] += 1
+    WARMUP_STATE['timings'] = timings
+    LOGGER.info(f"Warmup finished in {timings['total']} ms: {timings}")
+    return {'warm': WARMUP_STATE['warm'], 'timings_ms': timings, 'failed_steps': errors}
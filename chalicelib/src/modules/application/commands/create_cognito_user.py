@@ -4,15 +4,19 @@ from dataclasses import dataclass
 from botocore.client import BaseClient
 
 from chalicelib.src.modules.application.commands.base import CommandBaseHandler
+from chalicelib.src.modules.infrastructure.cache import NEGATIVE_COGNITO_CACHE
 from chalicelib.src.modules.infrastructure.cognito_repository import UserCognitoRepository
 from chalicelib.src.seedwork.application.commands import execute_command
 from chalicelib.src.seedwork.application.commands import Command
+from chalicelib.src.seedwork.infrastructure.admission import COGNITO
 
 LOGGER = logging.getLogger('abcall-users-microservice')
 
 
 @dataclass
 class CreateCognitoUserCommand(Command):
+    backends = (COGNITO,)
+
     cognito_client: BaseClient
     user_as_json: dict
     user_pool_id: str
@@ -24,7 +28,11 @@ class UpdateInformationHandler(CommandBaseHandler):
         repository = self.user_factory.create_object(UserCognitoRepository,
                                                      cognito_client=command.cognito_client,
                                                      user_pool_id=command.user_pool_id)
-        return repository.add(command.user_as_json)
+        response = repository.add(command.user_as_json)
+        for attribute in response['User']['Attributes']:
+            if attribute['Name'] == 'sub':
+                NEGATIVE_COGNITO_CACHE.delete((command.user_pool_id, attribute['Value']))
+        return response
 
 
 @execute_command.register(CreateCognitoUserCommand)
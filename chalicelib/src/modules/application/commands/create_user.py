@@ -4,12 +4,16 @@ from chalicelib.src.modules.application.commands.base import CommandBaseHandler
 from chalicelib.src.seedwork.application.commands import execute_command
 from chalicelib.src.seedwork.application.commands import Command
 from chalicelib.src.modules.domain.repository import UserRepository
+from chalicelib.src.modules.infrastructure.cache import NEGATIVE_USER_CACHE, invalidate_user
+from chalicelib.src.seedwork.infrastructure.admission import POSTGRES
 
 LOGGER = logging.getLogger('abcall-users-microservice')
 
 
 @dataclass
 class CreateUserCommand(Command):
+    backends = (POSTGRES,)
+
     cognito_user_sub: str
     document_type: str
     user_role: str
@@ -27,6 +31,8 @@ class UpdateInformationHandler(CommandBaseHandler):
 
         repository = self.user_factory.create_object(UserRepository)
         repository.add(command)
+        NEGATIVE_USER_CACHE.delete(command.cognito_user_sub)
+        invalidate_user(command.cognito_user_sub, command.client_id)
 
 
 @execute_command.register(CreateUserCommand)
@@ -0,0 +1,38 @@
+import logging
+from dataclasses import dataclass
+
+from chalicelib.src.modules.application.commands.base import CommandBaseHandler
+from chalicelib.src.modules.domain.repository import UserRepository
+from chalicelib.src.modules.infrastructure.cache import NEGATIVE_USER_CACHE, SHARED_CACHE, invalidate_user
+from chalicelib.src.seedwork.application.commands import execute_command
+from chalicelib.src.seedwork.application.commands import Command
+from chalicelib.src.seedwork.infrastructure.admission import POSTGRES
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+
+@dataclass
+class CreateUsersCommand(Command):
+    backends = (POSTGRES,)
+
+    users: list
+
+
+class CreateUsersHandler(CommandBaseHandler):
+    def handle(self, command: CreateUsersCommand):
+        LOGGER.info(f"Handle createUsersCommand with {len(command.users)} users")
+
+        repository = self.user_factory.create_object(UserRepository)
+        created = repository.add_many(command.users)
+        for user in command.users:
+            NEGATIVE_USER_CACHE.delete(user.cognito_user_sub)
+            invalidate_user(user.cognito_user_sub)
+        for client_id in {user.client_id for user in command.users}:
+            SHARED_CACHE.bump_tenant(client_id)
+        return created
+
+
+@execute_command.register(CreateUsersCommand)
+def execute_create_users_command(command: CreateUsersCommand):
+    handler = CreateUsersHandler()
+    return handler.handle(command)
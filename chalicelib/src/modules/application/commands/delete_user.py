@@ -4,12 +4,16 @@ from chalicelib.src.modules.application.commands.base import CommandBaseHandler
 from chalicelib.src.seedwork.application.commands import execute_command
 from chalicelib.src.seedwork.application.commands import Command
 from chalicelib.src.modules.domain.repository import UserRepository
+from chalicelib.src.modules.infrastructure.cache import invalidate_user
+from chalicelib.src.seedwork.infrastructure.admission import POSTGRES
 
 LOGGER = logging.getLogger('abcall-users-microservice')
 
 
 @dataclass
 class DeleteUserCommand(Command):
+    backends = (POSTGRES,)
+
     cognito_user_sub: str
 
 
@@ -18,7 +22,8 @@ class UpdateInformationHandler(CommandBaseHandler):
         LOGGER.info("Handle createUserCommand")
 
         repository = self.user_factory.create_object(UserRepository)
-        repository.remove(command.cognito_user_sub)
+        removed = repository.remove(command.cognito_user_sub) or {}
+        invalidate_user(command.cognito_user_sub, removed.get('client_id'))
 
 
 @execute_command.register(DeleteUserCommand)
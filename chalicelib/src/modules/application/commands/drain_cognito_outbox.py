@@ -0,0 +1,100 @@
+import logging
+from dataclasses import dataclass
+
+from botocore.client import BaseClient
+from botocore.exceptions import ClientError
+
+from chalicelib.src.modules.application.commands.base import CommandBaseHandler
+from chalicelib.src.modules.domain.repository import CognitoOutboxRepository
+from chalicelib.src.modules.infrastructure.cache import SHARED_CACHE, cognito_user_key
+from chalicelib.src.modules.infrastructure.cognito_repository import UserCognitoRepository
+from chalicelib.src.modules.infrastructure.dto import OutboxOperation
+from chalicelib.src.seedwork.application.commands import execute_command
+from chalicelib.src.seedwork.application.commands import Command
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+
+@dataclass
+class DrainCognitoOutboxCommand(Command):
+    cognito_client: BaseClient
+    user_pool_id: str
+    batch_size: int = 100
+    max_attempts: int = 8
+
+
+OPERATION_PRECEDENCE = (OutboxOperation.DELETE, OutboxOperation.DISABLE)
+
+
+def coalesce_outbox_messages(messages):
+    pending = {}
+    for message in sorted(messages, key=lambda item: item.id):
+        operation, attributes, message_ids = pending.get(message.user_sub, (None, {}, []))
+        message_ids.append(message.id)
+        terminal = next((candidate for candidate in OPERATION_PRECEDENCE
+                         if candidate in (operation, message.operation)), None)
+        if terminal is not None:
+            pending[message.user_sub] = (terminal, {}, message_ids)
+        else:
+            pending[message.user_sub] = (OutboxOperation.UPDATE_ATTRIBUTES,
+                                         {**attributes, **(message.payload or {})}, message_ids)
+    return pending
+
+
+def is_user_not_found(error):
+    # The repository wraps some Cognito errors, e.g. update raises a ValueError from UserNotFoundException.
+    while error is not None:
+        if isinstance(error, ClientError) and error.response.get('Error', {}).get('Code') == 'UserNotFoundException':
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class DrainCognitoOutboxHandler(CommandBaseHandler):
+    def handle(self, command: DrainCognitoOutboxCommand):
+        outbox = self.user_factory.create_object(CognitoOutboxRepository)
+        repository = self.user_factory.create_object(UserCognitoRepository,
+                                                     cognito_client=command.cognito_client,
+                                                     user_pool_id=command.user_pool_id)
+
+        try:
+            messages = outbox.claim_batch(command.batch_size)
+            processed, failed, dead = [], 0, 0
+
+            for user_sub, (operation, attributes, message_ids) in coalesce_outbox_messages(messages).items():
+                try:
+                    if operation == OutboxOperation.DELETE:
+                        repository.remove(user_sub)
+                    elif operation == OutboxOperation.DISABLE:
+                        repository.disable(user_sub)
+                    else:
+                        repository.update(user_sub=user_sub, attributes=attributes)
+                    SHARED_CACHE.delete(cognito_user_key(command.user_pool_id, user_sub))
+                    processed.extend(message_ids)
+                except Exception as e:
+                    if is_user_not_found(e):
+                        processed.extend(message_ids)
+                        continue
+                    LOGGER.warning(f"Outbox {operation.value} for {user_sub} failed: {e}")
+                    if isinstance(e, ValueError):
+                        outbox.reschedule(message_ids, str(e), max_attempts=0)
+                        dead += len(message_ids)
+                    else:
+                        outbox.reschedule(message_ids, str(e), max_attempts=command.max_attempts)
+                        failed += len(message_ids)
+
+            outbox.complete(processed)
+            outbox.commit()
+        except BaseException:
+            outbox.rollback()
+            raise
+
+        LOGGER.info(f"Outbox drained: {len(messages)} claimed, {len(processed)} processed, "
+                    f"{failed} rescheduled, {dead} failed")
+        return {'claimed': len(messages), 'processed': len(processed), 'rescheduled': failed, 'failed': dead}
+
+
+@execute_command.register(DrainCognitoOutboxCommand)
+def execute_drain_cognito_outbox_command(command: DrainCognitoOutboxCommand):
+    handler = DrainCognitoOutboxHandler()
+    return handler.handle(command)
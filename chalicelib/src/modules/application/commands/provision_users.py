@@ -0,0 +1,137 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from botocore.client import BaseClient
+from botocore.exceptions import ClientError
+
+from chalicelib.src.modules.application.commands.base import CommandBaseHandler
+from chalicelib.src.modules.application.commands.create_cognito_user import CreateCognitoUserCommand
+from chalicelib.src.modules.application.commands.create_user import CreateUserCommand
+from chalicelib.src.modules.application.commands.create_users import CreateUsersCommand
+from chalicelib.src.modules.application.commands.delete_cognito_user import DeleteCognitoUserCommand
+from chalicelib.src.modules.application.queries.get_cognito_user_by_username import GetCognitoUserByUsernameQuery
+from chalicelib.src.modules.application.queries.get_users_by_sub import GetUsersBySubQuery
+from chalicelib.src.seedwork.application.commands import execute_command
+from chalicelib.src.seedwork.application.commands import Command
+from chalicelib.src.seedwork.application.queries import execute_query
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+
+@dataclass
+class ProvisionUsersCommand(Command):
+    cognito_client: BaseClient
+    user_pool_id: str
+    users: dict
+    concurrency: int = 8
+
+
+def is_username_exists(error):
+    return isinstance(error, ClientError) and error.response.get('Error', {}).get('Code') == 'UsernameExistsException'
+
+
+def user_sub_of(attributes):
+    return next(attribute['Value'] for attribute in attributes if attribute['Name'] == 'sub')
+
+
+def tenant_mismatches(attributes, user_as_json):
+    values = {attribute['Name']: attribute['Value'] for attribute in attributes}
+    expected = {'custom:client_id': str(user_as_json['client_id']),
+                'custom:custom:userRole': user_as_json['user_role']}
+    return sorted(name for name, value in expected.items() if values.get(name) != value)
+
+
+def create_user_command(cognito_user_sub, user_as_json):
+    return CreateUserCommand(
+        cognito_user_sub=cognito_user_sub,
+        document_type=user_as_json["document_type"],
+        client_id=user_as_json["client_id"],
+        id_number=user_as_json["id_number"],
+        name=user_as_json["name"],
+        last_name=user_as_json["last_name"],
+        communication_type=user_as_json["communication_type"],
+        user_role=user_as_json["user_role"],
+        cellphone=user_as_json.get("cellphone")
+    )
+
+
+class ProvisionUsersHandler(CommandBaseHandler):
+    def handle(self, command: ProvisionUsersCommand):
+        LOGGER.info(f"Handle provisionUsersCommand with {len(command.users)} users")
+        failed = {}
+
+        def create_cognito_user(user_as_json):
+            try:
+                response = execute_command(CreateCognitoUserCommand(cognito_client=command.cognito_client,
+                                                                    user_as_json=user_as_json,
+                                                                    user_pool_id=command.user_pool_id))
+                return user_sub_of(response['User']['Attributes']), False
+            except Exception as e:
+                if not is_username_exists(e):
+                    raise
+            # A redelivered message finds the Cognito user it created on an earlier attempt.
+            existing = execute_query(GetCognitoUserByUsernameQuery(username=user_as_json['email'],
+                                                                   cognito_client=command.cognito_client,
+                                                                   user_pool_id=command.user_pool_id)).result
+            if existing is None:
+                raise RuntimeError(f"Cognito user {user_as_json['email']} exists but could not be read")
+            # Only link a user that belongs to the same tenant and role as this message.
+            mismatches = tenant_mismatches(existing['UserAttributes'], user_as_json)
+            if mismatches:
+                raise RuntimeError(f"Cognito user {user_as_json['email']} already exists with a different "
+                                   f"{', '.join(mismatches)}")
+            return user_sub_of(existing['UserAttributes']), True
+
+        cognito_users, existing_users = {}, set()
+        with ThreadPoolExecutor(max_workers=max(1, command.concurrency)) as executor:
+            futures = {key: executor.submit(create_cognito_user, user_as_json)
+                       for key, user_as_json in command.users.items()}
+            for key, future in futures.items():
+                try:
+                    cognito_users[key], existed = future.result()
+                    if existed:
+                        existing_users.add(key)
+                except Exception as e:
+                    LOGGER.warning(f"Provisioning of user {key} failed in Cognito: {e}")
+                    failed[key] = str(e)
+
+        inserted = {}
+        if existing_users:
+            inserted = execute_query(GetUsersBySubQuery(
+                user_subs=[cognito_users[key] for key in existing_users])).result
+        user_commands = {key: create_user_command(user_sub, command.users[key])
+                         for key, user_sub in cognito_users.items() if user_sub not in inserted}
+        if user_commands:
+            try:
+                execute_command(CreateUsersCommand(users=list(user_commands.values())))
+            except Exception as e:
+                LOGGER.warning(f"Bulk insert of {len(user_commands)} users failed, inserting one by one: {e}")
+                for key, user_command in user_commands.items():
+                    try:
+                        execute_command(user_command)
+                    except Exception as e:
+                        LOGGER.warning(f"Provisioning of user {key} failed in the database: {e}")
+                        failed[key] = str(e)
+                        if key not in existing_users:
+                            self._discard_cognito_user(command, user_command.cognito_user_sub)
+
+        created = {key: user_sub for key, user_sub in cognito_users.items() if key not in failed}
+        LOGGER.info(f"Provisioned {len(created)} of {len(command.users)} users")
+        return {'created': created, 'failed': failed}
+
+    @staticmethod
+    def _discard_cognito_user(command: ProvisionUsersCommand, user_sub):
+        # Remove the orphaned Cognito user so a redelivered message can create it again.
+        try:
+            execute_command(DeleteCognitoUserCommand(cognito_client=command.cognito_client,
+                                                     user_sub=user_sub,
+                                                     user_pool_id=command.user_pool_id))
+        except Exception as e:
+            LOGGER.error(f"Could not remove orphaned Cognito user {user_sub}: {e}")
+
+
+@execute_command.register(ProvisionUsersCommand)
+def execute_provision_users_command(command: ProvisionUsersCommand):
+    handler = ProvisionUsersHandler()
+    return handler.handle(command)
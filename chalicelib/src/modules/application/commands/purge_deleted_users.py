@@ -0,0 +1,69 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from botocore.client import BaseClient
+
+from chalicelib.src.modules.application.commands.base import CommandBaseHandler
+from chalicelib.src.modules.application.commands.drain_cognito_outbox import is_user_not_found
+from chalicelib.src.modules.domain.repository import UserRepository
+from chalicelib.src.modules.infrastructure.cache import SHARED_CACHE, cognito_user_key
+from chalicelib.src.modules.infrastructure.cognito_repository import UserCognitoRepository
+from chalicelib.src.seedwork.application.commands import execute_command
+from chalicelib.src.seedwork.application.commands import Command
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+
+@dataclass
+class PurgeDeletedUsersCommand(Command):
+    cognito_client: BaseClient
+    user_pool_id: str
+    batch_size: int = 100
+    grace_seconds: int = 7 * 24 * 3600
+    concurrency: int = 4
+    requests_per_second: float = 10
+
+
+class PurgeDeletedUsersHandler(CommandBaseHandler):
+    def handle(self, command: PurgeDeletedUsersCommand):
+        users = self.user_factory.create_object(UserRepository)
+        cognito = self.user_factory.create_object(UserCognitoRepository,
+                                                  cognito_client=command.cognito_client,
+                                                  user_pool_id=command.user_pool_id)
+        interval = 1 / command.requests_per_second if command.requests_per_second > 0 else 0
+
+        def delete_cognito_user(user_sub):
+            try:
+                cognito.remove(user_sub)
+            except Exception as e:
+                if not is_user_not_found(e):
+                    LOGGER.warning(f"Purge of Cognito user {user_sub} failed: {e}")
+                    return False
+            SHARED_CACHE.delete(cognito_user_key(command.user_pool_id, user_sub))
+            return True
+
+        tombstones = users.claim_tombstones(command.batch_size, command.grace_seconds)
+        purged = []
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, command.concurrency)) as executor:
+                futures = []
+                for user_id, user_sub in tombstones:
+                    futures.append((user_id, executor.submit(delete_cognito_user, user_sub)))
+                    if interval:
+                        time.sleep(interval)
+                purged = [user_id for user_id, future in futures if future.result()]
+            users.purge(purged)
+        except BaseException:
+            users.rollback()
+            raise
+
+        LOGGER.info(f"Purged {len(purged)} of {len(tombstones)} deleted users")
+        return {'claimed': len(tombstones), 'purged': len(purged), 'failed': len(tombstones) - len(purged)}
+
+
+@execute_command.register(PurgeDeletedUsersCommand)
+def execute_purge_deleted_users_command(command: PurgeDeletedUsersCommand):
+    handler = PurgeDeletedUsersHandler()
+    return handler.handle(command)
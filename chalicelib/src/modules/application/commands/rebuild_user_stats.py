@@ -0,0 +1,27 @@
+import logging
+from dataclasses import dataclass
+from chalicelib.src.modules.application.commands.base import CommandBaseHandler
+from chalicelib.src.seedwork.application.commands import execute_command
+from chalicelib.src.seedwork.application.commands import Command
+from chalicelib.src.modules.domain.repository import UserRepository
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+
+@dataclass
+class RebuildUserStatsCommand(Command):
+    ...
+
+
+class RebuildUserStatsHandler(CommandBaseHandler):
+    def handle(self, command: RebuildUserStatsCommand):
+        LOGGER.info("Handle rebuildUserStatsCommand")
+
+        repository = self.user_factory.create_object(UserRepository)
+        repository.rebuild_stats()
+
+
+@execute_command.register(RebuildUserStatsCommand)
+def execute_rebuild_user_stats_command(command: RebuildUserStatsCommand):
+    handler = RebuildUserStatsHandler()
+    handler.handle(command)
@@ -0,0 +1,156 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+from typing import Optional
+
+from botocore.client import BaseClient
+
+from chalicelib.src.modules.application.commands.base import CommandBaseHandler
+from chalicelib.src.modules.domain.repository import CognitoOutboxRepository, ReconciliationRepository, \
+    UserRepository
+from chalicelib.src.modules.infrastructure.cache import invalidate_user
+from chalicelib.src.modules.infrastructure.cognito_repository import UserCognitoRepository
+from chalicelib.src.modules.infrastructure.dto import CognitoOutboxMessage, OutboxOperation
+from chalicelib.src.modules.infrastructure.repository import COGNITO_ATTRIBUTES
+from chalicelib.src.seedwork.application.commands import execute_command
+from chalicelib.src.seedwork.application.commands import Command
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+REPORT_SAMPLE_SIZE = 50
+REPORT_CATEGORIES = ('cognito_orphans', 'db_orphans', 'mismatched')
+
+
+@dataclass
+class ReconcileUsersCommand(Command):
+    cognito_client: BaseClient
+    user_pool_id: str
+    repair: bool = False
+    prefix_length: int = 2
+    min_age_seconds: int = 3600
+    max_buckets: Optional[int] = None
+    checkpoint_name: str = 'cognito-users'
+
+
+def sub_prefixes(length):
+    return [format(value, f'0{length}x') for value in range(16 ** length)]
+
+
+def merge_join(left, right, key=itemgetter('sub')):
+    left, right = iter(left), iter(right)
+    left_item, right_item = next(left, None), next(right, None)
+    while left_item is not None or right_item is not None:
+        if right_item is None or (left_item is not None and key(left_item) < key(right_item)):
+            yield left_item, None
+            left_item = next(left, None)
+        elif left_item is None or key(right_item) < key(left_item):
+            yield None, right_item
+            right_item = next(right, None)
+        else:
+            yield left_item, right_item
+            left_item, right_item = next(left, None), next(right, None)
+
+
+def empty_report():
+    report = {'buckets': 0, 'cognito_users': 0, 'db_users': 0, 'skipped_recent': 0, 'repaired': 0,
+              'repair_failures': 0}
+    for category in REPORT_CATEGORIES:
+        report[category] = {'count': 0, 'sample': []}
+    return report
+
+
+def _record(report, category, user_sub):
+    report[category]['count'] += 1
+    if len(report[category]['sample']) < REPORT_SAMPLE_SIZE:
+        report[category]['sample'].append(user_sub)
+
+
+def _is_recent(timestamp, cutoff):
+    return timestamp is not None and timestamp > cutoff
+
+
+class ReconcileUsersHandler(CommandBaseHandler):
+    def handle(self, command: ReconcileUsersCommand):
+        reconciliation = self.user_factory.create_object(ReconciliationRepository)
+        cognito = self.user_factory.create_object(UserCognitoRepository,
+                                                  cognito_client=command.cognito_client,
+                                                  user_pool_id=command.user_pool_id)
+
+        checkpoint = reconciliation.load_checkpoint(command.checkpoint_name)
+        last_prefix, report = checkpoint if checkpoint else (None, empty_report())
+        prefixes = sub_prefixes(command.prefix_length)
+        pending = [prefix for prefix in prefixes if last_prefix is None or prefix > last_prefix]
+        if command.max_buckets is not None:
+            pending = pending[:command.max_buckets]
+
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=command.min_age_seconds)
+        for prefix in pending:
+            index = prefixes.index(prefix)
+            upper_prefix = prefixes[index + 1] if index + 1 < len(prefixes) else None
+            cognito_users = sorted(cognito.stream_users(prefix), key=itemgetter('sub'))
+
+            repairs = []
+            for cognito_user, db_user in merge_join(cognito_users,
+                                                    reconciliation.stream_users(prefix, upper_prefix)):
+                report['cognito_users'] += cognito_user is not None
+                if db_user is not None and db_user.get('deleted_at') is not None:
+                    continue
+                report['db_users'] += db_user is not None
+
+                if db_user is None:
+                    category, user_sub, timestamp = 'cognito_orphans', cognito_user['sub'], cognito_user['created_at']
+                elif cognito_user is None:
+                    category, user_sub, timestamp = 'db_orphans', db_user['sub'], db_user['updated_at']
+                elif (cognito_user['client_id'], cognito_user['user_role']) != \
+                        (db_user['client_id'], db_user['user_role']):
+                    category, user_sub, timestamp = 'mismatched', db_user['sub'], None
+                else:
+                    continue
+
+                if _is_recent(timestamp, cutoff):
+                    report['skipped_recent'] += 1
+                    continue
+                _record(report, category, user_sub)
+                repairs.append((category, user_sub, db_user))
+
+            if command.repair:
+                self._repair(repairs, cognito, report)
+            report['buckets'] += 1
+            reconciliation.save_checkpoint(command.checkpoint_name, prefix, report)
+
+        report['completed'] = not pending or pending[-1] == prefixes[-1]
+        if report['completed']:
+            reconciliation.clear_checkpoint(command.checkpoint_name)
+        LOGGER.info(f"Reconciliation {'finished' if report['completed'] else 'checkpointed'}: "
+                    f"{report['cognito_users']} Cognito users, {report['db_users']} database users, "
+                    + ', '.join(f"{report[category]['count']} {category}" for category in REPORT_CATEGORIES))
+        return report
+
+    def _repair(self, repairs, cognito, report):
+        users = self.user_factory.create_object(UserRepository)
+        outbox = self.user_factory.create_object(CognitoOutboxRepository)
+
+        for category, user_sub, db_user in repairs:
+            try:
+                if category == 'cognito_orphans':
+                    cognito.remove(user_sub)
+                elif category == 'db_orphans':
+                    removed = users.remove(user_sub) or {}
+                    invalidate_user(user_sub, removed.get('client_id'))
+                else:
+                    outbox.add(CognitoOutboxMessage(
+                        user_sub=user_sub,
+                        operation=OutboxOperation.UPDATE_ATTRIBUTES,
+                        payload={attribute: db_user[field] for field, attribute in COGNITO_ATTRIBUTES.items()}
+                    ))
+                report['repaired'] += 1
+            except Exception as e:
+                LOGGER.warning(f"Reconciliation repair of {category} {user_sub} failed: {e}")
+                report['repair_failures'] += 1
+
+
+@execute_command.register(ReconcileUsersCommand)
+def execute_reconcile_users_command(command: ReconcileUsersCommand):
+    handler = ReconcileUsersHandler()
+    return handler.handle(command)
@@ -7,12 +7,15 @@ from chalicelib.src.modules.application.commands.base import CommandBaseHandler
 from chalicelib.src.modules.infrastructure.cognito_repository import UserCognitoRepository
 from chalicelib.src.seedwork.application.commands import execute_command
 from chalicelib.src.seedwork.application.commands import Command
+from chalicelib.src.seedwork.infrastructure.admission import COGNITO
 
 LOGGER = logging.getLogger('abcall-users-microservice')
 
 
 @dataclass
 class UpdateCognitoUserCommand(Command):
+    backends = (COGNITO,)
+
     cognito_client: BaseClient
     attributes: dict
     user_pool_id: str
@@ -4,14 +4,19 @@ from chalicelib.src.modules.application.commands.base import CommandBaseHandler
 from chalicelib.src.seedwork.application.commands import execute_command
 from chalicelib.src.seedwork.application.commands import Command
 from chalicelib.src.modules.domain.repository import UserRepository
+from chalicelib.src.modules.infrastructure.cache import invalidate_user
+from chalicelib.src.seedwork.infrastructure.admission import POSTGRES
 
 LOGGER = logging.getLogger('abcall-users-microservice')
 
 
 @dataclass
 class UpdateUserCommand(Command):
+    backends = (POSTGRES,)
+
     cognito_user_sub: str
     user_data: dict
+    sync_cognito: bool = False
 
 
 class UpdateInformationHandler(CommandBaseHandler):
@@ -19,7 +24,10 @@ class UpdateInformationHandler(CommandBaseHandler):
         LOGGER.info("Handle createUserCommand")
 
         repository = self.user_factory.create_object(UserRepository)
-        repository.update(command.cognito_user_sub, command.user_data)
+        changes = repository.update(command.cognito_user_sub, command.user_data, sync_cognito=command.sync_cognito) or {}
+        invalidate_user(command.cognito_user_sub,
+                        (changes.get('previous') or {}).get('client_id'),
+                        (changes.get('current') or {}).get('client_id'))
 
 
 @execute_command.register(UpdateUserCommand)
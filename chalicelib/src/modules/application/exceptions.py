@@ -0,0 +1,33 @@
+from chalicelib.src.seedwork.domain.exceptions import DomainException
+
+
+class IdempotencyKeyReusedException(DomainException):
+    def __init__(self, message='The idempotency key was already used with a different request payload.'):
+        self.__message = message
+
+    def __str__(self):
+        return str(self.__message)
+
+
+class IdempotencyKeyInProgressException(DomainException):
+    def __init__(self, message='A request with the same idempotency key is still being processed.'):
+        self.__message = message
+
+    def __str__(self):
+        return str(self.__message)
+
+
+class InvalidChangesCursorException(DomainException):
+    def __init__(self, message='The changes cursor is not valid.'):
+        self.__message = message
+
+    def __str__(self):
+        return str(self.__message)
+
+
+class ChangesCursorExpiredException(DomainException):
+    def __init__(self, message='The changes cursor is older than the deleted users retention; resync the full list.'):
+        self.__message = message
+
+    def __str__(self):
+        return str(self.__message)
@@ -3,12 +3,17 @@ from dataclasses import dataclass
 from botocore.client import BaseClient
 
 from chalicelib.src.modules.application.queries.base import QueryBaseHandler
+from chalicelib.src.modules.infrastructure.cache import SHARED_CACHE, cognito_user_key
+from chalicelib.src.modules.infrastructure.async_repository import UserCognitoRepositoryAsync
 from chalicelib.src.modules.infrastructure.cognito_repository import UserCognitoRepository
-from chalicelib.src.seedwork.application.queries import Query, QueryResult, execute_query
+from chalicelib.src.seedwork.application.queries import Query, QueryResult, execute_query, execute_query_async
+from chalicelib.src.seedwork.infrastructure.admission import COGNITO
 
 
 @dataclass
 class GetCognitoUserQuery(Query):
+    backends = (COGNITO,)
+
     user_sub: str
     cognito_client: BaseClient
     user_pool_id: str
@@ -16,10 +21,31 @@ class GetCognitoUserQuery(Query):
 
 class GetUserCognitoHandler(QueryBaseHandler):
     def handle(self, query: GetCognitoUserQuery):
+        cache_key = cognito_user_key(query.user_pool_id, query.user_sub)
+        result = SHARED_CACHE.get(cache_key)
+        if result is not None:
+            return QueryResult(result=result)
+
         repository = self.user_factory.create_object(UserCognitoRepository,
                                                      cognito_client=query.cognito_client,
                                                      user_pool_id=query.user_pool_id)
         result = repository.get(query.user_sub)
+        if result is not None:
+            SHARED_CACHE.set(cache_key, result)
+        return QueryResult(result=result)
+
+    async def handle_async(self, query: GetCognitoUserQuery):
+        cache_key = cognito_user_key(query.user_pool_id, query.user_sub)
+        result = SHARED_CACHE.get(cache_key)
+        if result is not None:
+            return QueryResult(result=result)
+
+        repository = self.user_factory.create_object(UserCognitoRepositoryAsync,
+                                                     cognito_client=query.cognito_client,
+                                                     user_pool_id=query.user_pool_id)
+        result = await repository.get(query.user_sub)
+        if result is not None:
+            SHARED_CACHE.set(cache_key, result)
         return QueryResult(result=result)
 
 
@@ -27,3 +53,9 @@ class GetUserCognitoHandler(QueryBaseHandler):
 def execute_get_user(query: GetCognitoUserQuery):
     handler = GetUserCognitoHandler()
     return handler.handle(query)
+
+
+@execute_query_async.register(GetCognitoUserQuery)
+async def execute_get_user_async(query: GetCognitoUserQuery):
+    handler = GetUserCognitoHandler()
+    return await handler.handle_async(query)
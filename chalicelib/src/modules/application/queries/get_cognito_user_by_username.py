@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+
+from botocore.client import BaseClient
+
+from chalicelib.src.modules.application.queries.base import QueryBaseHandler
+from chalicelib.src.modules.infrastructure.cognito_repository import UserCognitoRepository
+from chalicelib.src.seedwork.application.queries import Query, QueryResult, execute_query
+from chalicelib.src.seedwork.infrastructure.admission import COGNITO
+
+
+@dataclass
+class GetCognitoUserByUsernameQuery(Query):
+    backends = (COGNITO,)
+
+    username: str
+    cognito_client: BaseClient
+    user_pool_id: str
+
+
+class GetCognitoUserByUsernameHandler(QueryBaseHandler):
+    def handle(self, query: GetCognitoUserByUsernameQuery):
+        repository = self.user_factory.create_object(UserCognitoRepository,
+                                                     cognito_client=query.cognito_client,
+                                                     user_pool_id=query.user_pool_id)
+        return QueryResult(result=repository.get_by_username(query.username))
+
+
+@execute_query.register(GetCognitoUserByUsernameQuery)
+def execute_get_cognito_user_by_username(query: GetCognitoUserByUsernameQuery):
+    handler = GetCognitoUserByUsernameHandler()
+    return handler.handle(query)
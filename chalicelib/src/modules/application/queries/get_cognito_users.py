@@ -0,0 +1,74 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from botocore.client import BaseClient
+
+from chalicelib.src.modules.application.queries.base import QueryBaseHandler
+from chalicelib.src.modules.infrastructure.cache import SHARED_CACHE, cognito_user_key
+from chalicelib.src.modules.infrastructure.async_repository import UserCognitoRepositoryAsync
+from chalicelib.src.modules.infrastructure.cognito_repository import UserCognitoRepository
+from chalicelib.src.seedwork.application.queries import Query, QueryResult, execute_query, execute_query_async
+from chalicelib.src.seedwork.infrastructure.admission import COGNITO
+
+COGNITO_BATCH_CONCURRENCY = int(os.getenv('COGNITO_BATCH_CONCURRENCY', '10'))
+
+
+@dataclass
+class GetCognitoUsersQuery(Query):
+    backends = (COGNITO,)
+
+    user_subs: list
+    cognito_client: BaseClient
+    user_pool_id: str
+
+
+class GetCognitoUsersHandler(QueryBaseHandler):
+    def handle(self, query: GetCognitoUsersQuery):
+        result, keys, missing = self._cached(query)
+        if missing:
+            repository = self.user_factory.create_object(UserCognitoRepository,
+                                                         cognito_client=query.cognito_client,
+                                                         user_pool_id=query.user_pool_id)
+            if len(missing) == 1 or COGNITO_BATCH_CONCURRENCY <= 1:
+                fetched = {user_sub: repository.get(user_sub) for user_sub in missing}
+            else:
+                with ThreadPoolExecutor(max_workers=min(COGNITO_BATCH_CONCURRENCY, len(missing))) as executor:
+                    fetched = dict(zip(missing, executor.map(repository.get, missing)))
+            self._store(result, keys, fetched)
+
+        return QueryResult(result=result)
+
+    async def handle_async(self, query: GetCognitoUsersQuery):
+        result, keys, missing = self._cached(query)
+        if missing:
+            repository = self.user_factory.create_object(UserCognitoRepositoryAsync,
+                                                         cognito_client=query.cognito_client,
+                                                         user_pool_id=query.user_pool_id)
+            self._store(result, keys, await repository.get_many(missing))
+
+        return QueryResult(result=result)
+
+    def _cached(self, query: GetCognitoUsersQuery):
+        user_subs = list(dict.fromkeys(query.user_subs))
+        keys = {user_sub: cognito_user_key(query.user_pool_id, user_sub) for user_sub in user_subs}
+        cached = SHARED_CACHE.get_many(list(keys.values()))
+
+        result = {user_sub: cached.get(key) for user_sub, key in keys.items()}
+        return result, keys, [user_sub for user_sub, user in result.items() if user is None]
+
+    def _store(self, result, keys, fetched):
+        result.update(fetched)
+        SHARED_CACHE.set_many({keys[user_sub]: user for user_sub, user in fetched.items() if user is not None})
+
+
+@execute_query.register(GetCognitoUsersQuery)
+def execute_get_cognito_users(query: GetCognitoUsersQuery):
+    handler = GetCognitoUsersHandler()
+    return handler.handle(query)
+
+
+@execute_query_async.register(GetCognitoUsersQuery)
+async def execute_get_cognito_users_async(query: GetCognitoUsersQuery):
+    handler = GetCognitoUsersHandler()
+    return await handler.handle_async(query)
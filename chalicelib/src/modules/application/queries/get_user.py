@@ -1,22 +1,62 @@
 from dataclasses import dataclass
-from chalicelib.src.seedwork.application.queries import Query, QueryResult, execute_query
+from chalicelib.src.seedwork.application.queries import Query, QueryResult, execute_query, execute_query_async
 from chalicelib.src.modules.application.queries.base import QueryBaseHandler
-from chalicelib.src.modules.domain.repository import UserRepository
+from chalicelib.src.modules.domain.repository import UserRepository, AsyncUserRepository
+from chalicelib.src.modules.infrastructure.cache import PROFILE_CACHE, SHARED_CACHE, user_key
+from chalicelib.src.seedwork.infrastructure.admission import POSTGRES
 
 
 @dataclass
 class GetUserQuery(Query):
+    backends = (POSTGRES,)
+
     user_sub: str
+    use_cache: bool = False
 
 
 class GetUserHandler(QueryBaseHandler):
     def handle(self, query: GetUserQuery):
+        cached = self._cached(query)
+        if cached is not None:
+            return QueryResult(result=cached)
+
         repository = self.user_factory.create_object(UserRepository)
-        result = repository.get(query.user_sub)
-        return QueryResult(result=result)
+        return QueryResult(result=self._store(query, repository.get(query.user_sub)))
+
+    async def handle_async(self, query: GetUserQuery):
+        cached = self._cached(query)
+        if cached is not None:
+            return QueryResult(result=cached)
+
+        repository = self.user_factory.create_object(AsyncUserRepository)
+        return QueryResult(result=self._store(query, await repository.get(query.user_sub)))
+
+    def _cached(self, query: GetUserQuery):
+        if query.use_cache:
+            cached = PROFILE_CACHE.get(query.user_sub)
+            if cached is not None:
+                return dict(cached)
+
+        result = SHARED_CACHE.get(user_key(query.user_sub))
+        if query.use_cache and result:
+            PROFILE_CACHE.set(query.user_sub, dict(result))
+        return result
+
+    def _store(self, query: GetUserQuery, result):
+        if result:
+            SHARED_CACHE.set(user_key(query.user_sub), result)
+            if query.use_cache:
+                PROFILE_CACHE.set(query.user_sub, dict(result))
+        return result
 
 
 @execute_query.register(GetUserQuery)
 def execute_get_user(query: GetUserQuery):
     handler = GetUserHandler()
     return handler.handle(query)
+
+
+@execute_query_async.register(GetUserQuery)
+async def execute_get_user_async(query: GetUserQuery):
+    handler = GetUserHandler()
+    return await handler.handle_async(query)
@@ -0,0 +1,67 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+from chalicelib.src.seedwork.application.queries import Query, QueryResult, execute_query
+from chalicelib.src.modules.application.exceptions import ChangesCursorExpiredException, \
+    InvalidChangesCursorException
+from chalicelib.src.modules.application.queries.base import QueryBaseHandler
+from chalicelib.src.modules.domain.repository import UserRepository
+from chalicelib.src.seedwork.infrastructure.admission import POSTGRES
+
+
+@dataclass
+class GetUserChangesQuery(Query):
+    backends = (POSTGRES,)
+
+    client_id: str
+    since: Optional[str] = None
+    limit: int = 100
+    max_cursor_age_seconds: Optional[int] = None
+
+
+def encode_cursor(updated_at: str, user_id: int, issued_at: datetime) -> str:
+    encoded = json.dumps([updated_at, user_id, issued_at.isoformat()], separators=(',', ':'))
+    return base64.urlsafe_b64encode(encoded.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str):
+    try:
+        updated_at, user_id, *issued_at = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        # Cursors issued before the issue time was encoded carry none and count as expired.
+        issued_at = datetime.fromisoformat(issued_at[0]) if issued_at else None
+        return datetime.fromisoformat(updated_at), int(user_id), issued_at
+    except (ValueError, TypeError) as e:
+        raise InvalidChangesCursorException() from e
+
+
+class GetUserChangesHandler(QueryBaseHandler):
+    def handle(self, query: GetUserChangesQuery):
+        now = datetime.now(timezone.utc)
+        since = None
+        if query.since:
+            updated_at, user_id, issued_at = decode_cursor(query.since)
+            # Deleted users are hard-deleted after the grace period, so an older cursor may have missed them.
+            if query.max_cursor_age_seconds is not None and \
+                    (issued_at is None or (now - issued_at).total_seconds() > query.max_cursor_age_seconds):
+                raise ChangesCursorExpiredException()
+            since = updated_at, user_id
+
+        repository = self.user_factory.create_object(UserRepository)
+        changes, has_more = repository.get_changes(query.client_id, since=since, limit=query.limit)
+        if changes:
+            next_cursor = encode_cursor(changes[-1]['updated_at'], changes[-1]['id'], now)
+        else:
+            next_cursor = encode_cursor(since[0].isoformat(), since[1], now) if since else None
+        return QueryResult(result={
+            'changes': changes,
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+        })
+
+
+@execute_query.register(GetUserChangesQuery)
+def execute_get_user_changes(query: GetUserChangesQuery):
+    handler = GetUserChangesHandler()
+    return handler.handle(query)
@@ -0,0 +1,37 @@
+from dataclasses import dataclass
+from chalicelib.src.seedwork.application.queries import Query, QueryResult, execute_query, execute_query_async
+from chalicelib.src.modules.application.queries.base import QueryBaseHandler
+from chalicelib.src.modules.domain.repository import UserRepository, AsyncUserRepository
+from chalicelib.src.seedwork.infrastructure.admission import POSTGRES
+
+
+@dataclass
+class GetUserStatsQuery(Query):
+    backends = (POSTGRES,)
+
+    client_id: str
+    from_counters: bool = False
+
+
+class GetUserStatsHandler(QueryBaseHandler):
+    def handle(self, query: GetUserStatsQuery):
+        repository = self.user_factory.create_object(UserRepository)
+        result = repository.get_stats(query.client_id, from_counters=query.from_counters)
+        return QueryResult(result=result)
+
+    async def handle_async(self, query: GetUserStatsQuery):
+        repository = self.user_factory.create_object(AsyncUserRepository)
+        result = await repository.get_stats(query.client_id, from_counters=query.from_counters)
+        return QueryResult(result=result)
+
+
+@execute_query.register(GetUserStatsQuery)
+def execute_get_user_stats(query: GetUserStatsQuery):
+    handler = GetUserStatsHandler()
+    return handler.handle(query)
+
+
+@execute_query_async.register(GetUserStatsQuery)
+async def execute_get_user_stats_async(query: GetUserStatsQuery):
+    handler = GetUserStatsHandler()
+    return await handler.handle_async(query)
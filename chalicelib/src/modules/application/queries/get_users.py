@@ -1,27 +1,80 @@
+import hashlib
+import json
 from dataclasses import dataclass
-from chalicelib.src.seedwork.application.queries import Query, QueryResult, execute_query
+from chalicelib.src.seedwork.application.queries import Query, QueryResult, execute_query, execute_query_async
 from chalicelib.src.modules.application.queries.base import QueryBaseHandler
-from chalicelib.src.modules.domain.repository import UserRepository
+from chalicelib.src.modules.domain.repository import UserRepository, AsyncUserRepository
+from chalicelib.src.modules.infrastructure.cache import SHARED_CACHE
 from typing import Optional
+from chalicelib.src.seedwork.infrastructure.admission import POSTGRES
 
 
 @dataclass
 class GetUsersQuery(Query):
+    backends = (POSTGRES,)
+
     client_id: Optional[str] = None
     filters: Optional[dict] = None
+    # encoded: the database aggregates the rows into a JSON body; serialized: the handler encodes them.
+    encoded: bool = False
+    serialized: bool = False
+
+
+def filters_fingerprint(filters: dict) -> str:
+    encoded = json.dumps(sorted(filters.items()), separators=(',', ':'), default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
 
 
 class GetUsersHandler(QueryBaseHandler):
     def handle(self, query: GetUsersQuery):
+        filters, cache_key, cached = self._cached(query)
+        if cached is not None:
+            return QueryResult(result=cached)
+
         repository = self.user_factory.create_object(UserRepository)
-        if query.filters is not None:
-            result = repository.get_all(query.filters)
-        else:
-            result = repository.get_all({'client_id': query.client_id})
-        return QueryResult(result=result)
+        users = repository.get_all_json(filters) if query.encoded else repository.get_all(filters)
+        return QueryResult(result=self._store(query, cache_key, users))
+
+    async def handle_async(self, query: GetUsersQuery):
+        filters, cache_key, cached = self._cached(query)
+        if cached is not None:
+            return QueryResult(result=cached)
+
+        repository = self.user_factory.create_object(AsyncUserRepository)
+        users = await (repository.get_all_json(filters) if query.encoded else repository.get_all(filters))
+        return QueryResult(result=self._store(query, cache_key, users))
+
+    def _cached(self, query: GetUsersQuery):
+        filters = dict(query.filters) if query.filters is not None else {'client_id': query.client_id}
+        if not filters.get('client_id'):
+            return filters, None, None
+
+        cache_key = SHARED_CACHE.tenant_key(filters['client_id'], 'users-json' if self._raw(query) else 'users',
+                                            filters_fingerprint(filters))
+        return filters, cache_key, SHARED_CACHE.get_raw(cache_key) if self._raw(query) else SHARED_CACHE.get(cache_key)
+
+    @staticmethod
+    def _raw(query: GetUsersQuery):
+        return query.encoded or query.serialized
+
+    def _store(self, query: GetUsersQuery, cache_key, result):
+        if query.serialized and not query.encoded:
+            result = json.dumps(result, separators=(',', ':'), default=str)
+        if cache_key is not None:
+            if self._raw(query):
+                SHARED_CACHE.set_raw(cache_key, result)
+            else:
+                SHARED_CACHE.set(cache_key, result)
+        return result
 
 
 @execute_query.register(GetUsersQuery)
 def execute_get_users(query: GetUsersQuery):
     handler = GetUsersHandler()
-    return handler.handle(query)
\ No newline at end of file
+    return handler.handle(query)
+
+
+@execute_query_async.register(GetUsersQuery)
+async def execute_get_users_async(query: GetUsersQuery):
+    handler = GetUsersHandler()
+    return await handler.handle_async(query)
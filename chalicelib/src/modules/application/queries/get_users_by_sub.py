@@ -0,0 +1,36 @@
+from dataclasses import dataclass
+from chalicelib.src.seedwork.application.queries import Query, QueryResult, execute_query, execute_query_async
+from chalicelib.src.modules.application.queries.base import QueryBaseHandler
+from chalicelib.src.modules.domain.repository import UserRepository, AsyncUserRepository
+from chalicelib.src.seedwork.infrastructure.admission import POSTGRES
+
+
+@dataclass
+class GetUsersBySubQuery(Query):
+    backends = (POSTGRES,)
+
+    user_subs: list
+
+
+class GetUsersBySubHandler(QueryBaseHandler):
+    def handle(self, query: GetUsersBySubQuery):
+        repository = self.user_factory.create_object(UserRepository)
+        result = repository.get_many(query.user_subs)
+        return QueryResult(result=result)
+
+    async def handle_async(self, query: GetUsersBySubQuery):
+        repository = self.user_factory.create_object(AsyncUserRepository)
+        result = await repository.get_many(query.user_subs)
+        return QueryResult(result=result)
+
+
+@execute_query.register(GetUsersBySubQuery)
+def execute_get_users_by_sub(query: GetUsersBySubQuery):
+    handler = GetUsersBySubHandler()
+    return handler.handle(query)
+
+
+@execute_query_async.register(GetUsersBySubQuery)
+async def execute_get_users_by_sub_async(query: GetUsersBySubQuery):
+    handler = GetUsersBySubHandler()
+    return await handler.handle_async(query)
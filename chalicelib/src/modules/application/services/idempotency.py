@@ -0,0 +1,64 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+from chalicelib.src.modules.application.exceptions import IdempotencyKeyInProgressException, \
+    IdempotencyKeyReusedException
+from chalicelib.src.modules.domain.repository import IdempotencyRepository
+from chalicelib.src.modules.infrastructure.dto import IdempotencyStatus
+from chalicelib.src.modules.infrastructure.factory import UserFactory
+from chalicelib.src.seedwork.application.services import Service
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', '86400'))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_SECONDS', '60'))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', '10'))
+IDEMPOTENCY_POLL_SECONDS = 0.2
+# Stored hashes outlive the request, so secrets are left out of them.
+FINGERPRINT_EXCLUDED_FIELDS = ('password',)
+
+
+def request_fingerprint(payload) -> str:
+    if isinstance(payload, dict):
+        payload = {name: value for name, value in payload.items() if name not in FINGERPRINT_EXCLUDED_FIELDS}
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class IdempotencyService(Service):
+    def __init__(self):
+        self._repository = UserFactory().create_object(IdempotencyRepository)
+
+    def run(self, scope: str, key: str, payload, handler):
+        request_hash = request_fingerprint(payload)
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+
+        while True:
+            if self._repository.begin(scope, key, request_hash, IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_LOCK_SECONDS):
+                return self._execute(scope, key, handler)
+
+            record = self._repository.get((scope, key))
+            if record is not None:
+                if record.request_hash != request_hash:
+                    raise IdempotencyKeyReusedException()
+                if record.status == IdempotencyStatus.COMPLETED:
+                    LOGGER.info(f"Replaying stored response for idempotency key {scope}/{key}")
+                    return record.response_body
+            if time.monotonic() >= deadline:
+                raise IdempotencyKeyInProgressException()
+            time.sleep(IDEMPOTENCY_POLL_SECONDS)
+
+    def _execute(self, scope: str, key: str, handler):
+        try:
+            response = handler()
+        except BaseException:
+            self._repository.remove((scope, key))
+            raise
+        self._repository.complete(scope, key, response)
+        return response
+
+    def purge_expired(self) -> int:
+        return self._repository.purge_expired()
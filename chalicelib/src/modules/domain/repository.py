@@ -1,6 +1,75 @@
-from abc import ABC
+from abc import ABC, abstractmethod
 from chalicelib.src.seedwork.domain.repository import Repository
 
 
 class UserRepository(Repository, ABC):
-    pass
\ No newline at end of file
+    pass
+
+
+class CognitoOutboxRepository(Repository, ABC):
+    @abstractmethod
+    def claim_batch(self, limit: int):
+        pass
+
+    @abstractmethod
+    def complete(self, message_ids):
+        pass
+
+    @abstractmethod
+    def reschedule(self, message_ids, error: str, max_attempts: int):
+        pass
+
+
+class IdempotencyRepository(Repository, ABC):
+    @abstractmethod
+    def begin(self, scope: str, key: str, request_hash: str, ttl_seconds: int, lock_seconds: int) -> bool:
+        pass
+
+    @abstractmethod
+    def complete(self, scope: str, key: str, response_body):
+        pass
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        pass
+
+
+
+class ReconciliationRepository(Repository, ABC):
+    @abstractmethod
+    def stream_users(self, prefix: str, upper_prefix: str = None, batch_size: int = 500):
+        pass
+
+    @abstractmethod
+    def load_checkpoint(self, name: str):
+        pass
+
+    @abstractmethod
+    def save_checkpoint(self, name: str, last_prefix: str, report: dict):
+        pass
+
+    @abstractmethod
+    def clear_checkpoint(self, name: str):
+        pass
+
+
+class AsyncUserRepository(ABC):
+    @abstractmethod
+    async def get(self, user_sub):
+        pass
+
+    @abstractmethod
+    async def get_many(self, user_subs):
+        pass
+
+    @abstractmethod
+    async def get_all(self, query=None):
+        pass
+
+    @abstractmethod
+    async def get_all_json(self, query=None) -> str:
+        pass
+
+    @abstractmethod
+    async def get_stats(self, client_id, from_counters=False):
+        pass
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.client import BaseClient
+
+from chalicelib.src.config.db import init_async_db
+from chalicelib.src.modules.domain.repository import AsyncUserRepository
+from chalicelib.src.modules.infrastructure.cache import NEGATIVE_USER_CACHE
+from chalicelib.src.modules.infrastructure.cognito_repository import UserCognitoRepository
+from chalicelib.src.modules.infrastructure.dto import UserSchema
+from chalicelib.src.modules.infrastructure.repository import USER_BY_SUB, USERS_BY_SUBS, STATS_FROM_COUNTERS, \
+    STATS_LIVE, filter_params, filtered_users, filtered_users_json, stats_from_counters, stats_from_grouping_sets
+
+LOGGER = logging.getLogger('abcall-pqrs-microservice')
+
+COGNITO_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv('COGNITO_EXECUTOR_WORKERS', '10')),
+                                      thread_name_prefix='cognito')
+
+
+class UserRepositoryPostgresAsync(AsyncUserRepository):
+    def __init__(self):
+        self.session_factory = init_async_db()
+
+    async def get(self, user_sub):
+        if NEGATIVE_USER_CACHE.get(user_sub):
+            raise ValueError("user not found")
+
+        async with self.session_factory() as session:
+            user = (await session.execute(USER_BY_SUB, {'user_sub': user_sub})).scalar()
+        if not user:
+            NEGATIVE_USER_CACHE.set(user_sub, True)
+            raise ValueError("user not found")
+        return UserSchema().dump(user)
+
+    async def get_many(self, user_subs):
+        pending = [user_sub for user_sub in dict.fromkeys(user_subs) if not NEGATIVE_USER_CACHE.get(user_sub)]
+        if not pending:
+            return {}
+
+        async with self.session_factory() as session:
+            users = (await session.execute(USERS_BY_SUBS, {'user_subs': pending})).scalars().all()
+        found = {user['cognito_user_sub']: user for user in UserSchema(many=True).dump(users)}
+        for user_sub in pending:
+            if user_sub not in found:
+                NEGATIVE_USER_CACHE.set(user_sub, True)
+        return found
+
+    async def get_all(self, query=None):
+        shape, params = filter_params(query)
+        async with self.session_factory() as session:
+            users = (await session.execute(filtered_users(shape), params)).scalars().all()
+        return UserSchema(many=True).dump(users)
+
+    async def get_all_json(self, query=None) -> str:
+        shape, params = filter_params(query)
+        async with self.session_factory() as session:
+            return (await session.execute(filtered_users_json(shape), params)).scalar()
+
+    async def get_stats(self, client_id, from_counters=False):
+        async with self.session_factory() as session:
+            if from_counters:
+                rows = (await session.execute(STATS_FROM_COUNTERS, {'client_id': client_id})).all()
+                return stats_from_counters(client_id, rows)
+            rows = (await session.execute(STATS_LIVE, {'client_id': client_id})).all()
+        return stats_from_grouping_sets(client_id, rows)
+
+
+class UserCognitoRepositoryAsync:
+    def __init__(self, cognito_client: BaseClient, user_pool_id: str):
+        self.repository = UserCognitoRepository(cognito_client=cognito_client, user_pool_id=user_pool_id)
+
+    async def _offload(self, method, *args):
+        return await asyncio.get_running_loop().run_in_executor(COGNITO_EXECUTOR, method, *args)
+
+    async def get(self, user_sub):
+        return await self._offload(self.repository.get, user_sub)
+
+    async def get_many(self, user_subs):
+        users = await asyncio.gather(*(self.get(user_sub) for user_sub in user_subs))
+        return dict(zip(user_subs, users))
@@ -0,0 +1,40 @@
+import os
+
+from chalicelib.src.config.cache import build_cache_backend
+from chalicelib.src.seedwork.infrastructure.cache import CacheTier, TTLCache
+from chalicelib.src.seedwork.infrastructure.metrics import register_metrics
+
+PROFILE_CACHE = TTLCache(maxsize=int(os.getenv('PROFILE_CACHE_SIZE', '2048')),
+                         ttl=float(os.getenv('PROFILE_CACHE_TTL', '30')))
+
+NEGATIVE_USER_CACHE = TTLCache(maxsize=int(os.getenv('NEGATIVE_CACHE_SIZE', '4096')),
+                               ttl=float(os.getenv('NEGATIVE_USER_CACHE_TTL', '30')))
+NEGATIVE_COGNITO_CACHE = TTLCache(maxsize=int(os.getenv('NEGATIVE_CACHE_SIZE', '4096')),
+                                  ttl=float(os.getenv('NEGATIVE_COGNITO_CACHE_TTL', '60')))
+
+SHARED_CACHE = CacheTier(build_cache_backend(),
+                         namespace=os.getenv('CACHE_NAMESPACE', 'abcall-users'),
+                         default_ttl=float(os.getenv('SHARED_CACHE_TTL', '300')))
+
+
+def user_key(user_sub):
+    return SHARED_CACHE.key('user', user_sub)
+
+
+def cognito_user_key(user_pool_id, user_sub):
+    return SHARED_CACHE.key('cognito', user_pool_id, user_sub)
+
+
+def invalidate_user(user_sub, *client_ids):
+    PROFILE_CACHE.delete(user_sub)
+    SHARED_CACHE.delete(user_key(user_sub))
+    for client_id in {client_id for client_id in client_ids if client_id is not None}:
+        SHARED_CACHE.bump_tenant(client_id)
+
+
+register_metrics('profile_cache', PROFILE_CACHE.metrics)
+register_metrics('shared_cache', SHARED_CACHE.metrics)
+register_metrics('negative_cache', lambda: {
+    'users': NEGATIVE_USER_CACHE.metrics(),
+    'cognito': NEGATIVE_COGNITO_CACHE.metrics(),
+})
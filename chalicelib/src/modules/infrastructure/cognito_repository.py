@@ -1,11 +1,45 @@
 import logging
+import os
 
 from botocore.client import BaseClient
+from botocore.exceptions import BotoCoreError, ClientError
 
 from chalicelib.src.modules.domain.repository import UserRepository
+from chalicelib.src.modules.infrastructure.cache import NEGATIVE_COGNITO_CACHE
+from chalicelib.src.seedwork.infrastructure.cache import TTLCache
+from chalicelib.src.seedwork.infrastructure.circuit_breaker import CircuitBreaker, CircuitOpenException
+from chalicelib.src.seedwork.infrastructure.metrics import register_metrics
 
 LOGGER = logging.getLogger('abcall-pqrs-microservice')
 
+COGNITO_OUTAGE_CODES = frozenset({
+    'InternalErrorException', 'ServiceUnavailable', 'ThrottlingException', 'TooManyRequestsException',
+    'RequestTimeout', 'RequestTimeoutException',
+})
+
+
+def is_cognito_outage(error):
+    if isinstance(error, ClientError):
+        code = error.response.get('Error', {}).get('Code')
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode') or 0
+        return code in COGNITO_OUTAGE_CODES or status >= 500
+    return isinstance(error, BotoCoreError)
+
+
+COGNITO_CIRCUIT_BREAKER = CircuitBreaker(
+    'cognito',
+    failure_rate_threshold=float(os.getenv('COGNITO_BREAKER_FAILURE_RATE', '0.5')),
+    minimum_calls=int(os.getenv('COGNITO_BREAKER_MINIMUM_CALLS', '20')),
+    window_seconds=float(os.getenv('COGNITO_BREAKER_WINDOW_SECONDS', '30')),
+    open_seconds=float(os.getenv('COGNITO_BREAKER_OPEN_SECONDS', '15')),
+    is_failure=is_cognito_outage,
+)
+STALE_COGNITO_USERS = TTLCache(maxsize=int(os.getenv('COGNITO_STALE_CACHE_SIZE', '1024')),
+                               ttl=float(os.getenv('COGNITO_STALE_CACHE_TTL', '3600')))
+
+register_metrics('cognito_circuit_breaker', COGNITO_CIRCUIT_BREAKER.metrics)
+register_metrics('cognito_stale_cache', STALE_COGNITO_USERS.metrics)
+
 
 class UserCognitoRepository(UserRepository):
 
@@ -14,8 +48,12 @@ class UserCognitoRepository(UserRepository):
         self.cognito_client: BaseClient = cognito_client
         self.user_pool_id: str = user_pool_id
 
+    def _call(self, operation, **kwargs):
+        return COGNITO_CIRCUIT_BREAKER.call(getattr(self.cognito_client, operation), **kwargs)
+
     def add(self, entity):
-        response = self.cognito_client.admin_create_user(
+        response = self._call(
+            'admin_create_user',
             UserPoolId=self.user_pool_id,
             Username=entity["email"],
             UserAttributes=[
@@ -40,7 +78,8 @@ class UserCognitoRepository(UserRepository):
             MessageAction='SUPPRESS'
         )
 
-        self.cognito_client.admin_set_user_password(
+        self._call(
+            'admin_set_user_password',
             UserPoolId=self.user_pool_id,
             Username=entity["email"],
             Password=entity["password"],
@@ -50,30 +89,67 @@ class UserCognitoRepository(UserRepository):
         return response
 
     def remove(self, user_sub):
-        self.cognito_client.admin_delete_user(
+        STALE_COGNITO_USERS.delete((self.user_pool_id, user_sub))
+        self._call(
+            'admin_delete_user',
+            UserPoolId=self.user_pool_id,
+            Username=user_sub
+        )
+
+    def disable(self, user_sub):
+        STALE_COGNITO_USERS.delete((self.user_pool_id, user_sub))
+        self._call(
+            'admin_disable_user',
             UserPoolId=self.user_pool_id,
             Username=user_sub
         )
 
     def get(self, user_sub):
+        cache_key = (self.user_pool_id, user_sub)
+        if NEGATIVE_COGNITO_CACHE.get(cache_key):
+            return None
+
+        def fetch_user():
+            user = self.cognito_client.admin_get_user(UserPoolId=self.user_pool_id, Username=user_sub)
+            STALE_COGNITO_USERS.set(cache_key, user)
+            return user
+
+        def stale_user():
+            cached = STALE_COGNITO_USERS.get(cache_key)
+            if cached is None:
+                raise CircuitOpenException(COGNITO_CIRCUIT_BREAKER.name)
+            LOGGER.warning(f"Serving stale Cognito user {user_sub} while the circuit breaker is open")
+            return cached
+
         try:
-            response = self.cognito_client.admin_get_user(
-                UserPoolId=self.user_pool_id,
-                Username=user_sub
-            )
+            response = COGNITO_CIRCUIT_BREAKER.call(fetch_user, fallback=stale_user)
             LOGGER.info(f"User {user_sub} retrieved successfully")
             return response
         except self.cognito_client.exceptions.UserNotFoundException:
             LOGGER.warning(f"User {user_sub} not found in pool {self.user_pool_id}")
+            NEGATIVE_COGNITO_CACHE.set(cache_key, True)
             return None
         except Exception as e:
             LOGGER.error(f"Error retrieving user {user_sub}: {e}")
             raise RuntimeError("Error retrieving user") from e
 
+    def get_by_username(self, username):
+        # Bypasses the sub-keyed caches: a username is not a sub and must not be cached as one.
+        try:
+            return self._call('admin_get_user', UserPoolId=self.user_pool_id, Username=username)
+        except self.cognito_client.exceptions.UserNotFoundException:
+            LOGGER.warning(f"Username {username} not found in pool {self.user_pool_id}")
+            return None
+        except Exception as e:
+            LOGGER.error(f"Error retrieving username {username}: {e}")
+            raise RuntimeError("Error retrieving user") from e
+
     def update(self, user_sub, attributes):
         try:
             user_attributes = [{'Name': key, 'Value': value} for key, value in attributes.items()]
-            self.cognito_client.admin_update_user_attributes(
+            STALE_COGNITO_USERS.delete((self.user_pool_id, user_sub))
+            self._call(
+                'admin_update_user_attributes',
                 UserPoolId=self.user_pool_id,
                 Username=user_sub,
                 UserAttributes=user_attributes
@@ -86,10 +162,31 @@ class UserCognitoRepository(UserRepository):
             LOGGER.error(f"Error updating user {user_sub}: {e}")
             raise RuntimeError("Error updating user") from e
 
+    def stream_users(self, prefix: str, page_size: int = 60):
+        kwargs = {
+            'UserPoolId': self.user_pool_id,
+            'Filter': f'sub ^= "{prefix}"',
+            'AttributesToGet': ['sub', 'custom:client_id', 'custom:custom:userRole'],
+            'Limit': page_size,
+        }
+        while True:
+            response = self._call('list_users', **kwargs)
+            for user in response['Users']:
+                user_attributes = {attr['Name']: attr['Value'] for attr in user.get('Attributes', [])}
+                yield {
+                    'sub': user_attributes.get('sub', user['Username']),
+                    'client_id': user_attributes.get('custom:client_id'),
+                    'user_role': user_attributes.get('custom:custom:userRole'),
+                    'created_at': user.get('UserCreateDate'),
+                }
+            if not response.get('PaginationToken'):
+                return
+            kwargs['PaginationToken'] = response['PaginationToken']
+
     def get_all(self, client_id=None):
         users = []
         try:
-            response = self.cognito_client.list_users(UserPoolId=self.user_pool_id)
+            response = self._call('list_users', UserPoolId=self.user_pool_id)
 
             for user in response['Users']:
                 user_attributes = {attr['Name']: attr['Value'] for attr in user['Attributes']}
@@ -3,8 +3,8 @@ import enum
 from marshmallow_enum import EnumField
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, Enum, Date, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Integer, String, Enum, Date, Text, BigInteger, DateTime, Index, func, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 
 Base = declarative_base()
 
@@ -30,11 +30,31 @@ class CommunicationType(enum.Enum):
     CHAT = "Chat"
 
 
+class OutboxOperation(enum.Enum):
+    UPDATE_ATTRIBUTES = "update_attributes"
+    DELETE = "delete"
+    DISABLE = "disable"
+
+
+class OutboxStatus(enum.Enum):
+    PENDING = "pending"
+    FAILED = "failed"
+
+
+class IdempotencyStatus(enum.Enum):
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+
+
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        Index('ix_users_client_id_updated_at_id', 'client_id', 'updated_at', 'id'),
+        Index('ix_users_deleted_at', 'deleted_at', postgresql_where=text('deleted_at IS NOT NULL')),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    cognito_user_sub = Column(String, nullable=False)
+    cognito_user_sub = Column(String, nullable=False, index=True)
     document_type = Column(Enum(DocumentType), nullable=False)
     user_role = Column(Enum(UserRole), nullable=False)
     client_id = Column(Integer, nullable=False)
@@ -43,6 +63,58 @@ class User(Base):
     last_name = Column(String, nullable=False)
     communication_type = Column(Enum(CommunicationType), nullable=False)
     cellphone = Column(String, nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+    purge_attempts = Column(Integer, nullable=False, default=0, server_default='0')
+    purge_after = Column(DateTime(timezone=True), nullable=True)
+
+
+class UserStatsCounter(Base):
+    __tablename__ = 'user_stats_counters'
+
+    client_id = Column(Integer, primary_key=True)
+    dimension = Column(String, primary_key=True)
+    value = Column(String, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+
+class CognitoOutboxMessage(Base):
+    __tablename__ = 'cognito_outbox'
+    __table_args__ = (
+        Index('ix_cognito_outbox_status_available_at', 'status', 'available_at', 'id'),
+        Index('ix_cognito_outbox_user_sub_id', 'user_sub', 'id'),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_sub = Column(String, nullable=False)
+    operation = Column(Enum(OutboxOperation), nullable=False)
+    payload = Column(JSONB, nullable=True)
+    status = Column(Enum(OutboxStatus), nullable=False, default=OutboxStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class IdempotencyRecord(Base):
+    __tablename__ = 'idempotency_keys'
+
+    scope = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    request_hash = Column(String, nullable=False)
+    status = Column(Enum(IdempotencyStatus), nullable=False, default=IdempotencyStatus.IN_PROGRESS)
+    response_body = Column(JSONB, nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class ReconciliationCheckpoint(Base):
+    __tablename__ = 'reconciliation_checkpoints'
+
+    name = Column(String, primary_key=True)
+    last_prefix = Column(String, nullable=False)
+    report = Column(JSONB, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
 
 class UserSchema(SQLAlchemyAutoSchema):
@@ -52,3 +124,4 @@ class UserSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = User
         load_instance = True
+        exclude = ('purge_attempts', 'purge_after')
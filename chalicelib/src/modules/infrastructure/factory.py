@@ -1,9 +1,14 @@
 from dataclasses import dataclass
 from chalicelib.src.seedwork.domain.factory import Factory
 from chalicelib.src.seedwork.domain.repository import Repository
-from chalicelib.src.modules.domain.repository import UserRepository
+from chalicelib.src.modules.domain.repository import UserRepository, CognitoOutboxRepository, IdempotencyRepository, \
+    ReconciliationRepository, AsyncUserRepository
+from .async_repository import UserRepositoryPostgresAsync, UserCognitoRepositoryAsync
 from .cognito_repository import UserCognitoRepository
 from .exceptions import ImplementationNotExistsForFactoryException
+from .idempotency_repository import IdempotencyRepositoryPostgres
+from .outbox_repository import CognitoOutboxRepositoryPostgres
+from .reconciliation_repository import ReconciliationRepositoryPostgres
 from .repository import UserRepositoryPostgres
 
 
@@ -13,13 +18,25 @@ class UserFactory(Factory):
         if obj == UserRepository:
             return UserRepositoryPostgres()
 
-        if obj == UserCognitoRepository:
+        if obj == CognitoOutboxRepository:
+            return CognitoOutboxRepositoryPostgres()
+
+        if obj == IdempotencyRepository:
+            return IdempotencyRepositoryPostgres()
+
+        if obj == ReconciliationRepository:
+            return ReconciliationRepositoryPostgres()
+
+        if obj == AsyncUserRepository:
+            return UserRepositoryPostgresAsync()
+
+        if obj in (UserCognitoRepository, UserCognitoRepositoryAsync):
             cognito_client = kwargs.get('cognito_client')
             user_pool_id = kwargs.get('user_pool_id')
 
             if not cognito_client or not user_pool_id:
-                raise ValueError("cognito_client y user_pool_id son requeridos para crear UserCognitoRepository")
+                raise ValueError(f"cognito_client y user_pool_id son requeridos para crear {obj.__name__}")
 
-            return UserCognitoRepository(cognito_client=cognito_client, user_pool_id=user_pool_id)
+            return obj(cognito_client=cognito_client, user_pool_id=user_pool_id)
 
         raise ImplementationNotExistsForFactoryException()
\ No newline at end of file
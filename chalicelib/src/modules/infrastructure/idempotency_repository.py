@@ -0,0 +1,98 @@
+import logging
+from datetime import timedelta
+
+from sqlalchemy import delete, func, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from chalicelib.src.config.db import init_db
+from chalicelib.src.modules.domain.repository import IdempotencyRepository
+from chalicelib.src.modules.infrastructure.dto import IdempotencyRecord, IdempotencyStatus
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+
+class IdempotencyRepositoryPostgres(IdempotencyRepository):
+    def __init__(self):
+        self.db_session = init_db()
+
+    def begin(self, scope: str, key: str, request_hash: str, ttl_seconds: int, lock_seconds: int) -> bool:
+        values = {
+            'scope': scope,
+            'key': key,
+            'request_hash': request_hash,
+            'status': IdempotencyStatus.IN_PROGRESS,
+            'response_body': None,
+            'locked_at': func.now(),
+            'expires_at': func.now() + timedelta(seconds=ttl_seconds),
+        }
+        statement = insert(IdempotencyRecord).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[IdempotencyRecord.scope, IdempotencyRecord.key],
+            set_={name: value for name, value in values.items() if name not in ('scope', 'key')},
+            where=or_(
+                IdempotencyRecord.expires_at < func.now(),
+                (IdempotencyRecord.status == IdempotencyStatus.IN_PROGRESS)
+                & (IdempotencyRecord.locked_at < func.now() - timedelta(seconds=lock_seconds))
+            )
+        ).returning(IdempotencyRecord.key)
+
+        try:
+            acquired = self.db_session.execute(statement).first() is not None
+            self.db_session.commit()
+            return acquired
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Database error while acquiring idempotency key {scope}/{key}: {e}")
+            raise RuntimeError("Error en la base de datos, intente nuevamente más tarde") from e
+
+    def add(self, record: IdempotencyRecord):
+        self.db_session.add(record)
+        self.db_session.commit()
+
+    def get(self, id):
+        scope, key = id
+        return self.db_session.query(IdempotencyRecord).populate_existing().filter_by(scope=scope, key=key).first()
+
+    def get_all(self, query=None):
+        return self.db_session.query(IdempotencyRecord).filter_by(**(query or {})).all()
+
+    def remove(self, id):
+        scope, key = id
+        try:
+            self.db_session.execute(
+                delete(IdempotencyRecord).where(IdempotencyRecord.scope == scope, IdempotencyRecord.key == key)
+            )
+            self.db_session.commit()
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Database error while releasing idempotency key {scope}/{key}: {e}")
+            raise RuntimeError("Error en la base de datos, intente nuevamente más tarde") from e
+
+    def update(self, id, entity):
+        scope, key = id
+        self.complete(scope, key, entity)
+
+    def complete(self, scope: str, key: str, response_body):
+        try:
+            self.db_session.query(IdempotencyRecord).filter_by(scope=scope, key=key).update(
+                {'status': IdempotencyStatus.COMPLETED, 'response_body': response_body},
+                synchronize_session=False
+            )
+            self.db_session.commit()
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Database error while completing idempotency key {scope}/{key}: {e}")
+            raise RuntimeError("Error en la base de datos, intente nuevamente más tarde") from e
+
+    def purge_expired(self) -> int:
+        try:
+            result = self.db_session.execute(
+                delete(IdempotencyRecord).where(IdempotencyRecord.expires_at < func.now())
+            )
+            self.db_session.commit()
+            return result.rowcount
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Database error while purging idempotency keys: {e}")
+            raise RuntimeError("Error en la base de datos, intente nuevamente más tarde") from e
@@ -0,0 +1,128 @@
+import logging
+import os
+from datetime import timedelta
+
+from sqlalchemy import BigInteger, Integer, Interval, String, all_, any_, bindparam, delete, func, literal, select, \
+    update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import aliased
+
+from chalicelib.src.config.db import init_db
+from chalicelib.src.modules.domain.repository import CognitoOutboxRepository
+from chalicelib.src.modules.infrastructure.dto import CognitoOutboxMessage, OutboxStatus
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 900
+CLAIM_LEASE_SECONDS = int(os.getenv('OUTBOX_LEASE_SECONDS', '300'))
+
+_OLDER = aliased(CognitoOutboxMessage)
+# Only the oldest pending message of each sub is claimable, so a delayed or leased message
+# keeps every later change for the same user waiting behind it.
+CLAIMABLE_HEADS = select(CognitoOutboxMessage.id) \
+    .where(CognitoOutboxMessage.status == OutboxStatus.PENDING,
+           CognitoOutboxMessage.available_at <= func.now(),
+           ~select(_OLDER.id).where(_OLDER.user_sub == CognitoOutboxMessage.user_sub,
+                                    _OLDER.status == OutboxStatus.PENDING,
+                                    _OLDER.id < CognitoOutboxMessage.id).exists()) \
+    .order_by(CognitoOutboxMessage.id) \
+    .limit(bindparam('limit', type_=Integer)) \
+    .with_for_update(skip_locked=True)
+QUEUED_BEHIND_HEADS = select(CognitoOutboxMessage.id) \
+    .where(CognitoOutboxMessage.status == OutboxStatus.PENDING,
+           CognitoOutboxMessage.user_sub == any_(bindparam('user_subs', type_=ARRAY(String))),
+           CognitoOutboxMessage.id != all_(bindparam('head_ids', type_=ARRAY(BigInteger)))) \
+    .with_for_update(skip_locked=True)
+
+
+def _lease(claimable):
+    # Claimed rows are leased by pushing available_at forward and committing, so no row lock is held while
+    # Cognito is called. A drain that dies leaves the rows to be claimed again once the lease runs out.
+    return update(CognitoOutboxMessage) \
+        .where(CognitoOutboxMessage.id.in_(claimable)) \
+        .values(available_at=func.now() + literal(timedelta(seconds=CLAIM_LEASE_SECONDS), Interval)) \
+        .returning(CognitoOutboxMessage) \
+        .execution_options(synchronize_session=False)
+
+
+LEASE_HEADS = _lease(CLAIMABLE_HEADS)
+LEASE_QUEUED_BEHIND_HEADS = _lease(QUEUED_BEHIND_HEADS)
+
+
+class CognitoOutboxRepositoryPostgres(CognitoOutboxRepository):
+    def __init__(self):
+        self.db_session = init_db()
+
+    def add(self, message: CognitoOutboxMessage):
+        self.db_session.add(message)
+        self.db_session.commit()
+
+    def get(self, message_id):
+        return self.db_session.query(CognitoOutboxMessage).filter_by(id=message_id).first()
+
+    def get_all(self, query=None):
+        query = query or {}
+        statement = self.db_session.query(CognitoOutboxMessage)
+        if 'status' in query:
+            statement = statement.filter(CognitoOutboxMessage.status == OutboxStatus(query['status']))
+        return statement.order_by(CognitoOutboxMessage.id).all()
+
+    def remove(self, message_id):
+        self.complete([message_id])
+        self.db_session.commit()
+
+    def update(self, message_id, data):
+        self.db_session.execute(
+            update(CognitoOutboxMessage).where(CognitoOutboxMessage.id == message_id).values(**data)
+        )
+        self.db_session.commit()
+
+    def claim_batch(self, limit: int):
+        try:
+            heads = self.db_session.execute(LEASE_HEADS, {'limit': limit}).scalars().all()
+            followers = []
+            if heads:
+                followers = self.db_session.execute(LEASE_QUEUED_BEHIND_HEADS, {
+                    'user_subs': list({message.user_sub for message in heads}),
+                    'head_ids': [message.id for message in heads],
+                }).scalars().all()
+            self.db_session.commit()
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Database error while claiming outbox batch: {e}")
+            raise RuntimeError("Error en la base de datos, intente nuevamente más tarde") from e
+        return sorted([*heads, *followers], key=lambda message: message.id)
+
+    def complete(self, message_ids):
+        if message_ids:
+            self.db_session.execute(
+                delete(CognitoOutboxMessage).where(CognitoOutboxMessage.id.in_(message_ids))
+            )
+
+    def reschedule(self, message_ids, error: str, max_attempts: int):
+        if not message_ids:
+            return
+
+        for message in self.db_session.query(CognitoOutboxMessage) \
+                .filter(CognitoOutboxMessage.id.in_(message_ids)).all():
+            message.attempts += 1
+            message.last_error = error
+            if message.attempts >= max_attempts:
+                LOGGER.error(f"Outbox message {message.id} for {message.user_sub} failed permanently: {error}")
+                message.status = OutboxStatus.FAILED
+            else:
+                delay = min(RETRY_BASE_SECONDS * 2 ** (message.attempts - 1), RETRY_MAX_SECONDS)
+                message.available_at = func.now() + timedelta(seconds=delay)
+
+    def commit(self):
+        try:
+            self.db_session.commit()
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Database error while committing outbox batch: {e}")
+            raise RuntimeError("Error en la base de datos, intente nuevamente más tarde") from e
+
+    def rollback(self):
+        self.db_session.rollback()
@@ -0,0 +1,72 @@
+import logging
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from chalicelib.src.config.db import init_db
+from chalicelib.src.modules.domain.repository import ReconciliationRepository
+from chalicelib.src.modules.infrastructure.dto import User, ReconciliationCheckpoint
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+
+class ReconciliationRepositoryPostgres(ReconciliationRepository):
+    def __init__(self):
+        self.db_session = init_db()
+
+    def add(self, checkpoint: ReconciliationCheckpoint):
+        self.save_checkpoint(checkpoint.name, checkpoint.last_prefix, checkpoint.report)
+
+    def get(self, name):
+        return self.db_session.query(ReconciliationCheckpoint).filter_by(name=name).first()
+
+    def get_all(self, query=None):
+        return self.db_session.query(ReconciliationCheckpoint).order_by(ReconciliationCheckpoint.name).all()
+
+    def remove(self, name):
+        self.clear_checkpoint(name)
+
+    def update(self, name, data):
+        self.save_checkpoint(name, data['last_prefix'], data['report'])
+
+    def stream_users(self, prefix: str, upper_prefix: str = None, batch_size: int = 500):
+        filters = [User.cognito_user_sub >= prefix]
+        if upper_prefix is not None:
+            filters.append(User.cognito_user_sub < upper_prefix)
+
+        rows = self.db_session.query(User.cognito_user_sub, User.client_id, User.user_role, User.updated_at,
+                                     User.deleted_at) \
+            .filter(*filters) \
+            .order_by(User.cognito_user_sub.collate('C')) \
+            .execution_options(yield_per=batch_size)
+        for user_sub, client_id, user_role, updated_at, deleted_at in rows:
+            yield {'sub': user_sub, 'client_id': str(client_id), 'user_role': user_role.value,
+                   'updated_at': updated_at, 'deleted_at': deleted_at}
+
+    def load_checkpoint(self, name: str):
+        checkpoint = self.get(name)
+        if checkpoint is None:
+            return None
+        return checkpoint.last_prefix, dict(checkpoint.report)
+
+    def save_checkpoint(self, name: str, last_prefix: str, report: dict):
+        statement = insert(ReconciliationCheckpoint).values(name=name, last_prefix=last_prefix, report=report)
+        statement = statement.on_conflict_do_update(
+            index_elements=[ReconciliationCheckpoint.name],
+            set_={'last_prefix': statement.excluded.last_prefix, 'report': statement.excluded.report,
+                  'updated_at': func.now()}
+        )
+        self._commit(statement)
+
+    def clear_checkpoint(self, name: str):
+        self._commit(delete(ReconciliationCheckpoint).where(ReconciliationCheckpoint.name == name))
+
+    def _commit(self, statement):
+        try:
+            self.db_session.execute(statement)
+            self.db_session.commit()
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Database error while saving reconciliation checkpoint: {e}")
+            raise RuntimeError("Error en la base de datos, intente nuevamente más tarde") from e
@@ -1,14 +1,218 @@
 import logging
-from operator import and_
+import os
+from collections import Counter
+from datetime import timedelta
+from functools import lru_cache
 
+from sqlalchemy import DateTime, Enum, Integer, Interval, String, Text, any_, bindparam, case, cast, delete, func, \
+    literal, literal_column, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSON, insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
-from chalicelib.src.config.db import init_db
+from chalicelib.src.config.db import init_db, pipeline
+from chalicelib.src.modules.infrastructure.cache import NEGATIVE_USER_CACHE
 from chalicelib.src.modules.domain.repository import UserRepository
-from chalicelib.src.modules.infrastructure.dto import User, DocumentType, UserRole, CommunicationType, UserSchema
+from chalicelib.src.modules.infrastructure.dto import User, DocumentType, UserRole, CommunicationType, UserSchema, \
+    UserStatsCounter, CognitoOutboxMessage, OutboxOperation
 
 LOGGER = logging.getLogger('abcall-pqrs-microservice')
 
+CHANGES_SETTLE_SECONDS = int(os.getenv('CHANGES_SETTLE_SECONDS', '5'))
+PURGE_CHUNK_SIZE = 500
+PURGE_RETRY_BASE_SECONDS = int(os.getenv('PURGE_RETRY_BASE_SECONDS', '300'))
+PURGE_RETRY_MAX_SECONDS = int(os.getenv('PURGE_RETRY_MAX_SECONDS', '86400'))
+
+STATS_DIMENSIONS = {
+    'user_role': UserRole,
+    'document_type': DocumentType,
+    'communication_type': CommunicationType,
+}
+STATS_TOTAL = 'total'
+
+COGNITO_ATTRIBUTES = {
+    'client_id': 'custom:client_id',
+    'user_role': 'custom:custom:userRole',
+}
+
+
+def _stats_keys(user):
+    client_id = int(user.client_id)
+    keys = [(client_id, STATS_TOTAL, '')]
+    for dimension in STATS_DIMENSIONS:
+        keys.append((client_id, dimension, getattr(user, dimension).value))
+    return keys
+
+
+def _user_values(user):
+    return dict(
+        cognito_user_sub=user.cognito_user_sub,
+        document_type=DocumentType(user.document_type),
+        user_role=UserRole(user.user_role),
+        client_id=user.client_id,
+        id_number=user.id_number,
+        name=user.name,
+        last_name=user.last_name,
+        communication_type=CommunicationType(user.communication_type),
+        cellphone=user.cellphone
+    )
+
+
+def _new_user(user):
+    return User(**_user_values(user))
+
+
+def _updated_values(data):
+    values = {}
+    if 'name' in data:
+        values['name'] = data['name']
+    if 'last_name' in data:
+        values['last_name'] = data['last_name']
+    if 'cellphone' in data:
+        values['cellphone'] = data['cellphone']
+    if 'client_id' in data:
+        values['client_id'] = data['client_id']
+    if 'user_role' in data:
+        values['user_role'] = UserRole(data['user_role'])
+    if 'document_type' in data:
+        values['document_type'] = DocumentType(data['document_type'])
+    if 'communication_type' in data:
+        values['communication_type'] = CommunicationType(data['communication_type'])
+    return values
+
+
+def _cognito_attributes(data):
+    return {attribute: str(data[field]) for field, attribute in COGNITO_ATTRIBUTES.items() if field in data}
+
+
+def _apply_update(user, data):
+    for name, value in _updated_values(data).items():
+        setattr(user, name, value)
+    return _cognito_attributes(data)
+
+
+def _updated_stats_keys(user, values):
+    stats_values = {name: values.get(name, getattr(user, name)) for name in ('client_id', *STATS_DIMENSIONS)}
+    return _stats_keys(User(**stats_values))
+
+
+def _empty_stats(client_id):
+    stats = {'client_id': client_id, STATS_TOTAL: 0}
+    for dimension, enum_type in STATS_DIMENSIONS.items():
+        stats[dimension] = {member.value: 0 for member in enum_type}
+    return stats
+
+
+FILTER_CLAUSES = {
+    'client_id': User.client_id == bindparam('client_id'),
+    'name': User.name.ilike(bindparam('name')),
+    'last_name': User.last_name.ilike(bindparam('last_name')),
+    'document_type': User.document_type == bindparam('document_type'),
+    'id_number': User.id_number == bindparam('id_number'),
+}
+PARTIAL_MATCH_FILTERS = frozenset({'name', 'last_name'})
+STATS_COLUMNS = [getattr(User, dimension) for dimension in STATS_DIMENSIONS]
+
+LIVE_USERS = select(User).where(User.deleted_at.is_(None))
+USER_BY_SUB = LIVE_USERS.where(User.cognito_user_sub == bindparam('user_sub')).limit(1)
+USERS_BY_SUBS = LIVE_USERS.where(User.cognito_user_sub == any_(bindparam('user_subs', type_=ARRAY(String))))
+# The SET clause comes from the parameter keys, so each executemany batch shares one set of columns.
+USER_UPDATE = update(User.__table__).where(User.__table__.c.id == bindparam('user_id'))
+USERS_SOFT_DELETE = update(User.__table__) \
+    .where(User.__table__.c.cognito_user_sub == any_(bindparam('user_subs', type_=ARRAY(String))),
+           User.__table__.c.deleted_at.is_(None)) \
+    .values(deleted_at=func.now())
+CLAIMABLE_TOMBSTONES = select(User.id) \
+    .where(User.deleted_at < func.now() - bindparam('grace', type_=Interval),
+           or_(User.purge_after.is_(None), User.purge_after <= func.now())) \
+    .order_by(User.deleted_at) \
+    .limit(bindparam('limit', type_=Integer)) \
+    .with_for_update(skip_locked=True)
+# Claiming leases the rows until purge_after, which doubles as the backoff when the purge fails.
+TOMBSTONES = update(User) \
+    .where(User.id.in_(CLAIMABLE_TOMBSTONES)) \
+    .values(updated_at=User.updated_at,
+            purge_attempts=User.purge_attempts + 1,
+            purge_after=func.now() + literal(timedelta(seconds=1), Interval) * func.least(
+                PURGE_RETRY_BASE_SECONDS * func.power(2, User.purge_attempts), PURGE_RETRY_MAX_SECONDS)) \
+    .returning(User.id, User.cognito_user_sub) \
+    .execution_options(synchronize_session=False)
+CHANGES = select(User) \
+    .where(User.client_id == bindparam('client_id'),
+           User.updated_at < func.now() - timedelta(seconds=CHANGES_SETTLE_SECONDS)) \
+    .order_by(User.updated_at, User.id) \
+    .limit(bindparam('limit', type_=Integer))
+CHANGES_SINCE = CHANGES.where(tuple_(User.updated_at, User.id) >
+                              tuple_(bindparam('since_updated_at', type_=DateTime(timezone=True)),
+                                     bindparam('since_id', type_=Integer)))
+STATS_FROM_COUNTERS = select(UserStatsCounter.dimension, UserStatsCounter.value, UserStatsCounter.count) \
+    .where(UserStatsCounter.client_id == bindparam('client_id'))
+STATS_LIVE = select(*STATS_COLUMNS, func.count(User.id)) \
+    .where(User.client_id == bindparam('client_id'), User.deleted_at.is_(None)) \
+    .group_by(func.grouping_sets(*[tuple_(column) for column in STATS_COLUMNS], tuple_()))
+STATS_REBUILD = select(User.client_id, *STATS_COLUMNS, func.count(User.id)) \
+    .where(User.deleted_at.is_(None)) \
+    .group_by(func.grouping_sets(*[tuple_(User.client_id, column) for column in STATS_COLUMNS],
+                                 tuple_(User.client_id)))
+
+
+@lru_cache(maxsize=None)
+def filtered_users(shape):
+    return LIVE_USERS.where(*(FILTER_CLAUSES[name] for name in shape))
+
+
+def _sql_string(value):
+    return literal_column(f"'{value}'", String)
+
+
+def _json_value(column):
+    if isinstance(column.type, Enum):
+        return case(*((cast(column, String) == _sql_string(member.name), _sql_string(member.value))
+                      for member in column.type.enum_class))
+    return column
+
+
+USER_JSON = func.json_build_object(*(part for name in UserSchema().fields
+                                     for part in (_sql_string(name), _json_value(getattr(User, name)))))
+
+
+@lru_cache(maxsize=None)
+def filtered_users_json(shape):
+    users = func.coalesce(func.json_agg(USER_JSON), cast(_sql_string('[]'), JSON))
+    return select(cast(users, Text)).select_from(User).where(User.deleted_at.is_(None),
+                                                             *(FILTER_CLAUSES[name] for name in shape))
+
+
+def filter_params(query):
+    query = query or {}
+    shape = tuple(name for name in FILTER_CLAUSES if name in query)
+    if not shape:
+        raise ValueError(f"Se requiere al menos un filtro: {', '.join(FILTER_CLAUSES)}")
+    params = {name: f"%{query[name]}%" if name in PARTIAL_MATCH_FILTERS else query[name] for name in shape}
+    return shape, params
+
+
+def stats_from_counters(client_id, rows):
+    stats = _empty_stats(client_id)
+    for dimension, value, count in rows:
+        if dimension == STATS_TOTAL:
+            stats[STATS_TOTAL] = count
+        elif dimension in stats:
+            stats[dimension][value] = count
+    return stats
+
+
+def stats_from_grouping_sets(client_id, rows):
+    stats = _empty_stats(client_id)
+    for row in rows:
+        *values, count = row
+        for dimension, value in zip(STATS_DIMENSIONS, values):
+            if value is not None:
+                stats[dimension][value.value] = count
+                break
+        else:
+            stats[STATS_TOTAL] = count
+    return stats
+
 
 class UserRepositoryPostgres(UserRepository):
     def __init__(self):
@@ -17,19 +221,10 @@ class UserRepositoryPostgres(UserRepository):
     def add(self, user):
         LOGGER.info(f"Repository add user: {user}")
         user_schema = UserSchema()
-        new_user = User(
-            cognito_user_sub=user.cognito_user_sub,
-            document_type=DocumentType(user.document_type),
-            user_role=UserRole(user.user_role),
-            client_id=user.client_id,
-            id_number=user.id_number,
-            name=user.name,
-            last_name=user.last_name,
-            communication_type=CommunicationType(user.communication_type),
-            cellphone=user.cellphone
-        )
+        new_user = _new_user(user)
         try:
             self.db_session.add(new_user)
+            self._bump_stats(Counter(_stats_keys(new_user)))
             self.db_session.commit()
             return user_schema.dump(new_user)
         except IntegrityError as e:
@@ -47,24 +242,46 @@ class UserRepositoryPostgres(UserRepository):
 
     def get(self, user_sub):
         user_schema = UserSchema()
-        user = self.db_session.query(User).filter_by(cognito_user_sub=user_sub).first()
+        if NEGATIVE_USER_CACHE.get(user_sub):
+            raise ValueError("user not found")
+
+        user = self.db_session.execute(USER_BY_SUB, {'user_sub': user_sub}).scalar()
         if not user:
+            NEGATIVE_USER_CACHE.set(user_sub, True)
             raise ValueError("user not found")
         return user_schema.dump(user)
 
+    def get_many(self, user_subs):
+        user_schema = UserSchema(many=True)
+        pending = [user_sub for user_sub in dict.fromkeys(user_subs) if not NEGATIVE_USER_CACHE.get(user_sub)]
+        if not pending:
+            return {}
+
+        users = self.db_session.execute(USERS_BY_SUBS, {'user_subs': pending}).scalars().all()
+        found = {user['cognito_user_sub']: user for user in user_schema.dump(users)}
+        for user_sub in pending:
+            if user_sub not in found:
+                NEGATIVE_USER_CACHE.set(user_sub, True)
+        return found
+
     def remove(self, user_sub):
         LOGGER.info(f"Repository remove user: {user_sub}")
+        user_schema = UserSchema()
 
         try:
-            entity = self.db_session.query(User).filter_by(cognito_user_sub=user_sub).first()
+            entity = self.db_session.execute(USER_BY_SUB, {'user_sub': user_sub}).scalar()
 
             if entity is None:
                 LOGGER.warning(f"User {user_sub} not found for deletion")
                 raise ValueError(f"Usuario con sub {user_sub} no encontrado")
 
-            self.db_session.delete(entity)
+            self._bump_stats(Counter({key: -1 for key in _stats_keys(entity)}))
+            self.db_session.add(CognitoOutboxMessage(user_sub=user_sub, operation=OutboxOperation.DISABLE))
+            removed = user_schema.dump(entity)
+            entity.deleted_at = func.now()
             self.db_session.commit()
             LOGGER.info(f"User {user_sub} removed successfully")
+            return removed
 
         except IntegrityError as e:
             self.db_session.rollback()
@@ -81,54 +298,70 @@ class UserRepositoryPostgres(UserRepository):
             LOGGER.error(f"Unexpected error while removing user {user_sub}: {e}")
             raise RuntimeError("Ocurrió un error inesperado al intentar eliminar el usuario") from e
 
+    def claim_tombstones(self, limit, grace_seconds):
+        try:
+            tombstones = self.db_session.execute(TOMBSTONES, {'grace': timedelta(seconds=grace_seconds),
+                                                              'limit': limit}).all()
+            self.db_session.commit()
+            return tombstones
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Database error while claiming deleted users: {e}")
+            raise RuntimeError("Error en la base de datos, intente nuevamente más tarde") from e
+
+    def purge(self, user_ids):
+        LOGGER.info(f"Repository purge {len(user_ids)} deleted users")
+        try:
+            with pipeline(self.db_session):
+                for offset in range(0, len(user_ids), PURGE_CHUNK_SIZE):
+                    chunk = user_ids[offset:offset + PURGE_CHUNK_SIZE]
+                    self.db_session.execute(delete(User).where(User.id.in_(chunk)))
+            self.db_session.commit()
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Database error while purging deleted users: {e}")
+            raise RuntimeError("Error en la base de datos, intente nuevamente más tarde") from e
+
+    def rollback(self):
+        self.db_session.rollback()
+
     def get_all(self, query: dict[str, str]):
         user_schema = UserSchema(many=True)
-        if not query:
-            return self.db_session.query(User).all()
-
-        filters = []
-        if 'client_id' in query:
-            filters.append(User.client_id == query['client_id'])
-        if 'name' in query:
-            filters.append(User.name.ilike(f"%{query['name']}%"))  # Para una búsqueda parcial (case-insensitive)
-        if 'last_name' in query:
-            filters.append(User.last_name.ilike(f"%{query['last_name']}%"))
-        if 'document_type' in query:
-            filters.append(User.document_type == query['document_type'])
-        if 'id_number' in query:
-            filters.append(User.id_number == query['id_number'])
-
-        result = self.db_session.query(User).filter(and_(*filters)).all() if len(filters) > 1 \
-            else self.db_session.query(User).filter(filters[0]).all()
+        shape, params = filter_params(query)
+
+        result = self.db_session.execute(filtered_users(shape), params).scalars().all()
         return user_schema.dump(result)
 
-    def update(self, user_sub, data) -> None:
+    def get_all_json(self, query: dict[str, str]) -> str:
+        shape, params = filter_params(query)
+        return self.db_session.execute(filtered_users_json(shape), params).scalar()
+
+    def update(self, user_sub, data, sync_cognito=False):
         LOGGER.info(f"Repository update user sub: {user_sub} with data: {data}")
+        user_schema = UserSchema()
 
         try:
-            user = self.db_session.query(User).filter_by(cognito_user_sub=user_sub).first()
+            user = self.db_session.execute(USER_BY_SUB, {'user_sub': user_sub}).scalar()
 
             if not user:
                 LOGGER.warning(f"User {user_sub} not found for update")
                 raise ValueError("Usuario no encontrado")
 
-            if 'name' in data:
-                user.name = data['name']
-            if 'last_name' in data:
-                user.last_name = data['last_name']
-            if 'cellphone' in data:
-                user.cellphone = data['cellphone']
-            if 'client_id' in data:
-                user.client_id = data['client_id']
-            if 'user_role' in data:
-                user.user_role = UserRole(data['user_role'])
-            if 'document_type' in data:
-                user.document_type = DocumentType(data['document_type'])
-            if 'communication_type' in data:
-                user.communication_type = CommunicationType(data['communication_type'])
+            previous = user_schema.dump(user)
+            previous_keys = _stats_keys(user)
+            attributes = _apply_update(user, data)
 
+            deltas = Counter(_stats_keys(user))
+            deltas.subtract(previous_keys)
+            self._bump_stats(deltas)
+
+            if attributes and sync_cognito:
+                self.db_session.add(CognitoOutboxMessage(user_sub=user_sub,
+                                                         operation=OutboxOperation.UPDATE_ATTRIBUTES,
+                                                         payload=attributes))
             self.db_session.commit()
             LOGGER.info(f"User {user_sub} updated successfully")
+            return {'previous': previous, 'current': user_schema.dump(user)}
 
         except IntegrityError as e:
             self.db_session.rollback()
@@ -144,3 +377,157 @@ class UserRepositoryPostgres(UserRepository):
             self.db_session.rollback()
             LOGGER.error(f"Unexpected error while updating user {user_sub}: {e}")
             raise RuntimeError("Ocurrió un error inesperado al intentar actualizar el usuario") from e
+
+    def add_many(self, users):
+        LOGGER.info(f"Repository add {len(users)} users")
+        rows = [_user_values(user) for user in users]
+        deltas = Counter()
+        for row in rows:
+            deltas.update(_stats_keys(User(**row)))
+
+        try:
+            # Core executemany statements only, the ORM flush is not safe inside a driver pipeline.
+            with pipeline(self.db_session):
+                self.db_session.execute(insert(User), rows)
+                self._bump_stats(deltas)
+            self.db_session.commit()
+        except IntegrityError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Integrity error while adding {len(users)} users: {e}")
+            raise ValueError("Error: datos de usuario no válidos o duplicados") from e
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Database error while adding {len(users)} users: {e}")
+            raise RuntimeError("Error en la base de datos, intente nuevamente más tarde") from e
+        return self._reload([row['cognito_user_sub'] for row in rows])
+
+    def update_many(self, updates: dict, sync_cognito=False):
+        LOGGER.info(f"Repository update {len(updates)} users")
+        user_schema = UserSchema()
+
+        users = self.db_session.execute(USERS_BY_SUBS, {'user_subs': list(updates)}).scalars().all()
+        previous, deltas, statements, outbox = {}, Counter(), {}, []
+        for user in users:
+            data = updates[user.cognito_user_sub]
+            values = _updated_values(data)
+            previous[user.cognito_user_sub] = user_schema.dump(user)
+            deltas.subtract(_stats_keys(user))
+            deltas.update(_updated_stats_keys(user, values))
+            if values:
+                statements.setdefault(tuple(sorted(values)), []).append({'user_id': user.id, **values})
+            attributes = _cognito_attributes(data)
+            if attributes and sync_cognito:
+                outbox.append({'user_sub': user.cognito_user_sub, 'operation': OutboxOperation.UPDATE_ATTRIBUTES,
+                               'payload': attributes})
+
+        try:
+            # Core executemany statements only, the ORM flush is not safe inside a driver pipeline.
+            with pipeline(self.db_session):
+                for rows in statements.values():
+                    self.db_session.execute(USER_UPDATE, rows)
+                if outbox:
+                    self.db_session.execute(insert(CognitoOutboxMessage.__table__), outbox)
+                self._bump_stats(deltas)
+            self.db_session.commit()
+        except IntegrityError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Integrity error while updating {len(updates)} users: {e}")
+            raise ValueError("Error de integridad al intentar actualizar los usuarios") from e
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Database error while updating {len(updates)} users: {e}")
+            raise RuntimeError("Error en la base de datos, intente nuevamente más tarde") from e
+
+        current = self._reload(list(previous))
+        return {user_sub: {'previous': previous[user_sub], 'current': current[user_sub]}
+                for user_sub in previous if user_sub in current}
+
+    def remove_many(self, user_subs):
+        LOGGER.info(f"Repository remove {len(user_subs)} users")
+        user_schema = UserSchema()
+
+        users = self.db_session.execute(USERS_BY_SUBS, {'user_subs': list(user_subs)}).scalars().all()
+        removed, deltas = {}, Counter()
+        for user in users:
+            removed[user.cognito_user_sub] = user_schema.dump(user)
+            deltas.subtract(_stats_keys(user))
+        if not removed:
+            return removed
+
+        try:
+            with pipeline(self.db_session):
+                self.db_session.execute(USERS_SOFT_DELETE, {'user_subs': list(removed)})
+                self.db_session.execute(insert(CognitoOutboxMessage.__table__), [
+                    {'user_sub': user_sub, 'operation': OutboxOperation.DISABLE} for user_sub in removed
+                ])
+                self._bump_stats(deltas)
+            self.db_session.commit()
+            return removed
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Database error while removing {len(user_subs)} users: {e}")
+            raise RuntimeError("Error en la base de datos, intente nuevamente más tarde") from e
+
+    def _reload(self, user_subs):
+        user_schema = UserSchema(many=True)
+        users = self.db_session.execute(USERS_BY_SUBS, {'user_subs': user_subs},
+                                        execution_options={'populate_existing': True}).scalars().all()
+        return {user['cognito_user_sub']: user for user in user_schema.dump(users)}
+
+    def get_changes(self, client_id, since=None, limit=100):
+        user_schema = UserSchema(many=True)
+        params = {'client_id': client_id, 'limit': limit + 1}
+        if since is not None:
+            params['since_updated_at'], params['since_id'] = since
+
+        users = self.db_session.execute(CHANGES if since is None else CHANGES_SINCE, params).scalars().all()
+        return user_schema.dump(users[:limit]), len(users) > limit
+
+    def get_stats(self, client_id, from_counters=False):
+        if from_counters:
+            rows = self.db_session.execute(STATS_FROM_COUNTERS, {'client_id': client_id}).all()
+            return stats_from_counters(client_id, rows)
+
+        rows = self.db_session.execute(STATS_LIVE, {'client_id': client_id}).all()
+        return stats_from_grouping_sets(client_id, rows)
+
+    def rebuild_stats(self):
+        LOGGER.info("Repository rebuild user stats counters")
+
+        try:
+            rows = self.db_session.execute(STATS_REBUILD).all()
+
+            counters = []
+            for client_id, *values, count in rows:
+                dimension, value = STATS_TOTAL, ''
+                for candidate, candidate_value in zip(STATS_DIMENSIONS, values):
+                    if candidate_value is not None:
+                        dimension, value = candidate, candidate_value.value
+                        break
+                counters.append({'client_id': client_id, 'dimension': dimension, 'value': value, 'count': count})
+
+            self.db_session.execute(delete(UserStatsCounter))
+            if counters:
+                self.db_session.execute(insert(UserStatsCounter).values(counters))
+            self.db_session.commit()
+            LOGGER.info(f"User stats counters rebuilt with {len(counters)} rows")
+
+        except SQLAlchemyError as e:
+            self.db_session.rollback()
+            LOGGER.error(f"Database error while rebuilding user stats: {e}")
+            raise RuntimeError("Error en la base de datos, intente nuevamente más tarde") from e
+
+    def _bump_stats(self, deltas: Counter):
+        rows = [
+            {'client_id': client_id, 'dimension': dimension, 'value': value, 'count': delta}
+            for (client_id, dimension, value), delta in deltas.items() if delta
+        ]
+        if not rows:
+            return
+
+        statement = insert(UserStatsCounter).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[UserStatsCounter.client_id, UserStatsCounter.dimension, UserStatsCounter.value],
+            set_={'count': UserStatsCounter.count + statement.excluded.count}
+        )
+        self.db_session.execute(statement)
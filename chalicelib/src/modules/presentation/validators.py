@@ -0,0 +1,32 @@
+import re
+
+from chalicelib.src.modules.infrastructure.dto import DocumentType, UserRole, CommunicationType
+from chalicelib.src.seedwork.presentation.validation import FieldRule, Validator
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$')
+
+
+def _choices(enum_type):
+    return tuple(member.value for member in enum_type)
+
+
+CLIENT_ID = FieldRule('client_id')
+DOCUMENT_TYPE = FieldRule('document_type', choices=_choices(DocumentType))
+USER_ROLE = FieldRule('user_role', choices=_choices(UserRole))
+ID_NUMBER = FieldRule('id_number')
+NAME = FieldRule('name')
+LAST_NAME = FieldRule('last_name')
+EMAIL = FieldRule('email', pattern=EMAIL_PATTERN, pattern_message="Invalid email format")
+CELLPHONE = FieldRule('cellphone')
+PASSWORD = FieldRule('password')
+COMMUNICATION_TYPE = FieldRule('communication_type', choices=_choices(CommunicationType))
+
+CREATE_USER_VALIDATOR = Validator([
+    CLIENT_ID, DOCUMENT_TYPE, USER_ROLE, ID_NUMBER, NAME, LAST_NAME, EMAIL, CELLPHONE, PASSWORD, COMMUNICATION_TYPE
+])
+
+REGISTER_USER_VALIDATOR = Validator([
+    CLIENT_ID, DOCUMENT_TYPE, ID_NUMBER, NAME, LAST_NAME, EMAIL, CELLPHONE, PASSWORD, COMMUNICATION_TYPE
+])
+
+UPDATE_ME_VALIDATOR = Validator([DOCUMENT_TYPE, COMMUNICATION_TYPE])
@@ -1,9 +1,15 @@
+import asyncio
 from functools import singledispatch
 from abc import ABC, abstractmethod
 
+from chalicelib.src.seedwork.infrastructure.admission import ADMISSION
+from chalicelib.src.seedwork.infrastructure.event_loop import run_in_thread
+from chalicelib.src.seedwork.infrastructure.profiling import record_operation
+from chalicelib.src.seedwork.infrastructure.tracing import span
+
 
 class Command:
-    ...
+    backends = ()
 
 
 class CommandHandler(ABC):
@@ -13,5 +19,37 @@ class CommandHandler(ABC):
 
 
 @singledispatch
-def execute_command(command):
+def dispatch_command(command):
     raise NotImplementedError(f'No implementation exists for the command type {type(command).__name__}')
+
+
+@singledispatch
+async def dispatch_command_async(command):
+    return await run_in_thread(dispatch_command, command)
+
+
+def execute_command(command):
+    record_operation(type(command).__name__)
+    # Commands wait longer for a backend slot than queries do, since an earlier command in the same request may
+    # already have had side effects, but still give up with a 429 once the limiter's block_seconds run out.
+    # Tenants are admitted once per request, before any command runs.
+    with span(f"command {type(command).__name__}"), ADMISSION.backends(getattr(command, 'backends', ()), block=True):
+        return dispatch_command(command)
+
+
+async def execute_command_async(command):
+    record_operation(type(command).__name__)
+    with span(f"command {type(command).__name__}"):
+        acquired = await asyncio.to_thread(ADMISSION.acquire_backends, getattr(command, 'backends', ()), block=True)
+        try:
+            return await dispatch_command_async(command)
+        finally:
+            ADMISSION.release_backends(acquired)
+
+
+execute_command.register = dispatch_command.register
+execute_command.dispatch = dispatch_command.dispatch
+execute_command.registry = dispatch_command.registry
+execute_command_async.register = dispatch_command_async.register
+execute_command_async.dispatch = dispatch_command_async.dispatch
+execute_command_async.registry = dispatch_command_async.registry
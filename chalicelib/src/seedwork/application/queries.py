@@ -1,10 +1,24 @@
+import asyncio
+import os
 from functools import singledispatch
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 
+from chalicelib.src.seedwork.infrastructure.admission import ADMISSION
+from chalicelib.src.seedwork.infrastructure.event_loop import run_in_thread
+from chalicelib.src.seedwork.infrastructure.metrics import register_metrics
+from chalicelib.src.seedwork.infrastructure.profiling import record_operation
+from chalicelib.src.seedwork.infrastructure.tracing import span
+from chalicelib.src.seedwork.infrastructure.single_flight import SingleFlight, flight_key
+
+QUERY_SINGLE_FLIGHT = os.getenv('QUERY_SINGLE_FLIGHT', 'true').lower() == 'true'
+
+QUERY_FLIGHTS = SingleFlight('queries')
+register_metrics('single_flight', QUERY_FLIGHTS.metrics)
+
 
 class Query(ABC):
-    ...
+    backends = ()
 
 
 @dataclass
@@ -19,5 +33,49 @@ class QueryHandler(ABC):
 
 
 @singledispatch
-def execute_query(query):
+def dispatch_query(query):
     raise NotImplementedError(f'No implementation exists for the query type {type(query).__name__}')
+
+
+@singledispatch
+async def dispatch_query_async(query):
+    return await run_in_thread(dispatch_query, query)
+
+
+def execute_query(query):
+    record_operation(type(query).__name__)
+    with span(f"query {type(query).__name__}"):
+        if not QUERY_SINGLE_FLIGHT:
+            return _run_query(query)
+        return QUERY_FLIGHTS.do(flight_key(query), _run_query, query, label=type(query).__name__)
+
+
+def _run_query(query):
+    with ADMISSION.backends(getattr(query, 'backends', ())):
+        return dispatch_query(query)
+
+
+async def execute_query_async(query):
+    record_operation(type(query).__name__)
+    with span(f"query {type(query).__name__}"):
+        if not QUERY_SINGLE_FLIGHT:
+            return await _run_query_async(query)
+        return await QUERY_FLIGHTS.do_async(flight_key(query), _run_query_async, query,
+                                            label=type(query).__name__)
+
+
+async def _run_query_async(query):
+    with ADMISSION.backends(getattr(query, 'backends', ()), wait=False):
+        return await dispatch_query_async(query)
+
+
+execute_query.register = dispatch_query.register
+execute_query.dispatch = dispatch_query.dispatch
+execute_query.registry = dispatch_query.registry
+execute_query_async.register = dispatch_query_async.register
+execute_query_async.dispatch = dispatch_query_async.dispatch
+execute_query_async.registry = dispatch_query_async.registry
+
+
+async def gather_queries(*queries):
+    return await asyncio.gather(*(execute_query_async(query) for query in queries))
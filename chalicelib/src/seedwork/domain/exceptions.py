@@ -17,3 +17,11 @@ class FactoryException(DomainException):
 
     def __str__(self):
         return str(self.__message)
+
+
+class ValidationException(DomainException):
+    def __init__(self, errors):
+        self.errors = list(errors)
+
+    def __str__(self):
+        return '; '.join(self.errors)
@@ -0,0 +1,174 @@
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+POSTGRES = 'postgres'
+COGNITO = 'cognito'
+
+
+# Derives from BaseException so the routes' broad `except Exception` handlers let it through to the 429 mapping.
+class AdmissionRejectedException(BaseException):
+    def __init__(self, scope, retry_after: float = 1.0):
+        self.scope = scope
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return f"Too many requests for {self.scope}, retry after {self.retry_after_seconds}s"
+
+    @property
+    def retry_after_seconds(self) -> int:
+        return max(1, math.ceil(self.retry_after))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+
+class SharedWindowLimiter:
+    def __init__(self, cache_tier, rate: float, burst: int, window_seconds: float = 1.0):
+        self.cache_tier = cache_tier
+        self.limit = max(burst, int(rate * window_seconds))
+        self.window_seconds = window_seconds
+
+    def acquire(self, key) -> float:
+        now = time.time()
+        window = int(now // self.window_seconds)
+        count = self.cache_tier.incr(self.cache_tier.key('ratelimit', key, window), ttl=self.window_seconds * 2)
+        # Without a reachable shared store the request is let through rather than rejected.
+        if count is None or count <= self.limit:
+            return 0.0
+        return (window + 1) * self.window_seconds - now
+
+
+class ConcurrencyLimiter:
+    def __init__(self, limit: int, wait_seconds: float = 0.0, block_seconds: float = 10.0):
+        self.limit = limit
+        self.wait_seconds = wait_seconds
+        self.block_seconds = block_seconds
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key, wait: bool = True, block: bool = False) -> bool:
+        with self._lock:
+            semaphore = self._semaphores.get(key)
+            if semaphore is None:
+                semaphore = self._semaphores[key] = threading.BoundedSemaphore(self.limit)
+        if block:
+            return semaphore.acquire(timeout=self.block_seconds)
+        if wait and self.wait_seconds > 0:
+            return semaphore.acquire(timeout=self.wait_seconds)
+        return semaphore.acquire(blocking=False)
+
+    def release(self, key):
+        self._semaphores[key].release()
+
+    def in_use(self):
+        with self._lock:
+            return {key: self.limit - semaphore._value for key, semaphore in self._semaphores.items()}
+
+
+class AdmissionController:
+    def __init__(self):
+        self.rate_limiter = None
+        self.tenant_limiter = None
+        self.backend_limiters = {}
+        self._rejections = Counter()
+        self._lock = threading.Lock()
+
+    def configure(self, rate_limiter=None, tenant_limiter: ConcurrencyLimiter = None, backend_limiters: dict = None):
+        self.rate_limiter = rate_limiter
+        self.tenant_limiter = tenant_limiter
+        self.backend_limiters = backend_limiters or {}
+
+    @contextmanager
+    def tenant(self, client_id, wait: bool = True):
+        if client_id is None:
+            yield
+            return
+
+        if self.rate_limiter is not None:
+            retry_after = self.rate_limiter.acquire(client_id)
+            if retry_after > 0:
+                self._reject(f"tenant {client_id}", 'rate')
+                raise AdmissionRejectedException(f"tenant {client_id}", retry_after)
+
+        if self.tenant_limiter is None:
+            yield
+            return
+
+        if not self.tenant_limiter.acquire(client_id, wait=wait):
+            self._reject(f"tenant {client_id}", 'tenant_concurrency')
+            raise AdmissionRejectedException(f"tenant {client_id}")
+        try:
+            yield
+        finally:
+            self.tenant_limiter.release(client_id)
+
+    def acquire_backends(self, backends, wait: bool = True, block: bool = False) -> list:
+        acquired = []
+        try:
+            for backend in backends:
+                limiter = self.backend_limiters.get(backend)
+                if limiter is None:
+                    continue
+                if not limiter.acquire(backend, wait=wait, block=block):
+                    self._reject(backend, 'backend_concurrency')
+                    raise AdmissionRejectedException(f"backend {backend}",
+                                                     limiter.block_seconds if block else limiter.wait_seconds)
+                acquired.append((limiter, backend))
+        except BaseException:
+            self.release_backends(acquired)
+            raise
+        return acquired
+
+    @staticmethod
+    def release_backends(acquired):
+        for limiter, backend in reversed(acquired):
+            limiter.release(backend)
+
+    @contextmanager
+    def backends(self, backends, wait: bool = True, block: bool = False):
+        acquired = self.acquire_backends(backends, wait=wait, block=block)
+        try:
+            yield
+        finally:
+            self.release_backends(acquired)
+
+    def metrics(self):
+        with self._lock:
+            rejections = dict(self._rejections)
+        return {
+            'rejected': sum(rejections.values()),
+            'rejections': rejections,
+            'tenants_in_flight': self.tenant_limiter.in_use() if self.tenant_limiter else {},
+            'backends_in_flight': {backend: limiter.in_use().get(backend, 0)
+                                   for backend, limiter in self.backend_limiters.items()},
+        }
+
+    def _reject(self, scope, reason):
+        LOGGER.warning(f"Admission rejected for {scope}: {reason}")
+        with self._lock:
+            self._rejections[reason] += 1
+
+
+ADMISSION = AdmissionController()
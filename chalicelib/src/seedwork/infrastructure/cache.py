@@ -0,0 +1,269 @@
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class Cache(ABC):
+    @abstractmethod
+    def get(self, key: str):
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value, ttl: float = None):
+        ...
+
+    @abstractmethod
+    def delete(self, *keys: str):
+        ...
+
+    @abstractmethod
+    def get_many(self, keys: list) -> list:
+        ...
+
+    @abstractmethod
+    def set_many(self, mapping: dict, ttl: float = None):
+        ...
+
+    @abstractmethod
+    def incr(self, key: str, ttl: float = None) -> int:
+        ...
+
+
+class NullCache(Cache):
+    def get(self, key: str):
+        return None
+
+    def set(self, key: str, value, ttl: float = None):
+        pass
+
+    def delete(self, *keys: str):
+        pass
+
+    def get_many(self, keys: list) -> list:
+        return [None] * len(keys)
+
+    def set_many(self, mapping: dict, ttl: float = None):
+        pass
+
+    def incr(self, key: str, ttl: float = None) -> int:
+        return 0
+
+
+class InMemoryCache(Cache):
+    def __init__(self, maxsize: int = 10000):
+        self._entries = TTLCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        return self._entries.get(key)
+
+    def set(self, key: str, value, ttl: float = None):
+        self._entries.set(key, value, ttl=ttl)
+
+    def delete(self, *keys: str):
+        for key in keys:
+            self._entries.delete(key)
+
+    def get_many(self, keys: list) -> list:
+        return [self._entries.get(key) for key in keys]
+
+    def set_many(self, mapping: dict, ttl: float = None):
+        for key, value in mapping.items():
+            self._entries.set(key, value, ttl=ttl)
+
+    def incr(self, key: str, ttl: float = None) -> int:
+        with self._lock:
+            value = int(self._entries.get(key) or 0) + 1
+            self._entries.set(key, value, ttl=ttl)
+            return value
+
+    def clear(self):
+        self._entries.clear()
+
+
+class RedisCache(Cache):
+    def __init__(self, url: str, socket_timeout: float = 0.2):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout)
+
+    def get(self, key: str):
+        return self._client.get(key)
+
+    def set(self, key: str, value, ttl: float = None):
+        self._client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, *keys: str):
+        if keys:
+            self._client.delete(*keys)
+
+    def get_many(self, keys: list) -> list:
+        return self._client.mget(keys) if keys else []
+
+    def set_many(self, mapping: dict, ttl: float = None):
+        if not mapping:
+            return
+        pipeline = self._client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipeline.set(key, value, px=int(ttl * 1000) if ttl else None)
+        pipeline.execute()
+
+    def incr(self, key: str, ttl: float = None) -> int:
+        if not ttl:
+            return self._client.incr(key)
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.incr(key)
+        pipeline.pexpire(key, int(ttl * 1000))
+        return pipeline.execute()[0]
+
+
+class CacheTier:
+    def __init__(self, backend: Cache, namespace: str, default_ttl: float = None):
+        self.backend = backend
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def key(self, *parts) -> str:
+        return ':'.join([self.namespace, *[str(part) for part in parts]])
+
+    def tenant_key(self, client_id, *parts) -> str:
+        return self.key('tenant', client_id, f"v{self.tenant_version(client_id)}", *parts)
+
+    def tenant_version(self, client_id) -> int:
+        version = self._safe(self.backend.get, self.key('tenant', client_id, 'version'))
+        return int(version) if version is not None else 0
+
+    def bump_tenant(self, client_id):
+        self._safe(self.backend.incr, self.key('tenant', client_id, 'version'))
+
+    def get(self, key: str):
+        value = self._safe(self.backend.get, key)
+        return self._decode(value)
+
+    def set(self, key: str, value, ttl: float = None):
+        self._safe(self.backend.set, key, self._encode(value), ttl=ttl or self.default_ttl)
+
+    def get_raw(self, key: str):
+        value = self._safe(self.backend.get, key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def set_raw(self, key: str, value: str, ttl: float = None):
+        self._safe(self.backend.set, key, value, ttl=ttl or self.default_ttl)
+
+    def delete(self, *keys: str):
+        self._safe(self.backend.delete, *keys)
+
+    def incr(self, key: str, ttl: float = None):
+        return self._safe(self.backend.incr, key, ttl=ttl)
+
+    def get_many(self, keys: list) -> dict:
+        values = self._safe(self.backend.get_many, list(keys)) or [None] * len(keys)
+        found = {}
+        for key, value in zip(keys, values):
+            decoded = self._decode(value)
+            if decoded is not None:
+                found[key] = decoded
+        return found
+
+    def set_many(self, mapping: dict, ttl: float = None):
+        encoded = {key: self._encode(value) for key, value in mapping.items()}
+        self._safe(self.backend.set_many, encoded, ttl=ttl or self.default_ttl)
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _decode(self, value):
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    @staticmethod
+    def _encode(value):
+        return json.dumps(value, separators=(',', ':'), default=str)
+
+    def _safe(self, operation, *args, **kwargs):
+        try:
+            return operation(*args, **kwargs)
+        except Exception as e:
+            self.errors += 1
+            LOGGER.warning(f"Cache operation {operation.__name__} failed on {self.namespace}: {e}")
+            return None
@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+from collections import deque
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenException(Exception):
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return f"Circuit breaker {self.name} is open"
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_rate_threshold: float = 0.5, minimum_calls: int = 20,
+                 window_seconds: float = 30.0, open_seconds: float = 15.0, is_failure=None):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.is_failure = is_failure or (lambda error: True)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._window = deque()
+        self._lock = threading.Lock()
+        self._counters = {'calls': 0, 'failures': 0, 'rejected': 0, 'fallbacks': 0, 'opened': 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def call(self, func, *args, fallback=None, **kwargs):
+        if not self._allow():
+            with self._lock:
+                self._counters['rejected'] += 1
+                if fallback is not None:
+                    self._counters['fallbacks'] += 1
+            if fallback is not None:
+                return fallback()
+            raise CircuitOpenException(self.name)
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._record(failed=self.is_failure(e))
+            raise
+        self._record(failed=False)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._probe_in_flight = False
+            self._window.clear()
+
+    def metrics(self):
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            failures = sum(1 for _, failed in self._window if failed)
+            return {
+                'state': self._current_state(now),
+                'window_calls': len(self._window),
+                'window_failure_rate': round(failures / len(self._window), 4) if self._window else 0.0,
+                **self._counters,
+            }
+
+    def _current_state(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def _allow(self):
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def _record(self, failed: bool):
+        with self._lock:
+            now = time.monotonic()
+            self._counters['calls'] += 1
+            if failed:
+                self._counters['failures'] += 1
+
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if failed:
+                    self._open(now)
+                else:
+                    LOGGER.info(f"Circuit breaker {self.name} closed")
+                    self._state = CLOSED
+                    self._window.clear()
+                return
+
+            self._window.append((now, failed))
+            self._trim(now)
+            if self._state == CLOSED and len(self._window) >= self.minimum_calls:
+                failures = sum(1 for _, item_failed in self._window if item_failed)
+                if failures / len(self._window) >= self.failure_rate_threshold:
+                    self._open(now)
+
+    def _open(self, now):
+        LOGGER.warning(f"Circuit breaker {self.name} opened")
+        self._state = OPEN
+        self._opened_at = now
+        self._counters['opened'] += 1
+        self._window.clear()
+
+    def _trim(self, now):
+        while self._window and now - self._window[0][0] > self.window_seconds:
+            self._window.popleft()
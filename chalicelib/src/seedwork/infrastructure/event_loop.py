@@ -0,0 +1,42 @@
+import asyncio
+import contextvars
+import threading
+
+_loop = None
+_lock = threading.Lock()
+_thread_cleanups = []
+
+
+def get_event_loop():
+    global _loop
+
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='async-execution', daemon=True).start()
+    return _loop
+
+
+async def _in_context(coroutine, context):
+    return await context.run(asyncio.ensure_future, coroutine)
+
+
+def run_sync(coroutine, timeout=None):
+    # The loop thread has its own context; run under the caller's so profiled operations and spans carry over.
+    context = contextvars.copy_context()
+    return asyncio.run_coroutine_threadsafe(_in_context(coroutine, context), get_event_loop()).result(timeout)
+
+
+def register_thread_cleanup(cleanup):
+    _thread_cleanups.append(cleanup)
+
+
+async def run_in_thread(func, *args):
+    def call():
+        try:
+            return func(*args)
+        finally:
+            for cleanup in _thread_cleanups:
+                cleanup()
+
+    return await asyncio.to_thread(call)
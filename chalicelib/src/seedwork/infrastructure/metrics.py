@@ -0,0 +1,20 @@
+import logging
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+_PROVIDERS = {}
+
+
+def register_metrics(name, provider):
+    _PROVIDERS[name] = provider
+
+
+def collect_metrics():
+    metrics = {}
+    for name, provider in _PROVIDERS.items():
+        try:
+            metrics[name] = provider()
+        except Exception as e:
+            LOGGER.error(f"Error collecting metrics for {name}: {e}")
+            metrics[name] = {'error': str(e)}
+    return metrics
@@ -0,0 +1,67 @@
+import cProfile
+import logging
+import os
+import pstats
+import re
+import time
+from contextvars import ContextVar
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+_OPERATIONS = ContextVar('profiled_operations', default=None)
+
+
+def record_operation(name: str):
+    operations = _OPERATIONS.get()
+    if operations is not None:
+        operations.append(name)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.operations = []
+        self.elapsed = 0.0
+        self.active = False
+        self._token = None
+        self._started_at = 0.0
+
+    def __enter__(self):
+        self._token = _OPERATIONS.set(self.operations)
+        self._started_at = time.perf_counter()
+        try:
+            self.profiler.enable()
+            self.active = True
+        except ValueError as e:
+            LOGGER.warning(f"Request profiling unavailable: {e}")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.active:
+            self.profiler.disable()
+        self.elapsed = time.perf_counter() - self._started_at
+        _OPERATIONS.reset(self._token)
+        return False
+
+    def top(self, limit: int = 10) -> list:
+        if not self.active:
+            return []
+        stats = pstats.Stats(self.profiler).stats
+        ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        return [
+            {
+                'function': f"{os.path.basename(filename)}:{line}({function})",
+                'calls': calls,
+                'cumulative_ms': round(cumulative * 1000, 3),
+                'own_ms': round(own * 1000, 3),
+            }
+            for (filename, line, function), (_, calls, own, cumulative, _) in ranked
+        ]
+
+    def dump(self, directory: str, label: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', '-'.join([label, *self.operations]))[:120]
+        path = os.path.join(directory, f"{int(time.time() * 1000)}-{name}.pstats")
+        self.profiler.dump_stats(path)
+        LOGGER.info(f"Wrote request profile to {path}")
+        return path
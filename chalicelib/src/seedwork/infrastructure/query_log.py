@@ -0,0 +1,148 @@
+import logging
+import re
+import threading
+import time
+
+from sqlalchemy import event
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BIND_PARAMETER = re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+")
+_VALUE_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+# EXPLAIN ANALYZE runs the statement again, so anything that locks rows or writes only gets a plain EXPLAIN.
+_SIDE_EFFECTS = re.compile(r"\b(?:FOR\s+(?:NO\s+KEY\s+)?UPDATE|FOR\s+(?:KEY\s+)?SHARE|INSERT|UPDATE|DELETE|MERGE|"
+                           r"RETURNING)\b", re.IGNORECASE)
+
+
+def normalize_statement(statement: str) -> str:
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _BIND_PARAMETER.sub('?', shape)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _VALUE_LIST.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def redact_parameters(parameters):
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return {'executemany': len(parameters)}
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = 200.0, explain: bool = False, top_n: int = 20,
+                 window_seconds: float = 900.0, max_shapes: int = 500):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.top_n = top_n
+        self.window_seconds = window_seconds
+        self.max_shapes = max_shapes
+        self.statements = 0
+        self.slow_statements = 0
+        self._shapes = {}
+        self._explained = set()
+        self._lock = threading.Lock()
+
+    def install(self, engine):
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def top(self, n: int = None):
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entries = sorted(self._shapes.values(), key=lambda entry: entry['max_ms'], reverse=True)
+        return [dict(entry) for entry in entries[:n or self.top_n]]
+
+    def metrics(self):
+        return {
+            'threshold_ms': self.threshold_ms,
+            'statements': self.statements,
+            'slow_statements': self.slow_statements,
+            'top': self.top(),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._shapes.clear()
+            self._explained.clear()
+            self.statements = 0
+            self.slow_statements = 0
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Kept on the execution context, which is discarded with the statement even when it fails.
+        if context is not None:
+            context._slow_query_log_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_slow_query_log_started', None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.statements += 1
+        if elapsed_ms < self.threshold_ms:
+            return
+
+        self.slow_statements += 1
+        shape = normalize_statement(statement)
+        redacted = redact_parameters(parameters)
+        plan = None
+        if self.explain and not executemany and shape not in self._explained \
+                and shape.lstrip('( ').upper().startswith(('SELECT', 'WITH')):
+            self._explained.add(shape)
+            plan = self._explain(conn, statement, parameters, analyze=not _SIDE_EFFECTS.search(shape))
+
+        self._record(shape, elapsed_ms, redacted, plan)
+        LOGGER.warning(f"Slow query ({elapsed_ms:.1f} ms): {shape} parameters={redacted}"
+                       + (f"\n{plan}" if plan else ""))
+
+    def _record(self, shape, elapsed_ms, redacted, plan):
+        now = time.time()
+        with self._lock:
+            entry = self._shapes.get(shape)
+            if entry is None:
+                if len(self._shapes) >= self.max_shapes:
+                    self._expire(now)
+                    if len(self._shapes) >= self.max_shapes:
+                        smallest = min(self._shapes, key=lambda key: self._shapes[key]['max_ms'])
+                        del self._shapes[smallest]
+                entry = self._shapes[shape] = {'statement': shape, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                               'parameters': redacted, 'plan': None, 'last_seen': now}
+            entry['count'] += 1
+            entry['total_ms'] = round(entry['total_ms'] + elapsed_ms, 3)
+            entry['max_ms'] = round(max(entry['max_ms'], elapsed_ms), 3)
+            entry['parameters'] = redacted
+            entry['last_seen'] = now
+            if plan:
+                entry['plan'] = plan
+
+    def _expire(self, now):
+        for shape in [shape for shape, entry in self._shapes.items()
+                      if now - entry['last_seen'] > self.window_seconds]:
+            del self._shapes[shape]
+
+    @staticmethod
+    def _explain(conn, statement, parameters, analyze=True):
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute('SAVEPOINT slow_query_explain')
+            try:
+                cursor.execute(f"{'EXPLAIN (ANALYZE, BUFFERS)' if analyze else 'EXPLAIN'} {statement}", parameters)
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+                cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+                return plan
+            except Exception as e:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                LOGGER.warning(f"Could not capture EXPLAIN for slow query: {e}")
+                return None
+        except Exception as e:
+            LOGGER.warning(f"Could not capture EXPLAIN for slow query: {e}")
+            return None
+        finally:
+            cursor.close()
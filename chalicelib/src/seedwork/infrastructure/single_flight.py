@@ -0,0 +1,132 @@
+import asyncio
+import copy
+import json
+import logging
+import threading
+from collections import Counter
+from collections.abc import Mapping
+from dataclasses import fields, is_dataclass
+
+from botocore.client import BaseClient
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+
+def _key_default(value):
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return repr(value)
+
+
+def flight_key(query):
+    if not is_dataclass(query):
+        return None
+    values = {field.name: getattr(query, field.name) for field in fields(query)}
+    values = {name: value for name, value in values.items() if not isinstance(value, BaseClient)}
+    return type(query), json.dumps(values, sort_keys=True, separators=(',', ':'), default=_key_default)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.followers = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._async_flights = {}
+        self._executions = Counter()
+        self._collapsed = Counter()
+
+    def do(self, key, func, *args, label: str = None):
+        if key is None:
+            return func(*args)
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._executions[label] += 1
+            else:
+                flight.followers += 1
+                self._collapsed[label] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = func(*args)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                followers = flight.followers
+            flight.done.set()
+
+        # Once followers share the result nobody may mutate the original, so the leader takes a copy as well.
+        return copy.deepcopy(flight.result) if followers else flight.result
+
+    async def do_async(self, key, func, *args, label: str = None):
+        if key is None:
+            return await func(*args)
+
+        loop = asyncio.get_running_loop()
+        key = (loop, key)
+        with self._lock:
+            flight = self._async_flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._async_flights[key] = _Flight()
+                flight.done = loop.create_future()
+                self._executions[label] += 1
+            else:
+                flight.followers += 1
+                self._collapsed[label] += 1
+
+        if not leader:
+            return copy.deepcopy(await asyncio.shield(flight.done))
+
+        try:
+            flight.result = await func(*args)
+        except asyncio.CancelledError:
+            flight.done.cancel()
+            raise
+        except BaseException as e:
+            flight.done.set_exception(e)
+            # Mark the exception as retrieved when no follower was waiting for it.
+            flight.done.exception()
+            raise
+        else:
+            flight.done.set_result(flight.result)
+        finally:
+            with self._lock:
+                del self._async_flights[key]
+                followers = flight.followers
+
+        return copy.deepcopy(flight.result) if followers else flight.result
+
+    def metrics(self):
+        with self._lock:
+            labels = sorted(set(self._executions) | set(self._collapsed), key=str)
+            return {
+                'in_flight': len(self._flights) + len(self._async_flights),
+                'executions': sum(self._executions.values()),
+                'collapsed': sum(self._collapsed.values()),
+                'by_query': {
+                    str(label): {'executions': self._executions[label], 'collapsed': self._collapsed[label]}
+                    for label in labels
+                },
+            }
@@ -0,0 +1,218 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from chalicelib.src.seedwork.infrastructure.query_log import normalize_statement
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+SERVICE_NAME = 'abcall-users-microservice'
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+_CURRENT_SPAN = ContextVar('current_span', default=None)
+_DISABLED = nullcontext()
+
+
+def _attribute_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Span:
+    def __init__(self, tracer, name: str, kind: int, attributes: dict):
+        parent = _CURRENT_SPAN.get()
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent.span_id if parent else ''
+        self.status = STATUS_UNSET
+        self.status_message = ''
+        self.start_time = 0
+        self.end_time = 0
+        self._token = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def start(self):
+        self.start_time = time.time_ns()
+        self._token = _CURRENT_SPAN.set(self)
+        return self
+
+    def end(self):
+        self.end_time = time.time_ns()
+        if self._token is not None:
+            try:
+                _CURRENT_SPAN.reset(self._token)
+            except ValueError:
+                # Ended from a different context than the one that started it, e.g. a botocore callback.
+                pass
+        self.tracer.exporter.export(self, root=not self.parent_span_id)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_value is not None:
+            self.record_error(exc_value)
+        self.end()
+        return False
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_time),
+            'endTimeUnixNano': str(self.end_time),
+            'attributes': [{'key': key, 'value': _attribute_value(value)}
+                           for key, value in self.attributes.items() if value is not None],
+            'status': {'code': self.status, 'message': self.status_message} if self.status else {'code': self.status},
+        }
+        if self.parent_span_id:
+            span['parentSpanId'] = self.parent_span_id
+        return span
+
+
+class JsonLinesExporter:
+    def __init__(self, destination: str = 'stdout', batch_size: int = 100):
+        self.destination = destination
+        self.batch_size = batch_size
+        self.exported = 0
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span, root: bool = False):
+        with self._lock:
+            self._pending.append(span)
+            if not root and len(self._pending) < self.batch_size:
+                return
+            batch, self._pending = self._pending, []
+        self._write(batch)
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._write(batch)
+
+    def _write(self, spans):
+        line = json.dumps({
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+                'scopeSpans': [{'scope': {'name': SERVICE_NAME}, 'spans': [span.to_otlp() for span in spans]}],
+            }]
+        }, separators=(',', ':'))
+        try:
+            if self.destination == 'stdout':
+                sys.stdout.write(line + '\n')
+                sys.stdout.flush()
+            else:
+                with open(self.destination, 'a', encoding='utf-8') as output:
+                    output.write(line + '\n')
+            self.exported += len(spans)
+        except OSError as e:
+            LOGGER.warning(f"Could not export {len(spans)} spans to {self.destination}: {e}")
+
+
+class Tracer:
+    def __init__(self, enabled: bool = False, exporter: JsonLinesExporter = None):
+        self.enabled = enabled
+        self.exporter = exporter or JsonLinesExporter()
+
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+        if not self.enabled:
+            return _DISABLED
+        return Span(self, name, kind, attributes)
+
+    def install_sqlalchemy(self, engine):
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(engine, 'handle_error', self._handle_error)
+
+    def install_botocore(self, client):
+        client.meta.events.register('before-call.*.*', self._before_call)
+        client.meta.events.register('after-call.*.*', self._after_call)
+        client.meta.events.register('after-call-error.*.*', self._after_call_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.enabled and context is not None:
+            shape = normalize_statement(statement)
+            context._trace_span = Span(self, f"db {shape.split(' ', 1)[0].upper()}", SPAN_KIND_CLIENT, {
+                'db.system': conn.dialect.name,
+                'db.statement': shape[:1000],
+                'db.executemany': executemany,
+            }).start()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, '_trace_span', None)
+        if span is not None:
+            context._trace_span = None
+            span.set_attribute('db.rows', cursor.rowcount)
+            span.end()
+
+    def _handle_error(self, exception_context):
+        context = exception_context.execution_context
+        span = getattr(context, '_trace_span', None)
+        if span is not None:
+            context._trace_span = None
+            span.record_error(exception_context.original_exception)
+            span.end()
+
+    def _before_call(self, model, context, **kwargs):
+        if self.enabled:
+            context['trace_span'] = Span(self, f"{model.service_model.service_name} {model.name}", SPAN_KIND_CLIENT, {
+                'rpc.system': 'aws-api',
+                'rpc.service': model.service_model.service_id,
+                'rpc.method': model.name,
+            }).start()
+
+    def _after_call(self, http_response, context, **kwargs):
+        span = context.pop('trace_span', None)
+        if span is not None:
+            span.set_attribute('http.status_code', http_response.status_code)
+            if http_response.status_code >= 400:
+                span.status = STATUS_ERROR
+            span.end()
+
+    def _after_call_error(self, exception, context, **kwargs):
+        span = context.pop('trace_span', None)
+        if span is not None:
+            span.record_error(exception)
+            span.end()
+
+
+def _build_exporter():
+    return JsonLinesExporter(destination=os.getenv('TRACING_EXPORT', 'stdout'),
+                             batch_size=int(os.getenv('TRACING_BATCH_SIZE', '100')))
+
+
+TRACER = Tracer(enabled=os.getenv('TRACING_ENABLED', 'false').lower() == 'true', exporter=_build_exporter())
+
+
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    return TRACER.span(name, kind, **attributes)
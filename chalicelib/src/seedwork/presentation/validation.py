@@ -0,0 +1,54 @@
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from chalicelib.src.seedwork.domain.exceptions import ValidationException
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    name: str
+    required: bool = True
+    choices: Optional[tuple] = None
+    pattern: Optional[re.Pattern] = None
+    pattern_message: Optional[str] = None
+
+
+class Validator:
+    def __init__(self, rules):
+        self._rules = tuple(
+            (rule.name,
+             rule.required,
+             frozenset(rule.choices) if rule.choices is not None else None,
+             f"Invalid '{rule.name}' value. Must be one of {list(rule.choices)}" if rule.choices is not None else None,
+             rule.pattern.match if rule.pattern is not None else None,
+             rule.pattern_message or f"Invalid {rule.name} format")
+            for rule in rules
+        )
+
+    def errors(self, payload, partial=False) -> list:
+        if not isinstance(payload, dict):
+            return ["Request body must be a JSON object"]
+
+        errors = []
+        for name, required, choices, choices_message, match, pattern_message in self._rules:
+            if name not in payload:
+                if required and not partial:
+                    errors.append(f"Missing required field: {name}")
+                continue
+
+            value = payload[name]
+            if choices is not None and not (isinstance(value, str) and value in choices):
+                errors.append(choices_message)
+            elif match is not None and not (isinstance(value, str) and match(value)):
+                errors.append(pattern_message)
+        return errors
+
+    def validate(self, payload, partial=False):
+        errors = self.errors(payload, partial=partial)
+        if errors:
+            raise ValidationException(errors)
+        return payload
+
+    def validate_many(self, payloads, partial=False) -> list:
+        return [self.errors(payload, partial=partial) for payload in payloads]
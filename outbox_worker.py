@@ -0,0 +1,31 @@
+import argparse
+import logging
+import time
+
+from app import drain_outbox
+
+LOGGER = logging.getLogger('abcall-users-microservice')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drain the Cognito outbox locally.')
+    parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when the outbox is empty')
+    parser.add_argument('--once', action='store_true', help='Drain a single round and exit')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    while True:
+        try:
+            totals = drain_outbox()
+            LOGGER.info(f"Cognito outbox drain finished: {totals}")
+        except Exception as e:
+            LOGGER.error(f"Error draining Cognito outbox: {str(e)}")
+            totals = {'claimed': 0}
+        if args.once:
+            break
+        if not totals['claimed']:
+            time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
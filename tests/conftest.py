@@ -0,0 +1,22 @@
+import pytest
+
+from chalicelib.src.modules.infrastructure.cache import NEGATIVE_COGNITO_CACHE, NEGATIVE_USER_CACHE, PROFILE_CACHE
+from chalicelib.src.seedwork.infrastructure.admission import ADMISSION
+
+CACHES = [PROFILE_CACHE, NEGATIVE_USER_CACHE, NEGATIVE_COGNITO_CACHE]
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for cache in CACHES:
+        cache.clear()
+    yield
+    for cache in CACHES:
+        cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def unlimited_admission():
+    ADMISSION.configure()
+    yield
+    ADMISSION.configure()
@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from chalicelib.src.seedwork.infrastructure.admission import AdmissionController, AdmissionRejectedException, \
+    ConcurrencyLimiter, SharedWindowLimiter, TokenBucket, POSTGRES
+from chalicelib.src.seedwork.infrastructure.cache import CacheTier, InMemoryCache
+
+
+def test_token_bucket_refills_per_key():
+    bucket = TokenBucket(rate=1, burst=2)
+
+    assert bucket.acquire('2') == 0
+    assert bucket.acquire('2') == 0
+    assert 0 < bucket.acquire('2') <= 1
+    assert bucket.acquire('3') == 0
+
+
+def test_shared_window_limiter_counts_in_cache():
+    limiter = SharedWindowLimiter(CacheTier(InMemoryCache(), namespace='test'), rate=2, burst=2)
+
+    assert limiter.acquire('2') == 0
+    assert limiter.acquire('2') == 0
+    assert limiter.acquire('2') > 0
+
+
+def test_blocking_backend_acquire_waits_for_a_slot():
+    controller = AdmissionController()
+    controller.configure(backend_limiters={POSTGRES: ConcurrencyLimiter(1)})
+    acquired = controller.acquire_backends((POSTGRES,))
+    threading.Timer(0.05, controller.release_backends, args=(acquired,)).start()
+
+    with controller.backends((POSTGRES,), block=True):
+        pass
+    assert controller.metrics()['rejected'] == 0
+
+
+def test_blocking_backend_acquire_gives_up_after_block_seconds():
+    controller = AdmissionController()
+    controller.configure(backend_limiters={POSTGRES: ConcurrencyLimiter(1, block_seconds=0.05)})
+
+    with controller.backends((POSTGRES,)):
+        with pytest.raises(AdmissionRejectedException):
+            with controller.backends((POSTGRES,), block=True):
+                pass
+    assert controller.metrics()['rejections'] == {'backend_concurrency': 1}
+
+
+def test_admission_rejects_saturated_backend_and_releases():
+    controller = AdmissionController()
+    controller.configure(backend_limiters={POSTGRES: ConcurrencyLimiter(1)})
+
+    with controller.backends((POSTGRES,)):
+        with pytest.raises(AdmissionRejectedException) as e:
+            with controller.backends((POSTGRES,)):
+                pass
+    assert e.value.retry_after_seconds == 1
+
+    with controller.backends((POSTGRES,)):
+        pass
+    assert controller.metrics()['rejections'] == {'backend_concurrency': 1}
+    assert controller.metrics()['backends_in_flight'] == {POSTGRES: 0}
+
+
+def test_admission_limits_tenant_concurrency():
+    controller = AdmissionController()
+    controller.configure(tenant_limiter=ConcurrencyLimiter(1))
+
+    with controller.tenant('2'):
+        with controller.tenant(None):
+            pass
+        with pytest.raises(AdmissionRejectedException):
+            with controller.tenant('2'):
+                pass
+        with controller.tenant('3'):
+            pass
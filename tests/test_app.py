@@ -2,7 +2,10 @@ from unittest import mock
 from unittest.mock import patch, MagicMock
 from chalice.test import Client
 from app import app
+from chalicelib.src.modules.application.services.idempotency import IdempotencyService, request_fingerprint
+from chalicelib.src.modules.infrastructure.dto import IdempotencyStatus
 from botocore.exceptions import ClientError
+import base64
 import json
 
 def test_get_users():
@@ -117,7 +120,8 @@ def test_update_user():
 
                 response_data = json.loads(response.body)
                 assert response_data == {'status': 'success'}
-                mock_update.assert_called_once_with('72c16f9f-5f13-439b-bf09-7440edd16086', request_body)
+                mock_update.assert_called_once_with('72c16f9f-5f13-439b-bf09-7440edd16086', request_body,
+                                                    sync_cognito=True)
 
 
 def test_create_user():
@@ -362,6 +366,21 @@ def test_update_me_invalid_document_type():
             # assert "Invalid 'document_type'" in response_data['message']
 
 
+def test_update_me_cannot_change_role_or_tenant():
+    claims = base64.urlsafe_b64encode(json.dumps({'sub': 'user123', 'cognito:username': 'user'}).encode()).decode()
+
+    with patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.update') as mock_update:
+        with Client(app) as client:
+            response = client.http.put(
+                '/user/me',
+                headers={'Content-Type': 'application/json', 'Authorization': f"header.{claims.rstrip('=')}.signature"},
+                body=json.dumps({"name": "John", "user_role": "Superadmin", "client_id": 9})
+            )
+
+    assert response.status_code == 400
+    mock_update.assert_not_called()
+
+
 def test_register_success():
     # Mock input data for the endpoint
     request_body = {
@@ -440,3 +459,534 @@ def test_register_success():
                     assert response_data['status'] == "ok"
                     assert response_data['message'] == "User created successfully"
                     assert response_data['cognito_user_sub'] == "user-sub-12345"
+
+
+def test_get_user_stats():
+    mock_stats = {
+        "client_id": "2",
+        "total": 3,
+        "user_role": {"Superadmin": 0, "Admin": 1, "Agent": 0, "Regular": 2},
+        "document_type": {"Cedula": 3, "Passport": 0, "Cedula_Extranjeria": 0},
+        "communication_type": {"Email": 2, "Telefono": 0, "Sms": 1, "Chat": 0}
+    }
+
+    with patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get_stats',
+               return_value=mock_stats) as mock_get_stats:
+        with Client(app) as client:
+            response = client.http.get('/users/2/stats?source=counters')
+
+            assert response.status_code == 200
+            assert json.loads(response.body) == mock_stats
+            mock_get_stats.assert_called_once_with('2', from_counters=True)
+
+
+def test_get_user_stats_invalid_source():
+    with Client(app) as client:
+        response = client.http.get('/users/2/stats?source=cache')
+
+        assert response.status_code == 400
+
+
+def test_create_user_idempotent_replay():
+    request_body = {
+        "client_id": 2,
+        "document_type": "Cedula",
+        "user_role": "Admin",
+        "id_number": "123456",
+        "name": "John",
+        "last_name": "Doe",
+        "email": "john.doe@example.com",
+        "cellphone": "1234567890",
+        "password": "temporaryPassword123",
+        "communication_type": "Email"
+    }
+    stored_response = {'status': "ok", 'message': "User created successfully", 'cognito_user_sub': 'user-sub-12345'}
+    stored_record = MagicMock()
+    stored_record.request_hash = request_fingerprint(request_body)
+    stored_record.status = IdempotencyStatus.COMPLETED
+    stored_record.response_body = stored_response
+    mock_cognito_client = MagicMock()
+
+    with patch('app.get_cognito_client', return_value=mock_cognito_client):
+        with patch('chalicelib.src.modules.infrastructure.idempotency_repository.IdempotencyRepositoryPostgres.begin',
+                   return_value=False):
+            with patch('chalicelib.src.modules.infrastructure.idempotency_repository.IdempotencyRepositoryPostgres.get',
+                       return_value=stored_record):
+                with Client(app) as client:
+                    response = client.http.post(
+                        '/user',
+                        headers={'Content-Type': 'application/json', 'Idempotency-Key': 'retry-1'},
+                        body=json.dumps(request_body)
+                    )
+
+                    assert response.status_code == 200
+                    assert json.loads(response.body) == stored_response
+                    mock_cognito_client.admin_create_user.assert_not_called()
+
+
+def test_create_user_idempotency_key_reused():
+    stored_record = MagicMock()
+    stored_record.request_hash = 'another-payload'
+    stored_record.status = IdempotencyStatus.COMPLETED
+
+    with patch('chalicelib.src.modules.infrastructure.idempotency_repository.IdempotencyRepositoryPostgres.begin',
+               return_value=False):
+        with patch('chalicelib.src.modules.infrastructure.idempotency_repository.IdempotencyRepositoryPostgres.get',
+                   return_value=stored_record):
+            with Client(app) as client:
+                response = client.http.post(
+                    '/user/register',
+                    headers={'Content-Type': 'application/json', 'Idempotency-Key': 'retry-1'},
+                    body=json.dumps({"email": "john.doe@example.com"})
+                )
+
+                assert response.status_code == 422
+
+
+def test_metrics():
+    with Client(app) as client:
+        response = client.http.get('/metrics')
+
+        assert response.status_code == 200
+        response_data = json.loads(response.body)
+        assert response_data['cognito_circuit_breaker']['state'] == 'closed'
+
+
+def test_get_current_user_is_cached_until_update():
+    mock_context = {
+        'authorizer': {
+            'claims': {
+                'sub': 'user123',
+                'email': 'user@example.com',
+                'custom:custom:userRole': 'admin'
+            }
+        }
+    }
+
+    mock_request = MagicMock()
+    mock_request.context = mock_context
+    mock_request.json_body = {"name": "Jane"}
+    mock_request.headers = {
+        'Content-Type': 'application/json'
+    }
+
+    mock_user = {"id": 1, "name": "John", "user_role": "Admin", "client_id": 2}
+
+    with patch('chalice.app.Request', return_value=mock_request):
+        with patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get',
+                   return_value=mock_user) as mock_get:
+            with patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.update'):
+                with Client(app) as client:
+                    for _ in range(3):
+                        response = client.http.get('/user/me')
+                        assert json.loads(response.body)['user_role'] == 'admin'
+                    assert mock_get.call_count == 1
+
+                    client.http.put('/user/me', headers={'Content-Type': 'application/json'},
+                                    body=json.dumps(mock_request.json_body))
+                    client.http.get('/user/me')
+                    assert mock_get.call_count == 2
+
+
+def test_warmup():
+    with patch('chalicelib.src.config.warmup._warm_database') as warm_database:
+        with Client(app) as client:
+            response = client.http.get('/warmup')
+
+            assert response.status_code == 200
+            response_data = json.loads(response.body)
+            assert response_data['warm'] is True
+            assert set(response_data['timings_ms']) >= {'database', 'total'}
+            warm_database.assert_called_once()
+
+
+def test_users_batch_get():
+    mock_users = {
+        "sub-2": {"id": 2, "name": "Jane", "cognito_user_sub": "sub-2", "client_id": 2},
+        "sub-1": {"id": 1, "name": "John", "cognito_user_sub": "sub-1", "client_id": 2},
+    }
+    mock_cognito_client = MagicMock()
+    mock_cognito_client.admin_get_user.side_effect = lambda UserPoolId, Username: {
+        "Username": Username,
+        "UserAttributes": [{"Name": "email", "Value": f"{Username}@example.com"}]
+    }
+
+    with patch('app.get_cognito_client', return_value=mock_cognito_client):
+        with patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get_many',
+                   return_value=mock_users) as mock_get_many:
+            with Client(app) as client:
+                response = client.http.post(
+                    '/users/batch-get',
+                    headers={'Content-Type': 'application/json'},
+                    body=json.dumps({"user_subs": ["sub-1", "dead-sub", "sub-2", "sub-1"]})
+                )
+
+                assert response.status_code == 200
+                response_data = json.loads(response.body)
+                assert [user['cognito_user_sub'] for user in response_data['users']] == ['sub-1', 'sub-2']
+                assert response_data['users'][0]['email'] == 'sub-1@example.com'
+                assert response_data['missing'] == ['dead-sub']
+                mock_get_many.assert_called_once_with(['sub-1', 'dead-sub', 'sub-2'])
+                assert mock_cognito_client.admin_get_user.call_count == 2
+
+
+def test_users_batch_get_too_many_subs():
+    with Client(app) as client:
+        response = client.http.post(
+            '/users/batch-get',
+            headers={'Content-Type': 'application/json'},
+            body=json.dumps({"user_subs": [f"sub-{index}" for index in range(101)]})
+        )
+
+        assert response.status_code == 400
+
+
+def test_get_user_changes():
+    mock_changes = [
+        {"id": 4, "cognito_user_sub": "sub-4", "client_id": 2, "updated_at": "2024-11-02T10:00:00.125000+00:00",
+         "deleted_at": None},
+        {"id": 7, "cognito_user_sub": "sub-7", "client_id": 2, "updated_at": "2024-11-02T10:00:01+00:00",
+         "deleted_at": "2024-11-02T10:00:01+00:00"},
+    ]
+
+    with patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get_changes',
+               return_value=(mock_changes, True)) as mock_get_changes:
+        with Client(app) as client:
+            response = client.http.get('/users/changes?client_id=2&limit=2')
+
+            assert response.status_code == 200
+            response_data = json.loads(response.body)
+            assert response_data['changes'] == mock_changes
+            assert response_data['has_more'] is True
+            mock_get_changes.assert_called_once_with('2', since=None, limit=2)
+
+            response = client.http.get(f"/users/changes?client_id=2&since={response_data['next_cursor']}")
+
+            assert response.status_code == 200
+            since = mock_get_changes.call_args.kwargs['since']
+            assert since[0].isoformat() == "2024-11-02T10:00:01+00:00"
+            assert since[1] == 7
+
+
+def test_get_user_changes_invalid_cursor():
+    with Client(app) as client:
+        response = client.http.get('/users/changes?client_id=2&since=not-a-cursor')
+
+        assert response.status_code == 400
+
+
+def test_get_user_changes_cursor_older_than_purge_grace_requires_resync():
+    from datetime import datetime, timedelta, timezone
+    from chalicelib.src.modules.application.queries.get_user_changes import encode_cursor
+
+    issued_at = datetime.now(timezone.utc) - timedelta(seconds=120)
+    cursor = encode_cursor("2024-11-02T10:00:01+00:00", 7, issued_at)
+    legacy_cursor = base64.urlsafe_b64encode(b'["2024-11-02T10:00:01+00:00",7]').decode('ascii')
+
+    with patch('app.PURGE_GRACE_SECONDS', 60), \
+            patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get_changes',
+                  return_value=([], False)) as mock_get_changes:
+        with Client(app) as client:
+            expired = client.http.get(f"/users/changes?client_id=2&since={cursor}")
+            legacy = client.http.get(f"/users/changes?client_id=2&since={legacy_cursor}")
+
+            assert expired.status_code == 410
+            assert json.loads(expired.body)['error'] == 'resync'
+            assert legacy.status_code == 410
+            mock_get_changes.assert_not_called()
+
+    with patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get_changes',
+               return_value=([], False)):
+        with Client(app) as client:
+            response = client.http.get(f"/users/changes?client_id=2&since={cursor}")
+
+            assert response.status_code == 200
+            # An empty page re-issues the cursor so a caught-up client does not age out.
+            assert json.loads(response.body)['next_cursor'] != cursor
+
+
+def test_get_users_response_cache_invalidated_by_update():
+    from chalicelib.src.modules.infrastructure.cache import SHARED_CACHE
+    from chalicelib.src.seedwork.infrastructure.cache import InMemoryCache
+
+    mock_users = [{"id": 1, "name": "John", "cognito_user_sub": "sub-1", "client_id": 2}]
+    updated = {'previous': {**mock_users[0]}, 'current': {**mock_users[0], 'name': 'Jane'}}
+
+    with patch.object(SHARED_CACHE, 'backend', InMemoryCache()):
+        with patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get_all',
+                   return_value=mock_users) as mock_get_all:
+            with patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.update',
+                       return_value=updated):
+                with Client(app) as client:
+                    first = client.http.get('/users/2')
+                    second = client.http.get('/users/2')
+
+                    assert first.body == second.body
+                    assert json.loads(second.body) == mock_users
+                    assert mock_get_all.call_count == 1
+
+                    client.http.put('/user/sub-1', headers={'Content-Type': 'application/json'},
+                                    body=json.dumps({"name": "Jane"}))
+                    client.http.get('/users/2')
+
+                    assert mock_get_all.call_count == 2
+
+
+def test_get_user_stats_rate_limited():
+    from chalicelib.src.seedwork.infrastructure.admission import ADMISSION, TokenBucket
+
+    with patch.object(ADMISSION, 'rate_limiter', TokenBucket(rate=0.5, burst=1)):
+        with patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get_stats',
+                   return_value={'total': 1}):
+            with Client(app) as client:
+                first = client.http.get('/users/2/stats')
+                second = client.http.get('/users/2/stats')
+                other_tenant = client.http.get('/users/3/stats')
+
+                assert first.status_code == 200
+                assert second.status_code == 429
+                assert second.headers['Retry-After'] == '2'
+                assert other_tenant.status_code == 200
+
+
+def test_provision_users_reports_partial_batch_failures():
+    valid_user = {"client_id": "2", "document_type": "Cedula", "user_role": "Regular", "id_number": "123",
+                  "name": "Jane", "last_name": "Doe", "email": "jane@example.com", "cellphone": "300",
+                  "password": "Secret123!", "communication_type": "Email"}
+    failing_user = {**valid_user, "email": "taken@example.com"}
+
+    def cognito_add(entity):
+        if entity["email"] == "taken@example.com":
+            raise RuntimeError("UsernameExistsException")
+        return {'User': {'Attributes': [{'Name': 'sub', 'Value': 'sub-jane'}]}}
+
+    with patch('app.get_cognito_client', return_value=MagicMock()), \
+            patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.add',
+                  side_effect=cognito_add), \
+            patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.add_many',
+                  return_value={}) as mock_add_many:
+        with Client(app) as client:
+            event = client.events.generate_sqs_event(
+                message_bodies=[json.dumps(valid_user), json.dumps(failing_user), json.dumps({"name": "x"})])
+            for index, record in enumerate(event['Records']):
+                record['messageId'] = f"message-{index}"
+
+            response = client.lambda_.invoke('provision_users', event)
+
+            assert response.payload == {'batchItemFailures': [{'itemIdentifier': 'message-2'},
+                                                              {'itemIdentifier': 'message-1'}]}
+            mock_add_many.assert_called_once()
+            assert [user.cognito_user_sub for user in mock_add_many.call_args.args[0]] == ['sub-jane']
+
+
+def test_provision_users_discards_cognito_user_when_insert_fails():
+    user = {"client_id": "2", "document_type": "Cedula", "user_role": "Regular", "id_number": "123",
+            "name": "Jane", "last_name": "Doe", "email": "jane@example.com", "cellphone": "300",
+            "password": "Secret123!", "communication_type": "Email"}
+
+    with patch('app.get_cognito_client', return_value=MagicMock()), \
+            patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.add',
+                  return_value={'User': {'Attributes': [{'Name': 'sub', 'Value': 'sub-jane'}]}}), \
+            patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.remove') \
+            as mock_remove, \
+            patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.add_many',
+                  side_effect=ValueError("duplicate")), \
+            patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.add',
+                  side_effect=ValueError("duplicate")):
+        with Client(app) as client:
+            response = client.lambda_.invoke('provision_users',
+                                             client.events.generate_sqs_event(message_bodies=[json.dumps(user)]))
+
+            assert response.payload == {'batchItemFailures': [{'itemIdentifier': 'message-id'}]}
+            mock_remove.assert_called_once_with('sub-jane')
+
+
+def test_provision_users_redelivery_reuses_existing_cognito_users():
+    user = {"client_id": "2", "document_type": "Cedula", "user_role": "Regular", "id_number": "123",
+            "name": "Jane", "last_name": "Doe", "email": "jane@example.com", "cellphone": "300",
+            "password": "Secret123!", "communication_type": "Email"}
+    inserted_user = {**user, "email": "john@example.com"}
+    username_exists = ClientError({'Error': {'Code': 'UsernameExistsException'}}, 'admin_create_user')
+    subs = {"jane@example.com": "sub-jane", "john@example.com": "sub-john"}
+
+    with patch('app.get_cognito_client', return_value=MagicMock()), \
+            patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.add',
+                  side_effect=username_exists), \
+            patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.get') as mock_get, \
+            patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.get_by_username',
+                  side_effect=lambda email: {'UserAttributes': _cognito_attributes(subs[email], "2", "Regular")}), \
+            patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.remove') \
+            as mock_remove, \
+            patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get_many',
+                  return_value={'sub-john': {'cognito_user_sub': 'sub-john'}}), \
+            patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.add_many',
+                  return_value={}) as mock_add_many:
+        with Client(app) as client:
+            event = client.events.generate_sqs_event(message_bodies=[json.dumps(user), json.dumps(inserted_user)])
+            for index, record in enumerate(event['Records']):
+                record['messageId'] = f"message-{index}"
+
+            response = client.lambda_.invoke('provision_users', event)
+
+            assert response.payload == {'batchItemFailures': []}
+            assert [user.cognito_user_sub for user in mock_add_many.call_args.args[0]] == ['sub-jane']
+            mock_remove.assert_not_called()
+            mock_get.assert_not_called()
+
+
+def test_provision_users_does_not_link_existing_cognito_user_of_another_tenant():
+    user = {"client_id": "2", "document_type": "Cedula", "user_role": "Regular", "id_number": "123",
+            "name": "Jane", "last_name": "Doe", "email": "jane@example.com", "cellphone": "300",
+            "password": "Secret123!", "communication_type": "Email"}
+    username_exists = ClientError({'Error': {'Code': 'UsernameExistsException'}}, 'admin_create_user')
+
+    with patch('app.get_cognito_client', return_value=MagicMock()), \
+            patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.add',
+                  side_effect=username_exists), \
+            patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.get_by_username',
+                  return_value={'UserAttributes': _cognito_attributes("sub-jane", "7", "Admin")}), \
+            patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get_many') as mock_get_many, \
+            patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.add_many') as mock_add_many:
+        with Client(app) as client:
+            event = client.events.generate_sqs_event(message_bodies=[json.dumps(user)])
+            event['Records'][0]['messageId'] = "message-0"
+
+            response = client.lambda_.invoke('provision_users', event)
+
+            assert response.payload == {'batchItemFailures': [{'itemIdentifier': 'message-0'}]}
+            mock_get_many.assert_not_called()
+            mock_add_many.assert_not_called()
+
+
+def _cognito_attributes(user_sub, client_id, user_role):
+    return [{'Name': 'sub', 'Value': user_sub},
+            {'Name': 'custom:client_id', 'Value': client_id},
+            {'Name': 'custom:custom:userRole', 'Value': user_role}]
+
+
+def test_get_users_passes_database_json_through():
+    encoded = '[{"document_type":"Cedula","id":1,"name":"John","client_id":2}]'
+
+    with patch('app.USERS_JSON_AGGREGATION', True), \
+            patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get_all_json',
+                  return_value=encoded) as mock_get_all_json, \
+            patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get_all') as mock_get_all:
+        with Client(app) as client:
+            response = client.http.get('/users/2')
+
+            assert response.status_code == 200
+            assert response.body.decode('utf-8') == encoded
+            mock_get_all_json.assert_called_once_with({'client_id': '2'})
+            mock_get_all.assert_not_called()
+
+
+def test_profile_request_reports_operations(tmp_path):
+    with patch('app.PROFILING_ENABLED', True), patch('app.PROFILE_DIR', str(tmp_path)), \
+            patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get_stats',
+                  return_value={'total': 1}):
+        with Client(app) as client:
+            plain = client.http.get('/users/4/stats')
+            profiled = client.http.get('/users/4/stats', headers={'X-Profile': 'file'})
+
+            assert 'X-Profile-Stats' not in plain.headers
+            assert profiled.status_code == 200
+            assert profiled.headers['X-Profile-Operations'] == 'GetUserStatsQuery'
+            assert 'user_stats' in profiled.headers['X-Profile-Stats']
+            assert profiled.headers['X-Profile-File'].startswith(str(tmp_path))
+
+
+def test_create_user_is_admitted_once_per_request():
+    from chalicelib.src.seedwork.infrastructure.admission import ADMISSION, TokenBucket
+
+    request_body = {"client_id": 2, "document_type": "Cedula", "user_role": "Admin", "id_number": "123456",
+                    "name": "John", "last_name": "Doe", "email": "john.doe@example.com", "cellphone": "1234567890",
+                    "password": "temporaryPassword123", "communication_type": "Email"}
+    mock_cognito_user = {'User': {'Attributes': [{'Name': 'sub', 'Value': 'sub-john'}]}}
+
+    with patch.object(ADMISSION, 'rate_limiter', TokenBucket(rate=0.001, burst=1)), \
+            patch('app.get_cognito_client', return_value=MagicMock()), \
+            patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.add',
+                  return_value=mock_cognito_user) as mock_cognito_add, \
+            patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.add') as mock_add:
+        with Client(app) as client:
+            first = client.http.post('/user', headers={'Content-Type': 'application/json'},
+                                     body=json.dumps(request_body))
+            second = client.http.post('/user', headers={'Content-Type': 'application/json'},
+                                      body=json.dumps(request_body))
+
+            assert first.status_code == 200
+            mock_add.assert_called_once()
+            assert second.status_code == 429
+            assert 'Retry-After' in second.headers
+            assert mock_cognito_add.call_count == 1
+
+
+def test_get_users_without_known_filter_is_rejected():
+    session = MagicMock()
+    with patch('chalicelib.src.modules.infrastructure.repository.init_db', return_value=session):
+        with Client(app) as client:
+            response = client.http.get('/users?foo=bar')
+
+    assert response.status_code == 400
+    session.execute.assert_not_called()
+
+
+def test_request_fingerprint_leaves_out_password():
+    request_body = {"email": "john.doe@example.com", "password": "temporaryPassword123"}
+
+    assert request_fingerprint(request_body) == request_fingerprint({**request_body, "password": "another"})
+    assert request_fingerprint(request_body) != request_fingerprint({**request_body, "email": "jane@example.com"})
+
+
+def test_create_user_idempotency_key_is_scoped_to_caller():
+    claims = base64.urlsafe_b64encode(json.dumps({'sub': 'caller-1', 'cognito:username': 'caller'}).encode()).decode()
+    stored_record = MagicMock()
+    stored_record.request_hash = request_fingerprint({"email": "john.doe@example.com"})
+    stored_record.status = IdempotencyStatus.COMPLETED
+    stored_record.response_body = {'status': "ok"}
+
+    with patch('chalicelib.src.modules.infrastructure.idempotency_repository.IdempotencyRepositoryPostgres.begin',
+               return_value=False) as begin:
+        with patch('chalicelib.src.modules.infrastructure.idempotency_repository.IdempotencyRepositoryPostgres.get',
+                   return_value=stored_record) as get:
+            with Client(app) as client:
+                response = client.http.post(
+                    '/user',
+                    headers={'Content-Type': 'application/json', 'Idempotency-Key': 'retry-1',
+                             'Authorization': f"header.{claims.rstrip('=')}.signature"},
+                    body=json.dumps({"email": "john.doe@example.com"})
+                )
+
+    assert response.status_code == 200
+    assert begin.call_args.args[0] == 'user_post:caller-1'
+    get.assert_called_with(('user_post:caller-1', 'retry-1'))
+
+
+def test_idempotency_waits_for_a_record_removed_mid_flight():
+    with patch('chalicelib.src.modules.infrastructure.idempotency_repository.IdempotencyRepositoryPostgres.begin',
+               side_effect=[False, True]), \
+            patch('chalicelib.src.modules.infrastructure.idempotency_repository.IdempotencyRepositoryPostgres.get',
+                  return_value=None), \
+            patch('chalicelib.src.modules.infrastructure.idempotency_repository.IdempotencyRepositoryPostgres.complete'), \
+            patch('chalicelib.src.modules.application.services.idempotency.time.sleep') as sleep:
+        response = IdempotencyService().run('register', 'retry-1', {}, lambda: {'status': "ok"})
+
+    assert response == {'status': "ok"}
+    sleep.assert_called_once()
+
+
+def test_update_user_rejected_by_saturated_backend_returns_429():
+    from chalicelib.src.seedwork.infrastructure.admission import ADMISSION, ConcurrencyLimiter, POSTGRES
+
+    limiter = ConcurrencyLimiter(1, block_seconds=0.01)
+    with patch.object(ADMISSION, 'backend_limiters', {POSTGRES: limiter}), \
+            patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.update') as mock_update:
+        limiter.acquire(POSTGRES)
+        with Client(app) as client:
+            response = client.http.put('/user/sub-1', headers={'Content-Type': 'application/json'},
+                                       body=json.dumps({"name": "Jane"}))
+        limiter.release(POSTGRES)
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    mock_update.assert_not_called()
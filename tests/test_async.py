@@ -0,0 +1,76 @@
+import json
+import threading
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from chalice.test import Client
+
+from app import app
+from chalicelib.src.modules.application.queries.get_user_stats import GetUserStatsQuery
+from chalicelib.src.modules.application.commands.delete_user import DeleteUserCommand
+from chalicelib.src.seedwork.application.commands import execute_command_async
+from chalicelib.src.seedwork.application.queries import execute_query_async
+from chalicelib.src.seedwork.infrastructure.event_loop import run_in_thread, run_sync
+from chalicelib.src.seedwork.infrastructure.profiling import RequestProfile, record_operation
+from chalicelib.src.seedwork.infrastructure.tracing import Tracer
+
+
+def test_get_user_async_execution():
+    mock_user = {"id": 1, "name": "John", "cognito_user_sub": "sub-1", "client_id": 2}
+    mock_cognito_user = {"Username": "sub-1", "UserAttributes": [{"Name": "email", "Value": "john@example.com"}]}
+
+    with patch('app.ASYNC_EXECUTION', True), \
+            patch('chalicelib.src.modules.infrastructure.async_repository.init_async_db'), \
+            patch('chalicelib.src.modules.infrastructure.async_repository.UserRepositoryPostgresAsync.get',
+                  new_callable=AsyncMock, return_value=dict(mock_user)) as mock_get, \
+            patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.get',
+                  return_value=mock_cognito_user):
+        with Client(app) as client:
+            response = client.http.get('/user/sub-1')
+
+            assert response.status_code == 200
+            assert json.loads(response.body) == {**mock_user, 'email': 'john@example.com'}
+            mock_get.assert_awaited_once_with('sub-1')
+
+
+def test_async_query_handler():
+    stats = {'client_id': '2', 'total': 1}
+
+    with patch('chalicelib.src.modules.infrastructure.async_repository.init_async_db'), \
+            patch('chalicelib.src.modules.infrastructure.async_repository.UserRepositoryPostgresAsync.get_stats',
+                  new_callable=AsyncMock, return_value=stats):
+        result = run_sync(execute_query_async(GetUserStatsQuery(client_id='2')))
+
+    assert result.result == stats
+
+
+def test_async_command_falls_back_to_sync_handler():
+    with patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.remove',
+               return_value={'client_id': 2}) as mock_remove:
+        run_sync(execute_command_async(DeleteUserCommand(cognito_user_sub='sub-1')))
+
+    mock_remove.assert_called_once_with('sub-1')
+
+
+def test_run_in_thread_cleans_up_the_worker_thread():
+    cleaned_up = []
+    with patch('chalicelib.src.seedwork.infrastructure.event_loop._thread_cleanups',
+               [lambda: cleaned_up.append(threading.current_thread())]):
+        worker = run_sync(run_in_thread(threading.current_thread))
+
+    assert cleaned_up == [worker]
+    assert worker is not threading.current_thread()
+
+
+def test_run_sync_keeps_the_callers_context():
+    tracer = Tracer(enabled=True, exporter=MagicMock())
+
+    async def operation():
+        record_operation('AsyncOperation')
+        with tracer.span('async operation') as span:
+            return span
+
+    with RequestProfile() as profile, tracer.span('request') as request_span:
+        span = run_sync(operation())
+
+    assert (span.trace_id, span.parent_span_id) == (request_span.trace_id, request_span.span_id)
+    assert profile.operations == ['AsyncOperation']
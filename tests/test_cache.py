@@ -0,0 +1,125 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from chalicelib.src.modules.application.commands.create_cognito_user import CreateCognitoUserCommand
+from chalicelib.src.modules.application.queries.get_users import GetUsersQuery, filters_fingerprint
+from chalicelib.src.modules.infrastructure.cache import NEGATIVE_USER_CACHE
+from chalicelib.src.modules.infrastructure.cognito_repository import UserCognitoRepository
+from chalicelib.src.modules.infrastructure.repository import UserRepositoryPostgres
+from chalicelib.src.seedwork.application.commands import execute_command
+from chalicelib.src.seedwork.application.queries import execute_query
+from chalicelib.src.seedwork.infrastructure.cache import CacheTier, InMemoryCache, TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.metrics()['evictions'] == 1
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=10, ttl=0.01)
+    cache.set('a', 1)
+    time.sleep(0.02)
+
+    assert cache.get('a') is None
+    assert cache.metrics()['hit_ratio'] == 0.0
+
+
+def test_cache_tier_namespaces_and_tenant_versions():
+    cache = CacheTier(InMemoryCache(), namespace='users-test', default_ttl=60)
+    key = cache.tenant_key(2, 'users', 'all')
+    cache.set(key, [{'id': 1}])
+
+    assert key == 'users-test:tenant:2:v0:users:all'
+    assert cache.get(key) == [{'id': 1}]
+
+    cache.bump_tenant(2)
+
+    assert cache.tenant_key(2, 'users', 'all') == 'users-test:tenant:2:v1:users:all'
+    assert cache.get(cache.tenant_key(2, 'users', 'all')) is None
+
+
+def test_cache_tier_get_many():
+    cache = CacheTier(InMemoryCache(), namespace='users-test')
+    cache.set_many({cache.key('a'): {'sub': 'a'}, cache.key('b'): {'sub': 'b'}})
+
+    assert cache.get_many([cache.key('a'), cache.key('missing'), cache.key('b')]) == {
+        'users-test:a': {'sub': 'a'},
+        'users-test:b': {'sub': 'b'},
+    }
+
+
+def test_get_users_query_is_served_from_shared_cache():
+    cache = CacheTier(InMemoryCache(), namespace='users-test')
+    users = [{'id': 1, 'cognito_user_sub': 'sub-1', 'client_id': 2}]
+
+    with patch('chalicelib.src.modules.application.queries.get_users.SHARED_CACHE', cache):
+        with patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get_all',
+                   return_value=users) as get_all:
+            assert execute_query(GetUsersQuery(client_id='2')).result == users
+            assert execute_query(GetUsersQuery(client_id='2')).result == users
+            assert get_all.call_count == 1
+
+            cache.bump_tenant('2')
+            execute_query(GetUsersQuery(client_id='2'))
+            assert get_all.call_count == 2
+
+
+def test_get_users_query_caches_serialized_body_in_the_tenant_entry():
+    cache = CacheTier(InMemoryCache(), namespace='users-test')
+    users = [{'id': 1, 'cognito_user_sub': 'sub-1', 'client_id': 2}]
+
+    with patch('chalicelib.src.modules.application.queries.get_users.SHARED_CACHE', cache):
+        with patch('chalicelib.src.modules.infrastructure.repository.UserRepositoryPostgres.get_all',
+                   return_value=users) as get_all:
+            body = execute_query(GetUsersQuery(client_id='2', serialized=True)).result
+
+            assert body == '[{"id":1,"cognito_user_sub":"sub-1","client_id":2}]'
+            assert execute_query(GetUsersQuery(client_id='2', serialized=True)).result == body
+            assert get_all.call_count == 1
+            assert cache.get_raw(cache.tenant_key('2', 'users-json', filters_fingerprint({'client_id': '2'}))) == body
+
+
+def test_user_repository_negative_cache():
+    db_session = MagicMock()
+    db_session.execute.return_value.scalar.return_value = None
+
+    with patch('chalicelib.src.modules.infrastructure.repository.init_db', return_value=db_session):
+        repository = UserRepositoryPostgres()
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                repository.get('dead-sub')
+
+    assert db_session.execute.call_count == 1
+    assert NEGATIVE_USER_CACHE.metrics()['hits'] == 2
+
+
+def test_cognito_repository_negative_cache_cleared_on_create():
+    class UserNotFoundException(Exception):
+        pass
+
+    cognito_client = MagicMock()
+    cognito_client.exceptions.UserNotFoundException = UserNotFoundException
+    cognito_client.admin_get_user.side_effect = UserNotFoundException()
+    cognito_client.admin_create_user.return_value = {'User': {'Attributes': [{'Name': 'sub', 'Value': 'new-sub'}]}}
+    repository = UserCognitoRepository(cognito_client=cognito_client, user_pool_id='pool')
+
+    assert repository.get('new-sub') is None
+    assert repository.get('new-sub') is None
+    assert cognito_client.admin_get_user.call_count == 1
+
+    execute_command(CreateCognitoUserCommand(cognito_client=cognito_client, user_pool_id='pool', user_as_json={
+        'email': 'new@example.com', 'user_role': 'Regular', 'client_id': 2, 'password': 'secret'
+    }))
+    repository.get('new-sub')
+
+    assert cognito_client.admin_get_user.call_count == 2
@@ -0,0 +1,44 @@
+import pytest
+
+from chalicelib.src.seedwork.infrastructure.circuit_breaker import CircuitBreaker, CircuitOpenException, CLOSED, \
+    HALF_OPEN, OPEN
+
+
+def _fail():
+    raise RuntimeError("backend down")
+
+
+def test_circuit_breaker_opens_and_fails_fast():
+    breaker = CircuitBreaker('test', failure_rate_threshold=0.5, minimum_calls=4, open_seconds=60)
+
+    assert breaker.call(lambda: 'ok') == 'ok'
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            breaker.call(_fail)
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenException):
+        breaker.call(lambda: 'ok')
+    assert breaker.call(lambda: 'ok', fallback=lambda: 'cached') == 'cached'
+    assert breaker.metrics()['rejected'] == 2
+
+
+def test_circuit_breaker_ignores_expected_errors():
+    breaker = CircuitBreaker('test', minimum_calls=2, is_failure=lambda error: not isinstance(error, KeyError))
+
+    for _ in range(5):
+        with pytest.raises(KeyError):
+            breaker.call(lambda: {}['missing'])
+
+    assert breaker.state == CLOSED
+
+
+def test_circuit_breaker_half_open_probe_closes():
+    breaker = CircuitBreaker('test', minimum_calls=1, open_seconds=0)
+
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail)
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == CLOSED
@@ -0,0 +1,58 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import psycopg
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from chalicelib.src.config.db import driver_url, init_db, pipeline
+
+
+def test_driver_url():
+    assert driver_url('postgresql://user:pw@host:5432/db', 'psycopg') == 'postgresql+psycopg://user:pw@host:5432/db'
+    assert driver_url('postgres://user:pw@host/db', 'psycopg') == 'postgresql+psycopg://user:pw@host/db'
+    assert driver_url('postgresql+psycopg://host/db', 'psycopg2') == 'postgresql+psycopg2://host/db'
+    assert driver_url('sqlite://', 'psycopg') == 'sqlite://'
+
+
+def test_pipeline_uses_psycopg_pipeline_when_available():
+    session = MagicMock()
+    driver_connection = session.connection.return_value.connection.driver_connection
+
+    with pipeline(session):
+        driver_connection.pipeline.return_value.__enter__.assert_called_once()
+    driver_connection.pipeline.return_value.__exit__.assert_called_once()
+
+
+def test_pipeline_is_a_no_op_without_pipeline_support():
+    session = MagicMock()
+    session.connection.return_value.connection.driver_connection = object()
+
+    with pipeline(session):
+        pass
+
+
+def test_pipeline_wraps_driver_errors_raised_on_sync():
+    session = MagicMock()
+    session.connection.return_value.dialect.dbapi = psycopg
+    driver_connection = session.connection.return_value.connection.driver_connection
+    driver_connection.pipeline.return_value.__exit__.side_effect = psycopg.errors.UniqueViolation('duplicate')
+
+    with pytest.raises(IntegrityError):
+        with pipeline(session):
+            pass
+
+
+def test_init_db_gives_each_thread_its_own_session():
+    with patch('chalicelib.src.config.db.engine', None), patch('chalicelib.src.config.db.db_session', None), \
+            patch('chalicelib.src.config.db.register_thread_cleanup') as register_thread_cleanup:
+        db_session = init_db()
+        sessions = []
+        worker = threading.Thread(target=lambda: sessions.append(db_session()))
+        worker.start()
+        worker.join()
+
+    assert db_session() is db_session()
+    assert sessions[0] is not db_session()
+    register_thread_cleanup.assert_called_once_with(db_session.remove)
+    db_session.remove()
@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+from botocore.exceptions import ClientError
+from sqlalchemy.dialects import postgresql
+
+from chalicelib.src.modules.application.commands.drain_cognito_outbox import DrainCognitoOutboxCommand, \
+    coalesce_outbox_messages
+from chalicelib.src.modules.infrastructure.dto import OutboxOperation
+from chalicelib.src.modules.infrastructure.outbox_repository import LEASE_HEADS, LEASE_QUEUED_BEHIND_HEADS, \
+    CognitoOutboxRepositoryPostgres
+from chalicelib.src.seedwork.application.commands import execute_command
+
+
+def _message(message_id, user_sub, operation, payload=None):
+    return SimpleNamespace(id=message_id, user_sub=user_sub, operation=operation, payload=payload)
+
+
+def test_coalesce_outbox_messages():
+    messages = [
+        _message(3, 'sub-1', OutboxOperation.UPDATE_ATTRIBUTES, {'custom:custom:userRole': 'Agent'}),
+        _message(1, 'sub-1', OutboxOperation.UPDATE_ATTRIBUTES, {'custom:client_id': '2',
+                                                                  'custom:custom:userRole': 'Admin'}),
+        _message(2, 'sub-2', OutboxOperation.UPDATE_ATTRIBUTES, {'custom:client_id': '3'}),
+        _message(4, 'sub-2', OutboxOperation.DELETE),
+    ]
+
+    result = coalesce_outbox_messages(messages)
+
+    assert result['sub-1'] == (OutboxOperation.UPDATE_ATTRIBUTES,
+                               {'custom:client_id': '2', 'custom:custom:userRole': 'Agent'}, [1, 3])
+    assert result['sub-2'] == (OutboxOperation.DELETE, {}, [2, 4])
+
+
+def test_drain_cognito_outbox():
+    messages = [
+        _message(1, 'sub-1', OutboxOperation.UPDATE_ATTRIBUTES, {'custom:client_id': '2'}),
+        _message(2, 'sub-2', OutboxOperation.DELETE),
+        _message(3, 'sub-3', OutboxOperation.DELETE),
+    ]
+    not_found = ClientError({'Error': {'Code': 'UserNotFoundException'}}, 'admin_delete_user')
+    outbox = MagicMock()
+    outbox.claim_batch.return_value = messages
+
+    with patch('chalicelib.src.modules.infrastructure.factory.CognitoOutboxRepositoryPostgres', return_value=outbox):
+        with patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.update') as update:
+            with patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.remove',
+                       side_effect=[None, not_found]):
+                result = execute_command(DrainCognitoOutboxCommand(cognito_client=MagicMock(),
+                                                                   user_pool_id='pool'))
+
+    update.assert_called_once_with(user_sub='sub-1', attributes={'custom:client_id': '2'})
+    outbox.complete.assert_called_once_with([1, 2, 3])
+    outbox.commit.assert_called_once()
+    assert result == {'claimed': 3, 'processed': 3, 'rescheduled': 0, 'failed': 0}
+
+
+def test_coalesce_outbox_messages_disable():
+    messages = [
+        _message(1, 'sub-1', OutboxOperation.UPDATE_ATTRIBUTES, {'custom:client_id': '2'}),
+        _message(2, 'sub-1', OutboxOperation.DISABLE),
+        _message(3, 'sub-2', OutboxOperation.DISABLE),
+        _message(4, 'sub-2', OutboxOperation.DELETE),
+    ]
+
+    result = coalesce_outbox_messages(messages)
+
+    assert result['sub-1'] == (OutboxOperation.DISABLE, {}, [1, 2])
+    assert result['sub-2'] == (OutboxOperation.DELETE, {}, [3, 4])
+
+
+def test_drain_cognito_outbox_disable():
+    outbox = MagicMock()
+    outbox.claim_batch.return_value = [_message(1, 'sub-1', OutboxOperation.DISABLE)]
+
+    with patch('chalicelib.src.modules.infrastructure.factory.CognitoOutboxRepositoryPostgres', return_value=outbox):
+        with patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.disable') as disable:
+            result = execute_command(DrainCognitoOutboxCommand(cognito_client=MagicMock(), user_pool_id='pool'))
+
+    disable.assert_called_once_with('sub-1')
+    outbox.complete.assert_called_once_with([1])
+    assert result['processed'] == 1
+
+
+def test_claim_batch_leases_the_head_of_each_queue_and_commits():
+    heads = [_message(1, 'sub-1', OutboxOperation.UPDATE_ATTRIBUTES)]
+    followers = [_message(4, 'sub-1', OutboxOperation.DELETE)]
+    session = MagicMock()
+    session.execute.return_value.scalars.return_value.all.side_effect = [heads, followers]
+
+    with patch('chalicelib.src.modules.infrastructure.outbox_repository.init_db', return_value=session):
+        claimed = CognitoOutboxRepositoryPostgres().claim_batch(10)
+
+    statement = str(LEASE_HEADS.compile(dialect=postgresql.dialect()))
+    assert statement.startswith('UPDATE cognito_outbox SET available_at=(now() +')
+    assert 'NOT (EXISTS (SELECT' in statement and 'cognito_outbox_1.id < cognito_outbox.id' in statement
+    assert session.execute.call_args.args == (LEASE_QUEUED_BEHIND_HEADS, {'user_subs': ['sub-1'], 'head_ids': [1]})
+    session.commit.assert_called_once()
+    assert claimed == heads + followers
+
+
+def test_drain_cognito_outbox_update_of_missing_user_is_processed():
+    outbox = MagicMock()
+    outbox.claim_batch.return_value = [_message(1, 'sub-1', OutboxOperation.UPDATE_ATTRIBUTES,
+                                                {'custom:client_id': '2'})]
+    cognito_client = MagicMock()
+    cognito_client.exceptions.UserNotFoundException = ClientError
+    cognito_client.admin_update_user_attributes.side_effect = ClientError(
+        {'Error': {'Code': 'UserNotFoundException'}}, 'admin_update_user_attributes')
+
+    with patch('chalicelib.src.modules.infrastructure.factory.CognitoOutboxRepositoryPostgres', return_value=outbox):
+        result = execute_command(DrainCognitoOutboxCommand(cognito_client=cognito_client, user_pool_id='pool'))
+
+    outbox.reschedule.assert_not_called()
+    outbox.complete.assert_called_once_with([1])
+    assert result == {'claimed': 1, 'processed': 1, 'rescheduled': 0, 'failed': 0}
@@ -0,0 +1,15 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from chalicelib.src.config.partitioning import partitioned_users_table
+from chalicelib.src.modules.infrastructure.dto import User
+
+
+def test_partitioned_users_table():
+    table = partitioned_users_table()
+    ddl = str(CreateTable(table).compile(dialect=postgresql.dialect()))
+
+    assert [column.name for column in table.primary_key.columns] == ['id', 'client_id']
+    assert 'PARTITION BY HASH (client_id)' in ddl
+    assert {index.name for index in table.indexes} == {index.name for index in User.__table__.indexes}
+    assert [column.name for column in User.__table__.primary_key.columns] == ['id']
@@ -0,0 +1,46 @@
+from unittest.mock import patch, MagicMock
+
+from botocore.exceptions import ClientError
+from sqlalchemy.dialects import postgresql
+
+from chalicelib.src.modules.application.commands.purge_deleted_users import PurgeDeletedUsersCommand
+from chalicelib.src.modules.infrastructure.repository import TOMBSTONES, UserRepositoryPostgres
+from chalicelib.src.seedwork.application.commands import execute_command
+
+
+def test_purge_deleted_users():
+    users = MagicMock()
+    users.claim_tombstones.return_value = [(1, 'sub-1'), (2, 'sub-2'), (3, 'sub-3')]
+    not_found = ClientError({'Error': {'Code': 'UserNotFoundException'}}, 'admin_delete_user')
+    throttled = ClientError({'Error': {'Code': 'TooManyRequestsException'}}, 'admin_delete_user')
+    outcomes = {'sub-1': None, 'sub-2': not_found, 'sub-3': throttled}
+
+    def remove(user_sub):
+        if outcomes[user_sub] is not None:
+            raise outcomes[user_sub]
+
+    with patch('chalicelib.src.modules.infrastructure.factory.UserRepositoryPostgres', return_value=users):
+        with patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.remove',
+                   side_effect=remove):
+            result = execute_command(PurgeDeletedUsersCommand(cognito_client=MagicMock(), user_pool_id='pool',
+                                                              grace_seconds=60, requests_per_second=0))
+
+    users.claim_tombstones.assert_called_once_with(100, 60)
+    users.purge.assert_called_once_with([1, 2])
+    assert result == {'claimed': 3, 'purged': 2, 'failed': 1}
+
+
+def test_claim_tombstones_commits_the_lease_before_returning():
+    session = MagicMock()
+    session.execute.return_value.all.return_value = [(1, 'sub-1')]
+
+    with patch('chalicelib.src.modules.infrastructure.repository.init_db', return_value=session):
+        tombstones = UserRepositoryPostgres().claim_tombstones(10, 60)
+
+    statement = str(TOMBSTONES.compile(dialect=postgresql.dialect()))
+    assert 'purge_attempts=(users.purge_attempts +' in statement
+    assert 'updated_at=users.updated_at' in statement
+    assert 'users.purge_after IS NULL OR users.purge_after <= now()' in statement
+    assert session.execute.call_args.args[0] is TOMBSTONES
+    session.commit.assert_called_once()
+    assert tombstones == [(1, 'sub-1')]
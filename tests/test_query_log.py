@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from chalicelib.src.seedwork.infrastructure.query_log import SlowQueryLog, normalize_statement, redact_parameters
+
+
+def test_normalize_statement():
+    statement = """SELECT users.id FROM users
+                   WHERE users.client_id = %(client_id_1)s AND users.name ILIKE '%john%' AND users.id IN (1, 2, 3)"""
+
+    assert normalize_statement(statement) == \
+        "SELECT users.id FROM users WHERE users.client_id = ? AND users.name ILIKE ? AND users.id IN (?)"
+
+
+def test_redact_parameters():
+    assert redact_parameters({'name': 'John', 'client_id': 2}) == {'name': 'str', 'client_id': 'int'}
+    assert redact_parameters([{'a': 1}, {'a': 2}]) == {'executemany': 2}
+
+
+def test_slow_query_log_tracks_top_statements():
+    engine = create_engine('sqlite://')
+    query_log = SlowQueryLog(threshold_ms=0, top_n=5)
+    query_log.install(engine)
+
+    with engine.connect() as connection:
+        for value in range(3):
+            connection.execute(text('SELECT :value'), {'value': value})
+
+    top = query_log.top()
+    assert top[0]['statement'] == 'SELECT ?'
+    assert top[0]['count'] == 3
+    assert top[0]['parameters'] == ['int']
+    assert query_log.metrics()['slow_statements'] == 3
+
+
+def test_slow_query_log_does_not_analyze_locking_statements():
+    query_log = SlowQueryLog(threshold_ms=0, explain=True)
+    conn = MagicMock()
+    cursor = conn.connection.cursor.return_value
+    cursor.fetchall.return_value = [('Seq Scan on users',)]
+
+    for statement in ('SELECT id FROM users FOR UPDATE SKIP LOCKED', 'SELECT id, updated_at FROM users'):
+        context = SimpleNamespace()
+        query_log._before_cursor_execute(conn, None, statement, {}, context, False)
+        query_log._after_cursor_execute(conn, None, statement, {}, context, False)
+
+    explained = [call.args[0] for call in cursor.execute.call_args_list if call.args[0].startswith('EXPLAIN')]
+    assert explained == ['EXPLAIN SELECT id FROM users FOR UPDATE SKIP LOCKED',
+                         'EXPLAIN (ANALYZE, BUFFERS) SELECT id, updated_at FROM users']
+
+
+def test_slow_query_log_failed_statements_leave_no_state_on_the_connection():
+    engine = create_engine('sqlite://')
+    query_log = SlowQueryLog(threshold_ms=0)
+    query_log.install(engine)
+
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text('SELECT * FROM missing_table'))
+        connection.execute(text('SELECT 1'))
+
+        assert 'slow_query_log_started' not in connection.info
+    assert query_log.metrics()['statements'] == 1
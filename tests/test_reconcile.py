@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, MagicMock
+
+from chalicelib.src.modules.application.commands.reconcile_users import ReconcileUsersCommand, merge_join, \
+    sub_prefixes
+from chalicelib.src.seedwork.application.commands import execute_command
+
+OLD = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _user(user_sub, client_id='2', user_role='Admin', timestamp=OLD):
+    return {'sub': user_sub, 'client_id': client_id, 'user_role': user_role,
+            'created_at': timestamp, 'updated_at': timestamp}
+
+
+def test_merge_join():
+    left = [{'sub': 'a'}, {'sub': 'c'}, {'sub': 'd'}]
+    right = [{'sub': 'b'}, {'sub': 'c'}]
+
+    pairs = [(l and l['sub'], r and r['sub']) for l, r in merge_join(left, right)]
+
+    assert pairs == [('a', None), (None, 'b'), ('c', 'c'), ('d', None)]
+
+
+def test_sub_prefixes():
+    assert sub_prefixes(1) == list('0123456789abcdef')
+    assert len(sub_prefixes(2)) == 256
+
+
+def test_reconcile_users_reports_and_repairs():
+    recent = datetime.now(timezone.utc) - timedelta(seconds=10)
+    cognito_users = {
+        '0': [_user('0c'), _user('0a'), _user('0b', user_role='Agent'), _user('0e', timestamp=recent)],
+        '1': [_user('1a')],
+    }
+    db_users = {
+        '0': [_user('0a'), _user('0b'), _user('0d')],
+        '1': [_user('1a')],
+    }
+    reconciliation = MagicMock()
+    reconciliation.load_checkpoint.return_value = None
+    reconciliation.stream_users.side_effect = lambda prefix, upper_prefix: iter(db_users.get(prefix, []))
+    users = MagicMock()
+    users.remove.return_value = {'client_id': 2}
+    outbox = MagicMock()
+
+    with patch('chalicelib.src.modules.infrastructure.factory.ReconciliationRepositoryPostgres',
+               return_value=reconciliation), \
+            patch('chalicelib.src.modules.infrastructure.factory.UserRepositoryPostgres', return_value=users), \
+            patch('chalicelib.src.modules.infrastructure.factory.CognitoOutboxRepositoryPostgres',
+                  return_value=outbox), \
+            patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.stream_users',
+                  side_effect=lambda prefix: iter(cognito_users.get(prefix, []))), \
+            patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.remove') as remove:
+        report = execute_command(ReconcileUsersCommand(cognito_client=MagicMock(), user_pool_id='pool',
+                                                       repair=True, prefix_length=1))
+
+    assert report['completed'] is True
+    assert report['buckets'] == 16
+    assert report['cognito_orphans'] == {'count': 1, 'sample': ['0c']}
+    assert report['db_orphans'] == {'count': 1, 'sample': ['0d']}
+    assert report['mismatched'] == {'count': 1, 'sample': ['0b']}
+    assert report['skipped_recent'] == 1
+    assert report['repaired'] == 3
+    remove.assert_called_once_with('0c')
+    users.remove.assert_called_once_with('0d')
+    message = outbox.add.call_args.args[0]
+    assert message.user_sub == '0b'
+    assert message.payload == {'custom:client_id': '2', 'custom:custom:userRole': 'Admin'}
+    reconciliation.clear_checkpoint.assert_called_once_with('cognito-users')
+
+
+def test_reconcile_users_resumes_from_checkpoint():
+    reconciliation = MagicMock()
+    reconciliation.load_checkpoint.return_value = ('d', {'buckets': 14, 'cognito_users': 0, 'db_users': 0,
+                                                         'skipped_recent': 0, 'repaired': 0, 'repair_failures': 0,
+                                                         'cognito_orphans': {'count': 0, 'sample': []},
+                                                         'db_orphans': {'count': 0, 'sample': []},
+                                                         'mismatched': {'count': 0, 'sample': []}})
+    reconciliation.stream_users.return_value = iter([])
+
+    with patch('chalicelib.src.modules.infrastructure.factory.ReconciliationRepositoryPostgres',
+               return_value=reconciliation), \
+            patch('chalicelib.src.modules.infrastructure.cognito_repository.UserCognitoRepository.stream_users',
+                  return_value=iter([])) as stream_users:
+        report = execute_command(ReconcileUsersCommand(cognito_client=MagicMock(), user_pool_id='pool',
+                                                       prefix_length=1, max_buckets=1))
+
+    stream_users.assert_called_once_with('e')
+    reconciliation.save_checkpoint.assert_called_once_with('cognito-users', 'e', report)
+    assert report['buckets'] == 15
+    assert report['completed'] is False
+    reconciliation.clear_checkpoint.assert_not_called()
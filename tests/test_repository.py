@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+import psycopg
+import pytest
+
+from chalicelib.src.modules.infrastructure.dto import CognitoOutboxMessage, CommunicationType, DocumentType, \
+    OutboxOperation, User, UserRole
+from chalicelib.src.modules.infrastructure.repository import STATS_TOTAL, USER_UPDATE, USERS_SOFT_DELETE, \
+    UserRepositoryPostgres
+
+
+def _user(user_sub, client_id=2, user_role='Agent'):
+    return SimpleNamespace(cognito_user_sub=user_sub, document_type='Cedula', user_role=user_role,
+                           client_id=client_id, id_number='123', name='John', last_name='Doe',
+                           communication_type='Email', cellphone=None)
+
+
+def _repository(session):
+    with patch('chalicelib.src.modules.infrastructure.repository.init_db', return_value=session):
+        return UserRepositoryPostgres()
+
+
+def test_add_many_inserts_rows_and_bumps_stats_in_one_batch():
+    session = MagicMock()
+    session.execute.return_value.scalars.return_value.all.return_value = []
+
+    with patch.object(UserRepositoryPostgres, '_bump_stats') as bump_stats:
+        _repository(session).add_many([_user('sub-1'), _user('sub-2', user_role='Admin'),
+                                       _user('sub-3', client_id=3)])
+
+    insert_users = session.execute.call_args_list[0]
+    assert insert_users.args[0].table.name == User.__tablename__
+    assert [row['cognito_user_sub'] for row in insert_users.args[1]] == ['sub-1', 'sub-2', 'sub-3']
+    assert insert_users.args[1][0]['document_type'] == DocumentType.CEDULA
+    deltas = bump_stats.call_args.args[0]
+    assert deltas[(2, STATS_TOTAL, '')] == 2
+    assert deltas[(2, 'user_role', 'Admin')] == 1
+    assert deltas[(3, STATS_TOTAL, '')] == 1
+    session.commit.assert_called_once()
+    session.add_all.assert_not_called()
+    session.flush.assert_not_called()
+
+
+def test_add_many_maps_pipeline_integrity_errors():
+    session = MagicMock()
+    session.connection.return_value.dialect.dbapi = psycopg
+    driver_connection = session.connection.return_value.connection.driver_connection
+    driver_connection.pipeline.return_value.__exit__.side_effect = psycopg.errors.UniqueViolation('duplicate')
+
+    with pytest.raises(ValueError):
+        _repository(session).add_many([_user('sub-1')])
+
+    session.rollback.assert_called_once()
+    session.commit.assert_not_called()
+
+
+def _stored_user():
+    return User(id=1, cognito_user_sub='sub-1', document_type=DocumentType.CEDULA, user_role=UserRole.REGULAR,
+                client_id=2, id_number='123', name='John', last_name='Doe',
+                communication_type=CommunicationType.EMAIL)
+
+
+def test_update_only_stages_cognito_sync_when_asked():
+    session = MagicMock()
+    session.execute.return_value.scalar.return_value = _stored_user()
+
+    with patch.object(UserRepositoryPostgres, '_bump_stats'):
+        _repository(session).update('sub-1', {'user_role': 'Agent'})
+
+    assert not any(isinstance(call.args[0], CognitoOutboxMessage) for call in session.add.call_args_list)
+
+    session.execute.return_value.scalar.return_value = _stored_user()
+    with patch.object(UserRepositoryPostgres, '_bump_stats'):
+        _repository(session).update('sub-1', {'user_role': 'Agent'}, sync_cognito=True)
+
+    message = session.add.call_args.args[0]
+    assert isinstance(message, CognitoOutboxMessage)
+    assert message.payload == {'custom:custom:userRole': 'Agent'}
+
+
+def test_update_many_batches_core_updates_and_outbox_rows():
+    session = MagicMock()
+    session.execute.return_value.scalars.return_value.all.return_value = [_stored_user()]
+
+    with patch.object(UserRepositoryPostgres, '_bump_stats') as bump_stats:
+        _repository(session).update_many({'sub-1': {'user_role': 'Agent', 'name': 'Jane'}}, sync_cognito=True)
+
+    statements = {call.args[0]: call.args[1] for call in session.execute.call_args_list[1:3]}
+    assert statements[USER_UPDATE] == [{'user_id': 1, 'name': 'Jane', 'user_role': UserRole.AGENT}]
+    outbox = next(rows for statement, rows in statements.items() if statement is not USER_UPDATE)
+    assert outbox == [{'user_sub': 'sub-1', 'operation': OutboxOperation.UPDATE_ATTRIBUTES,
+                       'payload': {'custom:custom:userRole': 'Agent'}}]
+    deltas = bump_stats.call_args.args[0]
+    assert deltas[(2, 'user_role', 'Regular')] == -1
+    assert deltas[(2, 'user_role', 'Agent')] == 1
+    assert deltas[(2, STATS_TOTAL, '')] == 0
+    session.commit.assert_called_once()
+    session.add.assert_not_called()
+    session.flush.assert_not_called()
+
+
+def test_remove_many_soft_deletes_and_stages_disable_messages():
+    session = MagicMock()
+    session.execute.return_value.scalars.return_value.all.return_value = [_stored_user()]
+
+    with patch.object(UserRepositoryPostgres, '_bump_stats') as bump_stats:
+        removed = _repository(session).remove_many(['sub-1', 'sub-missing'])
+
+    soft_delete, outbox = session.execute.call_args_list[1:3]
+    assert soft_delete.args == (USERS_SOFT_DELETE, {'user_subs': ['sub-1']})
+    assert outbox.args[1] == [{'user_sub': 'sub-1', 'operation': OutboxOperation.DISABLE}]
+    assert bump_stats.call_args.args[0][(2, STATS_TOTAL, '')] == -1
+    assert list(removed) == ['sub-1']
+    session.commit.assert_called_once()
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from unittest.mock import MagicMock
+
+import pytest
+from botocore.client import BaseClient
+
+from chalicelib.src.seedwork.infrastructure.single_flight import SingleFlight, flight_key
+
+
+@dataclass
+class _Query:
+    user_sub: str
+    cognito_client: BaseClient = None
+
+
+def test_flight_key_ignores_client_objects():
+    first = _Query('abc', cognito_client=MagicMock(spec=BaseClient))
+    second = _Query('abc', cognito_client=MagicMock(spec=BaseClient))
+
+    assert flight_key(first) == flight_key(second)
+    assert flight_key(first) != flight_key(_Query('xyz'))
+    assert flight_key({'user_sub': 'abc'}) is None
+
+
+def test_single_flight_collapses_concurrent_calls():
+    flights = SingleFlight('test')
+    release = threading.Event()
+    calls = []
+
+    def backend():
+        calls.append(1)
+        release.wait(timeout=5)
+        return {'users': ['a']}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do('key', backend, label='q')))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while flights.metrics()['collapsed'] < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'users': ['a']}] * 5
+    assert len({id(result) for result in results}) == 5
+    assert flights.metrics()['by_query']['q'] == {'executions': 1, 'collapsed': 4}
+    assert flights.metrics()['in_flight'] == 0
+
+
+def test_single_flight_shares_errors_and_recovers():
+    flights = SingleFlight('test')
+
+    def backend():
+        raise RuntimeError("backend down")
+
+    with pytest.raises(RuntimeError):
+        flights.do('key', backend)
+    assert flights.do('key', lambda: 'ok') == 'ok'
+
+
+def test_single_flight_async_collapses_concurrent_calls():
+    flights = SingleFlight('test')
+    calls = []
+
+    async def backend():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ['a']
+
+    async def run():
+        return await asyncio.gather(*(flights.do_async('key', backend, label='q') for _ in range(3)))
+
+    assert asyncio.run(run()) == [['a']] * 3
+    assert len(calls) == 1
+    assert flights.metrics()['collapsed'] == 2
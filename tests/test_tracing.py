@@ -0,0 +1,66 @@
+import json
+
+import boto3
+from botocore.stub import Stubber
+from sqlalchemy import create_engine, text
+
+from chalicelib.src.seedwork.infrastructure.tracing import JsonLinesExporter, Tracer
+
+
+def _spans(path):
+    with open(path, encoding='utf-8') as exported:
+        lines = [json.loads(line) for line in exported]
+    return [span for line in lines for span in line['resourceSpans'][0]['scopeSpans'][0]['spans']]
+
+
+def test_disabled_tracer_exports_nothing(tmp_path):
+    tracer = Tracer(enabled=False, exporter=JsonLinesExporter(str(tmp_path / 'spans.jsonl')))
+
+    with tracer.span('GET /users/{client_id}'):
+        pass
+
+    assert tracer.exporter.exported == 0
+    assert not (tmp_path / 'spans.jsonl').exists()
+
+
+def test_spans_nest_and_export_in_one_batch(tmp_path):
+    tracer = Tracer(enabled=True, exporter=JsonLinesExporter(str(tmp_path / 'spans.jsonl')))
+
+    with tracer.span('GET /user/{user_sub}', **{'http.route': '/user/{user_sub}'}):
+        with tracer.span('query GetUserQuery'):
+            pass
+        try:
+            with tracer.span('command DeleteUserCommand'):
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+
+    with open(tmp_path / 'spans.jsonl', encoding='utf-8') as exported:
+        assert len(exported.readlines()) == 1
+    query, command, root = _spans(tmp_path / 'spans.jsonl')
+    assert query['parentSpanId'] == root['spanId'] == command['parentSpanId']
+    assert query['traceId'] == root['traceId']
+    assert 'parentSpanId' not in root
+    assert command['status'] == {'code': 2, 'message': 'RuntimeError: boom'}
+    assert root['attributes'] == [{'key': 'http.route', 'value': {'stringValue': '/user/{user_sub}'}}]
+
+
+def test_sqlalchemy_and_botocore_calls_become_child_spans(tmp_path):
+    tracer = Tracer(enabled=True, exporter=JsonLinesExporter(str(tmp_path / 'spans.jsonl')))
+    engine = create_engine('sqlite://')
+    tracer.install_sqlalchemy(engine)
+    client = boto3.client('cognito-idp', region_name='us-east-1', aws_access_key_id='test',
+                          aws_secret_access_key='test')
+    tracer.install_botocore(client)
+
+    with Stubber(client) as stubber:
+        stubber.add_response('admin_get_user', {'Username': 'jane'}, {'UserPoolId': 'pool', 'Username': 'jane'})
+        with tracer.span('POST /user'):
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+            client.admin_get_user(UserPoolId='pool', Username='jane')
+
+    statement, cognito, root = _spans(tmp_path / 'spans.jsonl')
+    assert statement['name'] == 'db SELECT'
+    assert cognito['name'] == 'cognito-idp AdminGetUser'
+    assert statement['parentSpanId'] == cognito['parentSpanId'] == root['spanId']
@@ -0,0 +1,39 @@
+from chalicelib.src.modules.presentation.validators import CREATE_USER_VALIDATOR, UPDATE_ME_VALIDATOR
+
+
+def test_create_user_validator_reports_every_error():
+    errors = CREATE_USER_VALIDATOR.errors({
+        "client_id": 2,
+        "document_type": "Licencia",
+        "user_role": "Admin",
+        "name": "John",
+        "last_name": "Doe",
+        "email": "not-an-email",
+        "cellphone": "1234567890",
+        "communication_type": ["Email"]
+    })
+
+    assert errors == [
+        "Invalid 'document_type' value. Must be one of ['Cedula', 'Passport', 'Cedula_Extranjeria']",
+        "Missing required field: id_number",
+        "Invalid email format",
+        "Missing required field: password",
+        "Invalid 'communication_type' value. Must be one of ['Email', 'Telefono', 'Sms', 'Chat']"
+    ]
+
+
+def test_update_me_validator_is_partial():
+    assert UPDATE_ME_VALIDATOR.errors({"name": "John"}, partial=True) == []
+    assert UPDATE_ME_VALIDATOR.errors(None, partial=True) == ["Request body must be a JSON object"]
+
+
+def test_validate_many():
+    valid = {
+        "client_id": 2, "document_type": "Cedula", "user_role": "Agent", "id_number": "1", "name": "John",
+        "last_name": "Doe", "email": "john.doe@example.com", "cellphone": "1", "password": "secret",
+        "communication_type": "Sms"
+    }
+
+    assert CREATE_USER_VALIDATOR.validate_many([valid, {**valid, "user_role": "Owner"}]) == [
+        [], ["Invalid 'user_role' value. Must be one of ['Superadmin', 'Admin', 'Agent', 'Regular']"]
+    ]